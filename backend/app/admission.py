@@ -0,0 +1,105 @@
+"""Admission control: per-client rate limiting and a bounded queue for LLM work.
+
+- `RateLimiter`: one token bucket per client key (IP address), refilled at
+  `rate` tokens per second up to `burst`. Buckets live in a bounded LRU, so
+  a flood of distinct addresses cannot grow memory without limit.
+- `AdmissionQueue`: at most `limit` LLM generations run at once; up to
+  `max_queue` more may wait, each for at most `max_wait` seconds. Anything
+  beyond that is refused at once with `Overloaded`, so the caller can answer
+  with a 429 or a retrieval-only answer instead of piling up timeouts.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional, Tuple
+
+from .metrics import LLM_QUEUE_DEPTH, SHED
+
+
+class Overloaded(RuntimeError):
+    """Refused by admission control; `retry_after` is a hint in seconds."""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        # client key -> (tokens, last refill time)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str) -> float:
+        """Take one token for `key`: 0.0 if allowed, else seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens >= 1.0:
+                tokens -= 1.0
+                wait = 0.0
+            else:
+                wait = (1.0 - tokens) / self.rate
+            self._buckets[key] = (tokens, now)
+            # Forgetting an idle client only hands it a full bucket again
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class AdmissionQueue:
+    def __init__(self, limit: int, max_queue: int, max_wait: float) -> None:
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.waiting = 0
+        self.running = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.limit)
+        return self._slots
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        """Hold one LLM slot for the block; raise Overloaded if none frees up in time."""
+        slots = self.slots
+        if slots.locked():
+            if self.waiting >= self.max_queue:
+                SHED.inc(reason="queue_full")
+                raise Overloaded("File d'attente LLM pleine.", self.max_wait)
+            self.waiting += 1
+            LLM_QUEUE_DEPTH.set(self.waiting)
+            try:
+                await asyncio.wait_for(slots.acquire(), self.max_wait)
+            except asyncio.TimeoutError:
+                SHED.inc(reason="queue_timeout")
+                raise Overloaded("Délai d'attente LLM dépassé.", self.max_wait) from None
+            finally:
+                self.waiting -= 1
+                LLM_QUEUE_DEPTH.set(self.waiting)
+        else:
+            await slots.acquire()
+        self.running += 1
+        try:
+            yield
+        finally:
+            self.running -= 1
+            slots.release()
+
+    def stats(self) -> dict:
+        return {"limit": self.limit, "running": self.running, "waiting": self.waiting, "max_queue": self.max_queue}
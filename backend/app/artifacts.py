@@ -0,0 +1,178 @@
+"""Binary embedding artifact written by process_all_data.py and mmap-ed by rag.py.
+
+Layout, next to faqs.json:
+
+- ``embeddings.f32.npy``: float32 matrix (count x dimension), one row per FAQ
+- ``embeddings.meta.json``: small header with format, model, dtype, dimension,
+  count, matrix checksum, checksum of the faqs.json it was built from, and the
+  id/offset table (``ids[row] == faq id``)
+
+Compact variants for slow links use the same header with another dtype:
+``float16`` (``embeddings.f16.npy``) or ``int8`` (``embeddings.i8.npy`` plus a
+float32 per-row scale in ``embeddings.i8.scale.npy``; row = int8 * scale).
+
+Only depends on NumPy so the data pipeline can import it without the API stack.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import secrets
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+FORMAT_VERSION = 1
+DTYPES = {'float32': np.float32, 'float16': np.float16, 'int8': np.int8}
+
+
+class ArtifactError(ValueError):
+    """The artifact is missing, corrupt or does not match the current corpus."""
+
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def atomic_write(path: Path, write: Callable[[BinaryIO], Any]) -> None:
+    """Write `path` through `write(file)` and swap it in with os.replace.
+
+    Readers keep their mmap of the old inode; the new file appears atomically.
+    The temp name is unique, as several workers or builds may write the same
+    file. It is created with mode 0666 so the umask applies, as with open().
+    """
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{secrets.token_hex(4)}.tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    os.replace(tmp, path)
+
+
+def _atomic_write_bytes(path: Path, data: bytes) -> None:
+    atomic_write(path, lambda f: f.write(data))
+
+
+def _atomic_save_npy(path: Path, array: np.ndarray) -> None:
+    atomic_write(path, lambda f: np.save(f, array, allow_pickle=False))
+
+
+def scale_path_for(matrix_path: Path) -> Path:
+    """embeddings.i8.npy -> embeddings.i8.scale.npy"""
+    matrix_path = Path(matrix_path)
+    return matrix_path.with_name(matrix_path.stem + '.scale.npy')
+
+
+def quantize_int8(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantization: returns (int8 rows, float32 scales)."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    scales = np.abs(matrix).max(axis=1) / 127.0 if matrix.size else np.zeros(matrix.shape[0], np.float32)
+    scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+    quantized = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+    return quantized, scales
+
+
+def dequantize_int8(quantized: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    return np.asarray(quantized, dtype=np.float32) * np.asarray(scales, dtype=np.float32)[:, None]
+
+
+def write_embedding_artifact(
+    matrix_path: Path,
+    meta_path: Path,
+    ids: Sequence[int],
+    matrix: np.ndarray,
+    model: str,
+    source_checksum: str,
+    dtype: str = 'float32',
+    source_checksums: Sequence[str] = (),
+) -> Dict[str, Any]:
+    """Write the matrix in `dtype` plus its header.
+
+    `source_checksums` lists other encodings of the same faqs.json (e.g. the
+    minified copy) that the artifact is also valid for.
+    """
+    if dtype not in DTYPES:
+        raise ArtifactError(f"unsupported dtype {dtype!r}")
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    if matrix.ndim != 2 or matrix.shape[0] != len(ids):
+        raise ArtifactError(f"matrix shape {matrix.shape} does not match {len(ids)} ids")
+
+    matrix_path = Path(matrix_path)
+    meta_path = Path(meta_path)
+    matrix_path.parent.mkdir(parents=True, exist_ok=True)
+
+    if dtype == 'int8':
+        stored, scales = quantize_int8(matrix)
+        _atomic_save_npy(scale_path_for(matrix_path), scales)
+        checksum = sha256_bytes(stored.tobytes() + scales.tobytes())
+    else:
+        stored = matrix.astype(DTYPES[dtype])
+        checksum = sha256_bytes(stored.tobytes())
+    _atomic_save_npy(matrix_path, stored)
+
+    meta = {
+        "format": FORMAT_VERSION,
+        "model": model,
+        "dtype": dtype,
+        "dimension": int(matrix.shape[1]),
+        "count": int(matrix.shape[0]),
+        "checksum": checksum,
+        "source_checksum": source_checksum,
+    }
+    if source_checksums:
+        meta["source_checksums"] = [source_checksum, *source_checksums]
+    meta["ids"] = [int(i) for i in ids]
+    _atomic_write_bytes(meta_path, json.dumps(meta, separators=(',', ':')).encode('utf-8'))
+    return meta
+
+
+def load_embedding_artifact(
+    matrix_path: Path,
+    meta_path: Path,
+    verify_checksum: bool = False,
+) -> Tuple[Dict[str, Any], List[int], np.ndarray]:
+    """Return (header, ids, float32 matrix).
+
+    float32 artifacts are returned read-only memory-mapped; float16 and int8
+    ones are widened to an in-memory float32 copy. The checksum is not
+    verified by default: that would fault in every page and defeat the point
+    of mapping the file.
+    """
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        matrix = np.load(matrix_path, mmap_mode='r', allow_pickle=False)
+        dtype = meta.get("dtype", "float32")
+        scales = np.load(scale_path_for(matrix_path), allow_pickle=False) if dtype == 'int8' else None
+    except (OSError, ValueError) as exc:
+        raise ArtifactError(f"cannot read embedding artifact: {exc}") from exc
+
+    if meta.get("format") != FORMAT_VERSION:
+        raise ArtifactError(f"unsupported artifact format {meta.get('format')!r}")
+    if dtype not in DTYPES or matrix.dtype != DTYPES[dtype] or matrix.shape != (meta["count"], meta["dimension"]):
+        raise ArtifactError(
+            f"matrix {matrix.dtype}{matrix.shape} does not match header "
+            f"{dtype}({meta['count']}, {meta['dimension']})"
+        )
+    if scales is not None and scales.shape != (meta["count"],):
+        raise ArtifactError("scale table length does not match row count")
+    ids = meta["ids"]
+    if len(ids) != meta["count"]:
+        raise ArtifactError("id table length does not match row count")
+    if verify_checksum:
+        stored = np.asarray(matrix).tobytes() + (scales.tobytes() if scales is not None else b'')
+        if sha256_bytes(stored) != meta["checksum"]:
+            raise ArtifactError("matrix checksum mismatch")
+
+    if dtype == 'int8':
+        matrix = dequantize_int8(matrix, scales)
+    elif dtype == 'float16':
+        matrix = np.asarray(matrix, dtype=np.float32)
+    return meta, ids, matrix
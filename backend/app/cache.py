@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import asyncio
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from . import config
+
+
+_PUNCT_RE = re.compile(r"[?!.،؟,;:\"'«»]+")
+
+
+def normalize_query(query: str) -> str:
+    """Case/spacing/punctuation-insensitive form used for cache keys."""
+    return " ".join(_PUNCT_RE.sub(" ", query.lower()).split())
+
+
+class LRUCache:
+    """Thread-safe LRU map with optional per-entry TTL and hit/miss counters."""
+
+    # In-memory: cheap enough to call from the event loop
+    blocking = False
+
+    def __init__(self, max_entries: int, ttl_seconds: float = 0.0) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            stored_at, value = item
+            if self.ttl_seconds and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._data[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Snapshot of live entries, without touching recency or counters."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                (key, value)
+                for key, (stored_at, value) in self._data.items()
+                if not self.ttl_seconds or now - stored_at <= self.ttl_seconds
+            ]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+def make_cache(name: str, max_entries: int, ttl_seconds: float = 0.0) -> Any:
+    """LRU cache on the configured backend: this process ('memory') or the
+    shared cache service ('server', see cache_server.py) for multi-worker runs."""
+    if config.CACHE_BACKEND == 'server':
+        from .cache_server import RemoteCache
+
+        return RemoteCache(name, max_entries, ttl_seconds, config.CACHE_SERVER_ADDRESS, config.CACHE_SERVER_AUTHKEY)
+    return LRUCache(max_entries, ttl_seconds)
+
+
+AnswerKey = Tuple[str, str, Tuple[int, ...]]
+
+
+class AnswerCache:
+    """Caches LLM answers by (normalized query, language, retrieved FAQ ids).
+
+    With `similarity_threshold` > 0, a miss on the exact key falls back to a
+    near-duplicate lookup: a cached answer for the same language and FAQ ids
+    is reused when its query embedding has cosine >= threshold.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, similarity_threshold: float = 0.0) -> None:
+        self.similarity_threshold = similarity_threshold
+        self._entries = make_cache('answers', max_entries, ttl_seconds)
+        self.near_hits = 0
+
+    @staticmethod
+    def make_key(query: str, language: str, faq_ids: Iterable[int]) -> AnswerKey:
+        return normalize_query(query), language, tuple(sorted(faq_ids))
+
+    def get(self, key: AnswerKey, query_vec: Optional[np.ndarray] = None) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry[0]
+
+        if self.similarity_threshold <= 0 or query_vec is None:
+            return None
+
+        # Linear scan is fine: the cache is bounded to a few thousand entries
+        best_answer, best_sim = None, self.similarity_threshold
+        for other, (answer, vec) in self._entries.items():
+            if other[1:] != key[1:] or vec is None:
+                continue
+            sim = float(vec @ query_vec)
+            if sim >= best_sim:
+                best_answer, best_sim = answer, sim
+
+        if best_answer is not None:
+            self.near_hits += 1
+        return best_answer
+
+    def put(self, key: AnswerKey, answer: str, query_vec: Optional[np.ndarray] = None) -> None:
+        if self.similarity_threshold <= 0:
+            query_vec = None
+        self._entries.put(key, (answer, query_vec))
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def _run(self, func: Any, *args: Any) -> Any:
+        # The shared cache service does socket I/O: keep it off the event loop
+        if self._entries.blocking:
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
+
+    async def aget(self, key: AnswerKey, query_vec: Optional[np.ndarray] = None) -> Optional[str]:
+        return await self._run(self.get, key, query_vec)
+
+    async def aput(self, key: AnswerKey, answer: str, query_vec: Optional[np.ndarray] = None) -> None:
+        await self._run(self.put, key, answer, query_vec)
+
+    async def astats(self) -> Dict[str, Any]:
+        return await self._run(self.stats)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._entries.stats()
+        stats["near_hits"] = self.near_hits
+        stats["ttl_seconds"] = self._entries.ttl_seconds
+        return stats
+
+
+answer_cache = AnswerCache(
+    max_entries=config.ANSWER_CACHE_SIZE,
+    ttl_seconds=config.ANSWER_CACHE_TTL,
+    similarity_threshold=config.ANSWER_CACHE_SIMILARITY,
+)
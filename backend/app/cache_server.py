@@ -0,0 +1,234 @@
+"""Shared cache service for multi-worker deployments.
+
+    cd backend && CACHE_SERVER_AUTHKEY=<secret> python -m app.cache_server --address 127.0.0.1:8765
+
+Workers started with CACHE_BACKEND=server keep their answer cache in this
+process instead of their own memory, so an answer stored by one worker is a
+hit for all of them. It is a stdlib multiprocessing
+manager holding named `LRUCache` instances, reached over a local socket with
+a shared auth key: a stand-in for Redis/memcached, not for untrusted networks.
+
+The protocol is pickle, so anyone holding the key can run code in the service
+and in the workers. Both sides refuse to start without CACHE_SERVER_AUTHKEY,
+and the address should be loopback or a Unix socket path (e.g.
+/run/assistant/cache.sock), never an interface reachable from other hosts.
+"""
+from __future__ import annotations
+
+import argparse
+import ipaddress
+import logging
+import os
+import socket
+import struct
+import threading
+import time
+from multiprocessing import connection, managers
+from multiprocessing.managers import BaseManager
+from typing import Any, Dict, Hashable, List, Optional, Tuple, Union
+
+from . import config
+from .cache import LRUCache
+
+
+logger = logging.getLogger(__name__)
+
+# After a failed call, go straight to the fallback for this long
+_RETRY_AFTER_ERROR = 5.0
+
+
+Address = Union[str, Tuple[str, int]]
+
+
+def parse_address(value: str) -> Address:
+    """'host:port', or a filesystem path for a Unix socket."""
+    if '/' in value:
+        return value
+    host, _, port = value.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def _format_address(address: Address) -> str:
+    return address if isinstance(address, str) else '%s:%s' % address
+
+
+def _is_local(address: Address) -> bool:
+    if isinstance(address, str):
+        return True
+    try:
+        return ipaddress.ip_address(address[0]).is_loopback
+    except ValueError:
+        return address[0] == 'localhost'
+
+
+def _timed_client(address: Address, authkey: Optional[bytes] = None) -> connection.Connection:
+    """`multiprocessing.connection.Client` with CACHE_SERVER_TIMEOUT on connect and on every read/write.
+
+    Connections are read through the raw descriptor, so the timeout is set with
+    SO_RCVTIMEO/SO_SNDTIMEO: a stalled service raises OSError instead of hanging.
+    """
+    timeout = config.CACHE_SERVER_TIMEOUT
+    family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+    if family == socket.AF_INET:
+        sock = socket.create_connection(address, timeout=timeout)
+    else:
+        sock = socket.socket(family)
+        sock.settimeout(timeout)
+        sock.connect(address)
+    with sock:
+        sock.setblocking(True)
+        timeval = struct.pack('ll', int(timeout), int(timeout % 1 * 1_000_000))
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVTIMEO, timeval)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDTIMEO, timeval)
+        conn = connection.Connection(sock.detach())
+    if authkey is not None:
+        connection.answer_challenge(conn, authkey)
+        connection.deliver_challenge(conn, authkey)
+    return conn
+
+
+# Wire-compatible with 'pickle'; only the client side differs. Managers and
+# their proxies look up their client here, so every connection is timed
+managers.listener_client['pickle-timeout'] = (connection.Listener, _timed_client)
+
+
+class CacheStore:
+    """Server side: named LRU caches, created on first `configure`."""
+
+    def __init__(self) -> None:
+        self._caches: Dict[str, LRUCache] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, name: str, max_entries: int, ttl_seconds: float) -> None:
+        with self._lock:
+            if name not in self._caches:
+                self._caches[name] = LRUCache(max_entries, ttl_seconds)
+
+    def get(self, name: str, key: Hashable) -> Any:
+        return self._caches[name].get(key)
+
+    def put(self, name: str, key: Hashable, value: Any) -> None:
+        self._caches[name].put(key, value)
+
+    def items(self, name: str) -> List[Tuple[Hashable, Any]]:
+        return self._caches[name].items()
+
+    def clear(self, name: str) -> None:
+        self._caches[name].clear()
+
+    def size(self, name: str) -> int:
+        return len(self._caches[name])
+
+    def stats(self, name: str) -> Dict[str, Any]:
+        return self._caches[name].stats()
+
+
+class CacheManager(BaseManager):
+    pass
+
+
+_store: Optional[CacheStore] = None
+
+
+def _get_store() -> CacheStore:
+    global _store
+    if _store is None:
+        _store = CacheStore()
+    return _store
+
+
+CacheManager.register('store', callable=_get_store)
+
+
+class RemoteCache:
+    """Client side, same interface as `LRUCache`.
+
+    Connects lazily (and again after a fork, since sockets must not be shared
+    between workers). If the service is unreachable or slower than
+    CACHE_SERVER_TIMEOUT, lookups miss and writes are dropped: the API keeps
+    working, just without the shared cache. Calls block on the socket, so
+    async code goes through AnswerCache's to_thread wrappers.
+    """
+
+    # Blocking I/O: callers on an event loop must run it in a thread
+    blocking = True
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float, address: str, authkey: str) -> None:
+        if not authkey:
+            raise ValueError("CACHE_SERVER_AUTHKEY doit être défini pour utiliser le service de cache")
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.address = parse_address(address)
+        self.authkey = authkey.encode('utf-8')
+        self.errors = 0
+        self._store: Any = None
+        self._pid = 0
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def _proxy(self) -> Any:
+        with self._lock:
+            if self._store is None or self._pid != os.getpid():
+                manager = CacheManager(address=self.address, authkey=self.authkey, serializer='pickle-timeout')
+                manager.connect()
+                store = manager.store()
+                store.configure(self.name, self.max_entries, self.ttl_seconds)
+                self._store, self._pid = store, os.getpid()
+            return self._store
+
+    def _call(self, method: str, *args: Any, default: Any = None) -> Any:
+        if time.monotonic() < self._retry_at:
+            return default
+        try:
+            return getattr(self._proxy(), method)(self.name, *args)
+        except Exception as exc:  # connection refused/reset, auth error, server restart
+            self.errors += 1
+            self._store = None
+            self._retry_at = time.monotonic() + _RETRY_AFTER_ERROR
+            logger.warning("Cache service %s unavailable (%r); caching off for %ss",
+                           _format_address(self.address), exc, _RETRY_AFTER_ERROR)
+            return default
+
+    def get(self, key: Hashable) -> Any:
+        return self._call('get', key)
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.max_entries > 0:
+            self._call('put', key, value)
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        return self._call('items', default=[])
+
+    def clear(self) -> None:
+        self._call('clear')
+
+    def __len__(self) -> int:
+        return self._call('size', default=0)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self._call('stats', default={}) or {})
+        stats.update(backend='server', errors=self.errors)
+        return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--address', default=config.CACHE_SERVER_ADDRESS,
+                        help='host:port (loopback) or Unix socket path')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if not config.CACHE_SERVER_AUTHKEY:
+        parser.error("CACHE_SERVER_AUTHKEY must be set to a secret shared with the workers")
+
+    address = parse_address(args.address)
+    if not _is_local(address):
+        logger.warning("Cache service bound to %s: anyone who can reach it and knows the key "
+                       "can run code here; prefer loopback or a Unix socket", args.address)
+    manager = CacheManager(address=address, authkey=config.CACHE_SERVER_AUTHKEY.encode('utf-8'))
+    logger.info("Cache service listening on %s", args.address)
+    manager.get_server().serve_forever()
+
+
+if __name__ == '__main__':
+    main()
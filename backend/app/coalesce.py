@@ -0,0 +1,48 @@
+"""Single-flight execution: concurrent calls with the same key share one run.
+
+The first caller (leader) starts the work as its own task; callers arriving
+while it is in flight await the same result instead of starting another
+run. Followers therefore never wait longer than a fresh run would take. The
+work is shielded, so a caller that goes away (client disconnect) does not
+cancel it for the others.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from .metrics import COALESCED
+
+
+class SingleFlight:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._flights: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def run(self, key: Hashable, work: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._flights.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(work())
+            self._flights[key] = task
+            # Drop the entry as soon as the run ends, so later calls start fresh
+            task.add_done_callback(lambda t, key=key: self._forget(key, t))
+        else:
+            self.followers += 1
+            COALESCED.inc(flight=self.name)
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every caller went away
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": len(self._flights), "leaders": self.leaders, "coalesced": self.followers}
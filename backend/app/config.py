@@ -10,15 +10,163 @@ if ENV_PATH.exists():
 
 # Reuse existing frontend data generated by process_all_data.py
 FRONTEND_DATA_DIR = BASE_DIR.parent / 'frontend' / 'public' / 'data'
-FAQS_PATH = FRONTEND_DATA_DIR / 'faqs.json'
+# faqs.json, or one of its compact copies: faqs.min.json / faqs.min.json.gz
+FAQS_PATH = FRONTEND_DATA_DIR / os.getenv('FAQS_FILE', 'faqs.json')
 EMBEDDINGS_PATH = FRONTEND_DATA_DIR / 'embeddings.json'
+# Binary matrix + header (see artifacts.py): 'float32' is memory-mapped,
+# 'float16' / 'int8' are the smaller quantized copies, widened on load
+EMBEDDINGS_DTYPE = os.getenv('EMBEDDINGS_DTYPE', 'float32')
+_MATRIX_NAMES = {
+    'float32': ('embeddings.f32.npy', 'embeddings.meta.json'),
+    'float16': ('embeddings.f16.npy', 'embeddings.f16.meta.json'),
+    'int8': ('embeddings.i8.npy', 'embeddings.i8.meta.json'),
+}
+if EMBEDDINGS_DTYPE not in _MATRIX_NAMES:
+    raise ValueError(
+        f"EMBEDDINGS_DTYPE={EMBEDDINGS_DTYPE!r} non supporté (valeurs possibles : {', '.join(_MATRIX_NAMES)})"
+    )
+EMBEDDINGS_MATRIX_PATH = FRONTEND_DATA_DIR / _MATRIX_NAMES[EMBEDDINGS_DTYPE][0]
+EMBEDDINGS_META_PATH = FRONTEND_DATA_DIR / _MATRIX_NAMES[EMBEDDINGS_DTYPE][1]
+# Matrices the API embeds itself when the pipeline artifact is stale. They live
+# in a backend-owned directory: FRONTEND_DATA_DIR is the pipeline's output and
+# its manifests must keep describing what the pipeline wrote
+CORPUS_CACHE_DIR = Path(os.getenv('CORPUS_CACHE_DIR', str(BASE_DIR / '.corpus_cache')))
+RELOADED_MATRIX_PATH = CORPUS_CACHE_DIR / 'embeddings.f32.npy'
+RELOADED_META_PATH = CORPUS_CACHE_DIR / 'embeddings.meta.json'
+# Persisted approximate index (only used when VECTOR_INDEX=ivf)
+VECTOR_INDEX_PATH = FRONTEND_DATA_DIR / 'embeddings.ivf.npz'
+# Past corpus versions (faq id -> content hash) for /api/corpus/delta, see sync.py
+CORPUS_HISTORY_PATH = FRONTEND_DATA_DIR / 'corpus_history.json'
+CORPUS_HISTORY_SIZE = int(os.getenv('CORPUS_HISTORY_SIZE', '20'))
 
 # RAG settings
 MAX_CONTEXT_FAQS = 3
 MIN_SIMILARITY_WEAK = 0.2
-MIN_SIMILARITY_STRONG = 0.5
+MIN_SIMILARITY_STRONG = float(os.getenv('MIN_SIMILARITY_STRONG', '0.5'))
+# Answer policy: 'auto' returns the stored FAQ answer without calling the LLM
+# when the top match is above MIN_SIMILARITY_STRONG and ahead of the runner-up
+# by FAST_PATH_MARGIN; 'llm' always generates
+ANSWER_POLICY = os.getenv('ANSWER_POLICY', 'auto')
+FAST_PATH_MARGIN = float(os.getenv('FAST_PATH_MARGIN', '0.05'))
+# Optional wrappers around fast-path answers ({answer} and {question} are substituted)
+FAST_PATH_TEMPLATES = {
+    'fr': os.getenv('FAST_PATH_TEMPLATE_FR', '{answer}'),
+    'ar': os.getenv('FAST_PATH_TEMPLATE_AR', '{answer}'),
+}
+for _language, _template in FAST_PATH_TEMPLATES.items():
+    try:
+        _template.format(answer='', question='')
+    except (KeyError, IndexError, ValueError) as exc:
+        raise ValueError(
+            f"FAST_PATH_TEMPLATE_{_language.upper()}={_template!r} invalide ({exc!r}) : "
+            "seuls {answer} et {question} sont acceptés, les accolades littérales s'écrivent {{ }}"
+        ) from None
+# Vector index backend: 'flat' (exact) or 'ivf' (approximate, for large corpora)
+VECTOR_INDEX = os.getenv('VECTOR_INDEX', 'flat')
+# IVF lists (0 = sqrt(corpus size)) and lists scanned per query (recall/speed knob)
+IVF_NLIST = int(os.getenv('IVF_NLIST', '0'))
+IVF_NPROBE = int(os.getenv('IVF_NPROBE', '8'))
+
+# Ranking: 'vector' (cosine only), 'keyword' (BM25 over questions/answers/keywords)
+# or 'hybrid' (reciprocal-rank fusion of both). Every mode drops hits whose
+# cosine similarity is below MIN_SIMILARITY_WEAK
+RETRIEVAL_MODE = os.getenv('RETRIEVAL_MODE', 'vector')
+# Candidates taken from each ranking before fusion, and the RRF damping constant
+HYBRID_CANDIDATES = int(os.getenv('HYBRID_CANDIDATES', '20'))
+RRF_K = int(os.getenv('RRF_K', '60'))
+# BM25 score multiplier per point of FAQ offline_priority
+BM25_PRIORITY_BOOST = float(os.getenv('BM25_PRIORITY_BOOST', '0.02'))
+
+# Corpus hot-reload: faqs.json mtime poll interval in seconds (0 disables the watcher)
+CORPUS_WATCH_INTERVAL = float(os.getenv('CORPUS_WATCH_INTERVAL', '30'))
+# Shared secret for /api/admin/* (X-Admin-Token header); admin endpoints are off when empty
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN', '')
+
+# Upper bounds for /api/retrieve/batch
+MAX_BATCH_QUERIES = int(os.getenv('MAX_BATCH_QUERIES', '1000'))
+MAX_BATCH_TOP_K = 50
+
+# Prompt budget (estimated tokens, see prompt.py): FAQ context packed by
+# decreasing similarity, and the user question (longer ones are cut)
+PROMPT_CONTEXT_TOKENS = int(os.getenv('PROMPT_CONTEXT_TOKENS', '600'))
+PROMPT_QUERY_TOKENS = int(os.getenv('PROMPT_QUERY_TOKENS', '200'))
 
 # LLM settings (OpenRouter)
 OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY', '')
 OPENROUTER_API_BASE = os.getenv('OPENROUTER_API_BASE', 'https://openrouter.ai/api/v1')
 OPENROUTER_MODEL = os.getenv('OPENROUTER_MODEL', 'meta-llama/llama-3.3-70b-instruct:free')
+# Ordered model pool, comma-separated; an optional '=N' caps that model's
+# concurrent calls (default LLM_MAX_CONCURRENCY). Requests go to the fastest
+# healthy model and fall back down the pool on failure (see routing.py)
+OPENROUTER_MODELS = os.getenv('OPENROUTER_MODELS', OPENROUTER_MODEL)
+# Calls before a model's latency is trusted for ranking, and the share of
+# traffic sent to another healthy model to keep its statistics fresh
+LLM_ROUTER_MIN_SAMPLES = int(os.getenv('LLM_ROUTER_MIN_SAMPLES', '5'))
+LLM_ROUTER_EXPLORE = float(os.getenv('LLM_ROUTER_EXPLORE', '0.05'))
+
+# HTTP pool used by the async LLM path (shared across requests, opened at startup)
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '15'))
+LLM_CONNECT_TIMEOUT = float(os.getenv('LLM_CONNECT_TIMEOUT', '5'))
+LLM_MAX_CONNECTIONS = int(os.getenv('LLM_MAX_CONNECTIONS', '32'))
+LLM_MAX_KEEPALIVE = int(os.getenv('LLM_MAX_KEEPALIVE', '16'))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv('LLM_KEEPALIVE_EXPIRY', '30'))
+# Max OpenRouter calls in flight per worker; extra requests wait for a slot
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '16'))
+
+# Retries on 429 / 5xx / timeouts: full-jitter exponential backoff, or the
+# upstream Retry-After when it fits under LLM_RETRY_MAX_DELAY (else give up)
+LLM_RETRIES = int(os.getenv('LLM_RETRIES', '2'))
+LLM_RETRY_BASE_DELAY = float(os.getenv('LLM_RETRY_BASE_DELAY', '0.25'))
+LLM_RETRY_MAX_DELAY = float(os.getenv('LLM_RETRY_MAX_DELAY', '4'))
+# Hedging: send a duplicate request once the first one is slower than this
+# percentile of recent latencies (0 disables), after enough samples
+LLM_HEDGE_PERCENTILE = float(os.getenv('LLM_HEDGE_PERCENTILE', '0'))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv('LLM_HEDGE_MIN_SAMPLES', '20'))
+# Circuit breaker per model: open after N consecutive failures (0 disables),
+# retry after the cool-down; while all are open, /api/chat answers from the FAQs
+LLM_BREAKER_FAILURES = int(os.getenv('LLM_BREAKER_FAILURES', '5'))
+LLM_BREAKER_RESET = float(os.getenv('LLM_BREAKER_RESET', '30'))
+
+# Admission control (see admission.py). Chat requests that need the LLM run at
+# most LLM_MAX_CONCURRENCY at a time; up to LLM_QUEUE_SIZE more wait, each at
+# most LLM_QUEUE_MAX_WAIT seconds. Beyond that, OVERLOAD_POLICY decides:
+# 'degrade' answers from the retrieved FAQs, 'reject' returns 429 at once
+LLM_QUEUE_SIZE = int(os.getenv('LLM_QUEUE_SIZE', '64'))
+LLM_QUEUE_MAX_WAIT = float(os.getenv('LLM_QUEUE_MAX_WAIT', '2'))
+OVERLOAD_POLICY = os.getenv('OVERLOAD_POLICY', 'degrade')
+# Token bucket per client IP on the paths below (0 disables): sustained
+# requests per minute and burst size. Behind a reverse proxy, set
+# TRUST_FORWARDED_FOR=1 to key on X-Forwarded-For: the entry added by the
+# outermost of TRUSTED_PROXY_HOPS proxies, counted from the right (entries
+# further left come from the client and can be forged)
+RATE_LIMIT_PER_MINUTE = float(os.getenv('RATE_LIMIT_PER_MINUTE', '60'))
+RATE_LIMIT_BURST = float(os.getenv('RATE_LIMIT_BURST', '20'))
+RATE_LIMITED_PATHS = ('/api/chat', '/api/chat/stream', '/api/retrieve/batch')
+TRUST_FORWARDED_FOR = os.getenv('TRUST_FORWARDED_FOR', '0') == '1'
+TRUSTED_PROXY_HOPS = max(1, int(os.getenv('TRUSTED_PROXY_HOPS', '1')))
+# Allowed browser origins, comma-separated ('*' allows any origin, without credentials)
+CORS_ORIGINS = [o.strip() for o in os.getenv('CORS_ORIGINS', 'http://localhost:3000').split(',') if o.strip()]
+
+# Identical /api/chat questions (normalized query + language + category) in
+# flight at the same time share one retrieval and one LLM call
+CHAT_COALESCING = os.getenv('CHAT_COALESCING', '1') == '1'
+
+# Cache backend: 'memory' (per process) or 'server', the shared cache service
+# (python -m app.cache_server) so every worker sees the others' entries
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')
+# host:port on loopback, or a Unix socket path. The service speaks pickle, so
+# the auth key is mandatory and must be a secret (there is no default)
+CACHE_SERVER_ADDRESS = os.getenv('CACHE_SERVER_ADDRESS', '127.0.0.1:8765')
+CACHE_SERVER_AUTHKEY = os.getenv('CACHE_SERVER_AUTHKEY', '')
+# Seconds allowed to connect and for each call before the cache is skipped
+CACHE_SERVER_TIMEOUT = float(os.getenv('CACHE_SERVER_TIMEOUT', '0.5'))
+if CACHE_BACKEND == 'server' and not CACHE_SERVER_AUTHKEY:
+    raise ValueError("CACHE_BACKEND=server exige CACHE_SERVER_AUTHKEY (clé secrète partagée avec app.cache_server)")
+# Query embeddings kept for repeated questions, per process (0 disables)
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv('QUERY_EMBEDDING_CACHE_SIZE', '4096'))
+
+# Answer cache in front of the LLM (per worker, or shared with CACHE_BACKEND=server)
+ANSWER_CACHE_SIZE = int(os.getenv('ANSWER_CACHE_SIZE', '1024'))
+ANSWER_CACHE_TTL = float(os.getenv('ANSWER_CACHE_TTL', '3600'))
+# Cosine threshold for near-duplicate reuse; 0 disables it
+ANSWER_CACHE_SIMILARITY = float(os.getenv('ANSWER_CACHE_SIMILARITY', '0'))
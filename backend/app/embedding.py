@@ -0,0 +1,115 @@
+"""Deterministic hash embeddings shared by the backend and process_all_data.py.
+
+Only depends on NumPy so the data pipeline can import it without the API stack.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Dict, Sequence
+
+import numpy as np
+
+
+DIMENSION = 384
+# Bump whenever the vectors produced below change
+MODEL_NAME = 'hash-384d-pos-v1'
+# Distinct tokens memoized (LRU) across queries, builds and reloads; FAQ
+# vocabularies are small and repetitive
+TOKEN_HASH_CACHE_SIZE = 1 << 16
+
+
+def hash_string(text: str) -> int:
+    """Stable hash function mirroring frontend RAGService.hashString (JS)."""
+    h = 0
+    for ch in text:
+        code = ord(ch)
+        h = ((h << 5) - h) + code
+        h &= 0xFFFFFFFF  # force 32-bit
+
+    # Interpret as signed 32-bit int, like JS bitwise ops
+    if h & 0x80000000:
+        h -= 0x100000000
+    return h
+
+
+_cached_hash = lru_cache(maxsize=TOKEN_HASH_CACHE_SIZE)(hash_string)
+
+
+def token_hash_stats() -> Dict[str, Any]:
+    """Hits, misses and size of the token hash memo (same keys as LRUCache.stats)."""
+    info = _cached_hash.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "size": info.currsize,
+        "max_entries": info.maxsize,
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_ratio": (info.hits / lookups) if lookups else 0.0,
+    }
+
+
+def create_embedding(text: str, dimension: int = DIMENSION) -> np.ndarray:
+    """Create lightweight 384D embedding (same spirit as frontend createQueryEmbedding)."""
+    vec = np.zeros(dimension, dtype=float)
+
+    tokens = text.lower().split()
+    for idx, token in enumerate(tokens):
+        h = _cached_hash(token)
+        pos = abs(h) % dimension
+
+        # term frequency
+        vec[pos] += 1.0
+
+        # simple positional encoding like frontend (1/(idx+1) on next dim)
+        pos_weight = 1.0 / (idx + 1)
+        vec[(pos + 1) % dimension] += pos_weight
+
+    norm = np.linalg.norm(vec)
+    if norm == 0.0:
+        return vec
+    return vec / norm
+
+
+def embed_batch(texts: Sequence[str], dimension: int = DIMENSION) -> np.ndarray:
+    """Vectorized `create_embedding` over many texts, one normalized row per text.
+
+    Tokens are hashed once through a memo, then term-frequency and positional
+    weights for every token of every text are scattered into the matrix with a
+    single `np.bincount`. Updates are interleaved in the same order as the
+    scalar loop, so rows match `create_embedding` up to float rounding.
+    """
+    n = len(texts)
+    token_lists = [text.lower().split() for text in texts]
+    lengths = np.fromiter((len(tokens) for tokens in token_lists), dtype=np.int64, count=n)
+    total = int(lengths.sum())
+    if total == 0:
+        return np.zeros((n, dimension), dtype=float)
+
+    hashes = np.fromiter(
+        (_cached_hash(token) for tokens in token_lists for token in tokens),
+        dtype=np.int64,
+        count=total,
+    )
+    pos = np.abs(hashes) % dimension
+
+    # Position of each token inside its own text, and the row offset of that text
+    starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    token_idx = np.arange(total, dtype=np.int64) - starts
+    row_base = np.repeat(np.arange(n, dtype=np.int64) * dimension, lengths)
+
+    flat = np.empty(2 * total, dtype=np.int64)
+    flat[0::2] = row_base + pos
+    flat[1::2] = row_base + (pos + 1) % dimension
+    weights = np.empty(2 * total, dtype=float)
+    weights[0::2] = 1.0
+    weights[1::2] = 1.0 / (token_idx + 1)
+
+    matrix = np.bincount(flat, weights=weights, minlength=n * dimension).reshape(n, dimension)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def faq_text(faq: Dict[str, Any]) -> str:
+    """Text embedded for a FAQ row (question_fr + answer_fr)."""
+    return f"{faq['question_fr']} {faq['answer_fr']}"
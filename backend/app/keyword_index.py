@@ -0,0 +1,144 @@
+"""BM25 inverted index over FAQ questions, answers and curated keywords (FR + AR).
+
+Postings are stored per term in CSR layout with the BM25 term-frequency part
+precomputed, so a query only touches the postings of its own terms instead
+of scanning every document.
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _fold(text: str) -> str:
+    """Lowercase and drop combining marks (French accents, Arabic harakat/hamza)."""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+STOPWORDS = frozenset(_fold(word) for word in (
+    # French
+    "a au aux avec ce ces cest d dans de des du elle en est et il ils j je l la le les leur "
+    "lui m ma mais me mes moi mon n ne nos notre nous on ou par pas pour qu que qui s sa se "
+    "ses son sur t ta te tes toi ton tu un une vos votre vous y ça "
+    # Arabic
+    "في من على إلى عن مع هل ما ماذا هو هي هذا هذه ذلك التي الذي و أو ثم قد كل"
+).split())
+
+# Relative weight of each field in the document term frequencies
+FIELD_WEIGHTS = (
+    ('question_fr', 2.0),
+    ('answer_fr', 1.0),
+    ('question_ar', 2.0),
+    ('answer_ar', 1.0),
+    ('keywords', 3.0),
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Fold case and diacritics, split on word characters, drop stopwords."""
+    return [tok for tok in _TOKEN_RE.findall(_fold(text)) if tok not in STOPWORDS]
+
+
+def analyze_faq(faq: Dict[str, Any]) -> Dict[str, float]:
+    """Weighted term frequencies for one FAQ."""
+    tf: Counter = Counter()
+    for field, weight in FIELD_WEIGHTS:
+        value = faq.get(field) or ''
+        if isinstance(value, list):
+            value = ' '.join(value)
+        for tok in tokenize(value):
+            tf[tok] += weight
+    return dict(tf)
+
+
+class BM25Index:
+    def __init__(
+        self,
+        doc_terms: Iterable[Dict[str, float]],
+        priorities: Optional[Iterable[float]] = None,
+        k1: float = 1.2,
+        b: float = 0.75,
+        priority_boost: float = 0.0,
+    ) -> None:
+        doc_terms = list(doc_terms)
+        n = len(doc_terms)
+        self.size = n
+
+        lengths = np.array([sum(tf.values()) for tf in doc_terms], dtype=np.float64)
+        avgdl = float(lengths.mean()) if n and lengths.mean() > 0 else 1.0
+        norm = k1 * (1.0 - b + b * lengths / avgdl)
+
+        # (term, doc, tf) triples grouped by term -> CSR postings
+        vocab: Dict[str, int] = {}
+        term_ids: List[int] = []
+        docs: List[int] = []
+        tfs: List[float] = []
+        for doc, tf in enumerate(doc_terms):
+            for term, freq in tf.items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                docs.append(doc)
+                tfs.append(freq)
+
+        term_arr = np.array(term_ids, dtype=np.int64)
+        order = np.argsort(term_arr, kind='stable')
+        self.postings_docs = np.array(docs, dtype=np.int64)[order]
+        tf_arr = np.array(tfs, dtype=np.float64)[order]
+        counts = np.bincount(term_arr, minlength=len(vocab))
+        self.offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        self.vocab = vocab
+
+        # BM25: idf(t) * tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl))
+        self.idf = np.log1p((n - counts + 0.5) / (counts + 0.5))
+        self.postings_weights = tf_arr * (k1 + 1.0) / (tf_arr + norm[self.postings_docs])
+
+        prior = np.asarray(list(priorities) if priorities is not None else [0.0] * n, dtype=np.float64)
+        self.doc_boost = 1.0 + priority_boost * prior
+
+    @classmethod
+    def from_faqs(cls, faqs: List[Dict[str, Any]], priority_boost: float = 0.0) -> "BM25Index":
+        return cls(
+            (analyze_faq(faq) for faq in faqs),
+            priorities=(float(faq.get('offline_priority') or 0) for faq in faqs),
+            priority_boost=priority_boost,
+        )
+
+    def search(self, query: str, k: int, rows: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Top-k (row, score) for `query`, touching only the postings of its terms."""
+        term_ids = [self.vocab[t] for t in set(tokenize(query)) if t in self.vocab]
+        if not term_ids or k <= 0:
+            return []
+
+        docs = np.concatenate([self.postings_docs[self.offsets[t]:self.offsets[t + 1]] for t in term_ids])
+        weights = np.concatenate([
+            self.postings_weights[self.offsets[t]:self.offsets[t + 1]] * self.idf[t] for t in term_ids
+        ])
+        candidates, inverse = np.unique(docs, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights) * self.doc_boost[candidates]
+
+        if rows is not None:
+            keep = np.isin(candidates, rows, assume_unique=True)
+            candidates, scores = candidates[keep], scores[keep]
+        if candidates.size == 0:
+            return []
+
+        kk = min(k, candidates.size)
+        top = np.argpartition(-scores, kk - 1)[:kk]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return list(zip(candidates[top].tolist(), scores[top].tolist()))
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[int]], k: int = 60) -> List[Tuple[int, float]]:
+    """Fuse ranked row lists: score(row) = sum over lists of 1 / (k + rank)."""
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking, start=1):
+            fused[row] = fused.get(row, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: -item[1])
@@ -1,56 +1,84 @@
 from __future__ import annotations
 
-from typing import List
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
+import httpx
 import requests
 
 from . import config
+from .metrics import (
+    LLM_HEDGES,
+    LLM_IN_FLIGHT,
+    LLM_REQUESTS,
+    LLM_RETRIES,
+    LLM_TOKENS,
+    PROMPT_SOURCES,
+    PROMPT_TOKENS,
+    annotate,
+    stage,
+)
 from .models import SourceFAQ
+from .prompt import Prompt, build_prompt
+from .resilience import CircuitOpenError, RetryPolicy
+from .routing import ModelRoute, ModelRouter, parse_models
 
 
 class OpenRouterClient:
     def __init__(self) -> None:
         self.api_key = config.OPENROUTER_API_KEY
         self.base_url = config.OPENROUTER_API_BASE.rstrip('/')
-        self.model = config.OPENROUTER_MODEL
-
-    def _build_prompt(self, query: str, language: str, faqs: List[SourceFAQ]) -> str:
-        # Build a compact context from top-K FAQs
-        lines = []
-        for idx, faq in enumerate(faqs, start=1):
-            q = faq.question_fr
-            a = faq.answer_fr
-            if language == 'ar':
-                q = faq.question_ar or q
-                a = faq.answer_ar or a
-            lines.append(f"[FAQ {idx}] Q: {q}\nR: {a}")
-
-        context_block = '\n\n'.join(lines) if lines else 'Aucun contexte FAQ fiable.'
-        lang_label = 'français' if language == 'fr' else 'arabe'
-
-        prompt = (
-            "Tu es un assistant IA low-cost pour la Nuit de l'Info 2025 et les services publics numériques. "
-            "Tu dois répondre de manière courte, claire et pédagogique, dans la langue indiquée. "
-            "Utilise uniquement les informations ci-dessous comme source principale. Si l'information ne s'y trouve pas, "
-            "répond honnêtement que tu n'es pas sûr(e) et propose une réponse prudente. "
-            "Répond toujours avec tes propres mots, en reformulant le contexte sans copier mot pour mot les phrases données. "
-            "Tu peux ajouter une courte phrase d'explication pour aider l'utilisateur, mais reste concis.\n\n"
-            f"Langue de réponse: {lang_label}.\n\n"
-            f"Contexte FAQ:\n{context_block}\n\n"
-            f"Question utilisateur: {query}\n\n"
-            "Réponse:" if language == 'fr' else "الإجابة:"
+        self.router = ModelRouter(
+            parse_models(config.OPENROUTER_MODELS, config.LLM_MAX_CONCURRENCY),
+            failure_threshold=config.LLM_BREAKER_FAILURES,
+            reset_timeout=config.LLM_BREAKER_RESET,
+            min_samples=config.LLM_ROUTER_MIN_SAMPLES,
+            explore=config.LLM_ROUTER_EXPLORE,
         )
-        return prompt
+        # The blocking `generate` always uses the first (preferred) model
+        self.model = self.router.routes[0].name
+        self._http: httpx.AsyncClient | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self.retry = RetryPolicy(config.LLM_RETRIES, config.LLM_RETRY_BASE_DELAY, config.LLM_RETRY_MAX_DELAY)
 
-    def generate(self, query: str, language: str, faqs: List[SourceFAQ]) -> str:
-        if not self.api_key:
-            # Safety: avoid calling API without key
-            raise RuntimeError("OPENROUTER_API_KEY non défini dans l'environnement.")
+    async def startup(self) -> None:
+        """Open the shared keep-alive pool used by `agenerate`."""
+        if self._http is not None:
+            return
+        self._http = httpx.AsyncClient(
+            timeout=httpx.Timeout(config.LLM_TIMEOUT, connect=config.LLM_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=config.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=config.LLM_MAX_KEEPALIVE,
+                keepalive_expiry=config.LLM_KEEPALIVE_EXPIRY,
+            ),
+        )
+        self._slots = asyncio.Semaphore(config.LLM_MAX_CONCURRENCY)
 
-        prompt = self._build_prompt(query, language, faqs)
+    async def shutdown(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+        self._http = None
+        self._slots = None
 
-        url = f"{self.base_url}/chat/completions"
-        headers = {
+    def _build_prompt(self, query: str, language: str, faqs: List[SourceFAQ]) -> Prompt:
+        """System preamble + user message with the FAQ context packed into the token budget."""
+        prompt = build_prompt(
+            query, language, faqs,
+            context_tokens=config.PROMPT_CONTEXT_TOKENS,
+            query_tokens=config.PROMPT_QUERY_TOKENS,
+        )
+        PROMPT_TOKENS.observe(prompt.tokens)
+        PROMPT_SOURCES.inc(prompt.sources_full, result="full")
+        PROMPT_SOURCES.inc(prompt.sources_trimmed, result="trimmed")
+        PROMPT_SOURCES.inc(prompt.sources_dropped, result="dropped")
+        annotate("prompt_tokens", prompt.tokens)
+        return prompt
+
+    def _headers(self) -> Dict[str, str]:
+        return {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
             # Optional but recommended by OpenRouter:
@@ -58,20 +86,17 @@ class OpenRouterClient:
             "X-Title": "NuitInfoAssistant",
         }
 
-        body = {
-            "model": self.model,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": prompt,
-                }
-            ],
+    def _request_body(self, prompt: Prompt, stream: bool = False, model: Optional[str] = None) -> Dict[str, Any]:
+        body: Dict[str, Any] = {
+            "model": model or self.model,
+            "messages": prompt.messages,
         }
+        if stream:
+            body["stream"] = True
+        return body
 
-        resp = requests.post(url, json=body, headers=headers, timeout=15)
-        resp.raise_for_status()
-        data = resp.json()
-
+    @staticmethod
+    def _extract_content(data: Dict[str, Any]) -> str:
         # OpenRouter follows OpenAI-like schema
         content = (
             data.get("choices", [{}])[0]
@@ -81,5 +106,258 @@ class OpenRouterClient:
 
         return content.strip() or "Désolé, je n'ai pas pu générer de réponse pour le moment."
 
+    @staticmethod
+    def _record_usage(data: Dict[str, Any]) -> None:
+        usage = data.get("usage") or {}
+        for kind in ("prompt", "completion"):
+            tokens = usage.get(f"{kind}_tokens")
+            if tokens:
+                LLM_TOKENS.inc(tokens, kind=kind)
+
+    def _check_api_key(self) -> None:
+        if not self.api_key:
+            # Safety: avoid calling API without key
+            raise RuntimeError("OPENROUTER_API_KEY non défini dans l'environnement.")
+
+    def generate(self, query: str, language: str, faqs: List[SourceFAQ]) -> str:
+        """Blocking variant, kept for scripts; the API uses `agenerate`."""
+        self._check_api_key()
+
+        prompt = self._build_prompt(query, language, faqs)
+
+        resp = requests.post(
+            f"{self.base_url}/chat/completions",
+            json=self._request_body(prompt),
+            headers=self._headers(),
+            timeout=config.LLM_TIMEOUT,
+        )
+        resp.raise_for_status()
+        return self._extract_content(resp.json())
+
+    def _route(self, exclude: List[str], reason: str) -> ModelRoute:
+        """Best healthy model not in `exclude`, admitted by its breaker."""
+        exclude = list(exclude)
+        while True:
+            route = self.router.pick(exclude, reason)
+            try:
+                route.breaker.before_call()
+                return route
+            except CircuitOpenError:
+                # Lost a race for the half-open probe: try the next model
+                route.release()
+                exclude.append(route.name)
+
+    async def _next_route(self, tried: List[str], attempt: int, last_exc: Optional[Exception]) -> Tuple[ModelRoute, int]:
+        """Fall back to an untried model at once; once all were tried, back off and go around again.
+
+        Returns the route and the (possibly incremented) retry attempt. Raises
+        `last_exc` when the retry policy gives up, CircuitOpenError when no
+        model is healthy.
+        """
+        while True:
+            reason = "fallback" if tried else ("retry" if attempt else "primary")
+            try:
+                return self._route(tried, reason), attempt
+            except CircuitOpenError:
+                if not tried or last_exc is None:
+                    raise
+            await self._backoff(attempt, last_exc)
+            attempt += 1
+            tried.clear()
+
+    async def _backoff(self, attempt: int, exc: Exception) -> None:
+        """Sleep before the next round of attempts, or re-raise `exc` to give up."""
+        delay = self.retry.delay(attempt, exc)
+        if delay is None or self.router.is_open():
+            raise exc
+        LLM_RETRIES.inc()
+        await asyncio.sleep(delay)
+
+    async def _post(self, route: ModelRoute, body: Dict[str, Any]) -> Dict[str, Any]:
+        """One OpenRouter call on `route` (then released); raises on transport errors and non-2xx statuses."""
+        assert self._http is not None and self._slots is not None
+        try:
+            async with self._slots, route.slots:
+                if route.tripped():
+                    raise CircuitOpenError(f"Circuit ouvert pour {route.name}.")
+                with LLM_IN_FLIGHT.track_inprogress():
+                    start = time.perf_counter()
+                    try:
+                        resp = await self._http.post(
+                            f"{self.base_url}/chat/completions",
+                            json=dict(body, model=route.name),
+                            headers=self._headers(),
+                        )
+                        resp.raise_for_status()
+                        data = resp.json()
+                    except Exception:
+                        route.record(False)
+                        raise
+        finally:
+            route.release()
+        route.record(True, time.perf_counter() - start)
+        return data
+
+    async def _hedged_post(self, route: ModelRoute, body: Dict[str, Any]) -> Dict[str, Any]:
+        """`_post`, plus a duplicate request if the first one is unusually slow.
+
+        The hedge goes to the next best model when one is free (else the same
+        one); the first successful response wins and the other is cancelled.
+        No hedge is sent when every concurrency slot is taken.
+        """
+        hedge_after = None
+        if config.LLM_HEDGE_PERCENTILE > 0 and len(route.latency) >= config.LLM_HEDGE_MIN_SAMPLES:
+            hedge_after = route.latency.percentile(config.LLM_HEDGE_PERCENTILE)
+        if hedge_after is None:
+            return await self._post(route, body)
+
+        assert self._slots is not None
+        primary = asyncio.ensure_future(self._post(route, body))
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if done or self._slots.locked():
+            return await primary
+
+        try:
+            hedge_route = self._route([route.name], "hedge")
+        except CircuitOpenError:
+            hedge_route = route
+        LLM_HEDGES.inc(result="sent")
+        hedge = asyncio.ensure_future(self._post(hedge_route, body))
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            LLM_HEDGES.inc(result="won")
+                        return task.result()
+            # Both failed: surface the original request's error
+            return primary.result()
+        finally:
+            for task in (primary, hedge):
+                task.cancel()
+
+    async def agenerate(self, query: str, language: str, faqs: List[SourceFAQ]) -> str:
+        """Non-blocking generation over the shared connection pool.
+
+        Goes to the best model of the pool (routing.py), falls back down the
+        pool on failure and retries 429 / 5xx / timeouts with backoff
+        (resilience.py). Raises CircuitOpenError without calling OpenRouter
+        while every model's breaker is open.
+        """
+        self._check_api_key()
+        if self._http is None:
+            # Used outside the app lifecycle (scripts, benchmarks)
+            await self.startup()
+
+        with stage('prompt'):
+            prompt = self._build_prompt(query, language, faqs)
+        body = self._request_body(prompt)
+
+        with stage('llm'):
+            tried: List[str] = []
+            attempt = 0
+            last_exc: Optional[Exception] = None
+            try:
+                while True:
+                    route, attempt = await self._next_route(tried, attempt, last_exc)
+                    try:
+                        data = await self._hedged_post(route, body)
+                        break
+                    except Exception as exc:
+                        last_exc = exc
+                        tried.append(route.name)
+            except CircuitOpenError:
+                LLM_REQUESTS.inc(outcome="rejected")
+                raise
+            except Exception:
+                LLM_REQUESTS.inc(outcome="error")
+                raise
+        LLM_REQUESTS.inc(outcome="ok")
+        self._record_usage(data)
+        return self._extract_content(data)
+
+    async def astream(self, query: str, language: str, faqs: List[SourceFAQ]) -> AsyncIterator[str]:
+        """Yield completion text deltas as OpenRouter streams them (`stream: true`).
+
+        Routed, retried and failed over like `agenerate`, but only until the
+        first delta has been yielded; after that failures propagate.
+        """
+        self._check_api_key()
+        if self._http is None:
+            await self.startup()
+        assert self._http is not None and self._slots is not None
+
+        with stage('prompt'):
+            prompt = self._build_prompt(query, language, faqs)
+        body = self._request_body(prompt, stream=True)
+
+        tried: List[str] = []
+        attempt = 0
+        last_exc: Optional[Exception] = None
+        yielded = False
+        try:
+            while True:
+                route, attempt = await self._next_route(tried, attempt, last_exc)
+                start = time.perf_counter()
+                try:
+                    async with self._slots, route.slots:
+                        if route.tripped():
+                            raise CircuitOpenError(f"Circuit ouvert pour {route.name}.")
+                        with stage('llm'), LLM_IN_FLIGHT.track_inprogress():
+                            async with self._http.stream(
+                                "POST",
+                                f"{self.base_url}/chat/completions",
+                                json=dict(body, model=route.name),
+                                headers=self._headers(),
+                            ) as resp:
+                                resp.raise_for_status()
+                                async for line in resp.aiter_lines():
+                                    # SSE framing; OpenRouter also sends ": OPENROUTER PROCESSING" keep-alive comments
+                                    if not line.startswith("data:"):
+                                        continue
+                                    payload = line[len("data:"):].strip()
+                                    if payload == "[DONE]":
+                                        break
+                                    try:
+                                        chunk = json.loads(payload)
+                                    except ValueError:
+                                        continue
+                                    # The last chunk may carry token usage
+                                    self._record_usage(chunk)
+                                    delta = (
+                                        (chunk.get("choices") or [{}])[0]
+                                        .get("delta", {})
+                                        .get("content")
+                                    )
+                                    if delta:
+                                        yielded = True
+                                        yield delta
+                except Exception as exc:
+                    route.release()
+                    if not isinstance(exc, CircuitOpenError):
+                        route.record(False)
+                    if yielded:
+                        # Part of the answer is already out: another attempt would repeat it
+                        raise
+                    last_exc = exc
+                    tried.append(route.name)
+                    continue
+                except BaseException:
+                    # Client went away (GeneratorExit) or the task was cancelled
+                    route.release()
+                    raise
+                route.release()
+                route.record(True, time.perf_counter() - start)
+                break
+        except CircuitOpenError:
+            LLM_REQUESTS.inc(outcome="rejected")
+            raise
+        except Exception:
+            LLM_REQUESTS.inc(outcome="error")
+            raise
+        LLM_REQUESTS.inc(outcome="ok")
+
 
 llm_client = OpenRouterClient()
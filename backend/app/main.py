@@ -1,36 +1,178 @@
 from __future__ import annotations
 
-from typing import List
+import asyncio
+import gc
+import json
+import logging
+import math
+import os
+import time
+from typing import Any, AsyncIterator, List, Optional, Tuple
 
-from fastapi import FastAPI, HTTPException
+import numpy as np
+
+from fastapi import FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 
-from . import config
-from .models import ChatRequest, ChatResponse, HealthResponse, SourceFAQ
-from .rag import load_corpus, retrieve_top_faqs
+from . import config, metrics
+from .admission import AdmissionQueue, Overloaded, RateLimiter
+from .cache import AnswerKey, answer_cache, normalize_query
+from .coalesce import SingleFlight
+from .models import (
+    BatchRetrieveRequest,
+    BatchRetrieveResponse,
+    ChatRequest,
+    ChatResponse,
+    CorpusDeltaResponse,
+    HealthResponse,
+    RetrievalHit,
+    SourceFAQ,
+)
+from .rag import (
+    corpus_delta,
+    corpus_file_changed,
+    embedding_cache_stats,
+    embed_query,
+    load_corpus,
+    reload_corpus,
+    retrieve_top_faqs,
+    retrieve_top_faqs_batch,
+)
 from .llm_client import llm_client
+from .resilience import CircuitOpenError
 
 
+logger = logging.getLogger(__name__)
+
+chat_flights = SingleFlight("chat")
+llm_queue = AdmissionQueue(config.LLM_MAX_CONCURRENCY, config.LLM_QUEUE_SIZE, config.LLM_QUEUE_MAX_WAIT)
+rate_limiter = (
+    RateLimiter(config.RATE_LIMIT_PER_MINUTE / 60.0, config.RATE_LIMIT_BURST)
+    if config.RATE_LIMIT_PER_MINUTE > 0 else None
+)
+
 app = FastAPI(title="Nuit de l'Info Assistant API", version="1.0.0")
 
-# CORS: allow frontend dev origin
-origins = [
-    "http://localhost:3000",
-]
 
+def _client_key(request: Request) -> str:
+    """Client IP: the peer address, or the X-Forwarded-For entry appended by the
+    outermost of TRUSTED_PROXY_HOPS proxies (entries left of it are client-supplied)."""
+    if config.TRUST_FORWARDED_FOR:
+        hops = [h.strip() for h in ",".join(request.headers.getlist("x-forwarded-for")).split(",") if h.strip()]
+        if len(hops) >= config.TRUSTED_PROXY_HOPS:
+            return hops[-config.TRUSTED_PROXY_HOPS]
+    return request.client.host if request.client else "unknown"
+
+
+@app.middleware("http")
+async def rate_limit(request: Request, call_next):
+    """Per-client token bucket on the expensive routes; answers 429 before any work is done."""
+    if rate_limiter is None or request.method == "OPTIONS" or request.url.path not in config.RATE_LIMITED_PATHS:
+        return await call_next(request)
+    wait = rate_limiter.acquire(_client_key(request))
+    if wait > 0:
+        metrics.SHED.inc(reason="rate_limit")
+        return JSONResponse(
+            {"detail": "Trop de requêtes, réessayez dans quelques secondes."},
+            status_code=429,
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+    return await call_next(request)
+
+
+# Registered after rate_limit so it wraps it and also counts the 429s
+@app.middleware("http")
+async def instrument(request: Request, call_next):
+    """Count and time every request; `X-Trace: 1` adds a Server-Timing breakdown."""
+    trace = metrics.start_trace() if request.headers.get("x-trace") == "1" else None
+    start = time.perf_counter()
+    with metrics.REQUESTS_IN_FLIGHT.track_inprogress():
+        try:
+            response = await call_next(request)
+        except Exception:
+            metrics.ERRORS.inc(where="request")
+            raise
+
+    # Route template, not the raw path, to keep label cardinality bounded.
+    # Rate-limited requests never reach routing; their paths are routes already
+    route = getattr(request.scope.get("route"), "path", None)
+    if route is None:
+        route = request.url.path if request.url.path in config.RATE_LIMITED_PATHS else "unmatched"
+    metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, route=route)
+    metrics.REQUESTS.inc(route=route, status=str(response.status_code))
+    if response.status_code >= 500:
+        metrics.ERRORS.inc(where="request")
+    if trace is not None:
+        response.headers["Server-Timing"] = trace.server_timing()
+        logger.info("trace %s %s: %s", request.method, route, response.headers["Server-Timing"])
+    return response
+
+
+# Added last so it is the outermost layer: 429s and errors keep their CORS headers
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=origins + ["*"],  # permissive in dev
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=config.CORS_ORIGINS,
+    # Credentials cannot be combined with a wildcard origin
+    allow_credentials="*" not in config.CORS_ORIGINS,
+    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_headers=["Content-Type", "X-Admin-Token", "X-Trace", "If-None-Match"],
+    expose_headers=["ETag", "Retry-After", "Server-Timing"],
 )
 
 
+def preload(reload: bool = False) -> None:
+    """Load the corpus in the gunicorn master, before workers are forked (gunicorn.conf.py).
+
+    Workers then share the FAQ matrix and indexes copy-on-write. gc.freeze()
+    moves everything allocated so far out of the collector's reach, so GC
+    passes in the workers do not write to (and thereby copy) those pages.
+    With `reload` (SIGHUP), faqs.json is re-read first so the new workers
+    share the updated corpus.
+    """
+    if reload:
+        _reload()
+    else:
+        load_corpus()
+    gc.freeze()
+
+
 @app.on_event("startup")
 async def on_startup() -> None:
     # Preload corpus for faster first request
     load_corpus()
+    # Open the shared HTTP pool for OpenRouter calls
+    await llm_client.startup()
+    if config.CORPUS_WATCH_INTERVAL > 0:
+        app.state.corpus_watcher = asyncio.create_task(_watch_corpus(config.CORPUS_WATCH_INTERVAL))
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    watcher = getattr(app.state, "corpus_watcher", None)
+    if watcher is not None:
+        watcher.cancel()
+    await llm_client.shutdown()
+
+
+def _reload(force: bool = False) -> dict:
+    stats = reload_corpus(force=force)
+    if stats["changed"]:
+        # Cached answers may quote FAQs that just changed
+        answer_cache.clear()
+    return stats
+
+
+async def _watch_corpus(interval: float) -> None:
+    """Poll faqs.json mtime/size and hot-reload it off the event loop."""
+    while True:
+        await asyncio.sleep(interval)
+        if not corpus_file_changed():
+            continue
+        try:
+            await asyncio.to_thread(_reload)
+        except Exception:  # pragma: no cover - keep serving the previous corpus
+            logger.exception("Corpus reload failed; keeping the previous corpus")
 
 
 @app.get("/api/health", response_model=HealthResponse)
@@ -38,6 +180,152 @@ async def health() -> HealthResponse:
     return HealthResponse(status="ok")
 
 
+def _confidence(max_similarity: float, answer_text: str) -> float:
+    # Confidence based mainly on retrieval quality
+    return float(max(max_similarity, config.MIN_SIMILARITY_WEAK) if answer_text.strip() else 0.0)
+
+
+def _answer_cache_key(query: str, language: str, sources: List[SourceFAQ]) -> Tuple[AnswerKey, Optional[np.ndarray]]:
+    key = answer_cache.make_key(query, language, (s.id for s in sources))
+    # Only pay for the query embedding when near-duplicate reuse is enabled
+    query_vec = embed_query(query) if answer_cache.similarity_threshold > 0 else None
+    return key, query_vec
+
+
+async def _cached_answer(key: AnswerKey, query_vec: Optional[np.ndarray]) -> Optional[str]:
+    with metrics.stage("cache"):
+        answer = await answer_cache.aget(key, query_vec)
+    metrics.ANSWER_CACHE.inc(result="miss" if answer is None else "hit")
+    return answer
+
+
+def _fast_path_answer(language: str, sources: List[SourceFAQ]) -> Optional[str]:
+    """Stored answer of the top FAQ when it matches clearly enough to skip the LLM.
+
+    Requires ANSWER_POLICY=auto, a similarity above MIN_SIMILARITY_STRONG, a
+    lead of FAST_PATH_MARGIN over the runner-up (else the query is ambiguous)
+    and an answer written in `language`.
+    """
+    if config.ANSWER_POLICY != "auto" or not sources:
+        return None
+    best = sources[0]
+    runner_up = (sources[1].similarity or 0.0) if len(sources) > 1 else 0.0
+    similarity = best.similarity or 0.0
+    if similarity < config.MIN_SIMILARITY_STRONG or similarity - runner_up < config.FAST_PATH_MARGIN:
+        return None
+    answer = best.answer_ar if language == "ar" else best.answer_fr
+    if not answer:
+        return None
+    question = best.question_ar if language == "ar" else best.question_fr
+    template = config.FAST_PATH_TEMPLATES.get(language) or "{answer}"
+    try:
+        return template.format(answer=answer, question=question or "")
+    except (KeyError, IndexError, ValueError) as exc:
+        logger.warning("Invalid fast-path template %r (%r), serving the raw answer", template, exc)
+        return answer
+
+
+def _faq_fallback(language: str, sources: List[SourceFAQ], exc: Exception) -> str:
+    """Best retrieved FAQ answer, served when the LLM is unavailable or overloaded."""
+    if isinstance(exc, Overloaded) and (config.OVERLOAD_POLICY == "reject" or not sources):
+        raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": str(math.ceil(exc.retry_after))})
+    if not sources:
+        # Nothing to answer with: let the frontend fall back to its offline mode
+        raise HTTPException(status_code=503, detail=str(exc))
+    if isinstance(exc, Overloaded):
+        reason = "overload"
+    elif isinstance(exc, CircuitOpenError):
+        reason = "breaker_open"
+    else:
+        reason = "error"
+    metrics.LLM_FALLBACKS.inc(reason=reason)
+    best = sources[0]
+    return (best.answer_ar or best.answer_fr) if language == "ar" else best.answer_fr
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/api/admin/reload")
+def admin_reload(force: bool = False, x_admin_token: str = Header(default="")) -> dict:
+    """Re-read faqs.json now; only new or changed FAQs are re-embedded."""
+    if not config.ADMIN_TOKEN or x_admin_token != config.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    try:
+        return _reload(force=force)
+    except Exception as exc:  # pragma: no cover - generic safety
+        raise HTTPException(status_code=500, detail=f"Reload failed: {exc}")
+
+
+@app.get("/api/stats")
+async def stats() -> dict:
+    return {
+        "answer_cache": await answer_cache.astats(),
+        "chat_coalescing": chat_flights.stats(),
+        "llm_queue": llm_queue.stats(),
+        "llm_models": llm_client.router.stats(),
+        "embedding_caches": embedding_cache_stats(),
+        "process": {"pid": os.getpid(), **metrics.process_memory()},
+    }
+
+
+@app.get("/metrics")
+async def prometheus_metrics() -> Response:
+    metrics.process_memory()
+    for name, cache_stats in embedding_cache_stats().items():
+        metrics.EMBEDDING_CACHE_HIT_RATIO.set(cache_stats["hit_ratio"], cache=name)
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+@app.get("/api/corpus/delta", response_model=CorpusDeltaResponse)
+def get_corpus_delta(
+    response: Response,
+    since: Optional[str] = None,
+    embeddings: bool = True,
+    if_none_match: Optional[str] = Header(default=None),
+):
+    """Changes since the client's corpus version; 304 when its ETag is current."""
+    etag = f'"{load_corpus().version}"'
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    delta = corpus_delta(since, with_embeddings=embeddings)
+    # The version may have moved between the ETag check and the diff
+    response.headers["ETag"] = f'"{delta["version"]}"'
+    response.headers["Cache-Control"] = "no-cache"
+    return delta
+
+
+@app.post("/api/retrieve/batch", response_model=BatchRetrieveResponse)
+def retrieve_batch(body: BatchRetrieveRequest) -> BatchRetrieveResponse:
+    """Retrieval only (no LLM) for many queries at once.
+
+    Plain `def`: the matrix product runs in the threadpool, not on the event loop.
+    """
+    if len(body.queries) > config.MAX_BATCH_QUERIES:
+        raise HTTPException(status_code=413, detail=f"At most {config.MAX_BATCH_QUERIES} queries per batch")
+    if not 1 <= body.top_k <= config.MAX_BATCH_TOP_K:
+        raise HTTPException(status_code=400, detail=f"top_k must be between 1 and {config.MAX_BATCH_TOP_K}")
+
+    hits = retrieve_top_faqs_batch(
+        body.queries,
+        top_k=body.top_k,
+        category=body.category,
+        language=body.language if body.restrict_language else None,
+    )
+    return BatchRetrieveResponse(
+        results=[[RetrievalHit(id=faq_id, similarity=sim) for faq_id, sim in row] for row in hits]
+    )
+
+
 @app.post("/api/chat", response_model=ChatResponse)
 async def chat(body: ChatRequest) -> ChatResponse:
     query = body.query.strip()
@@ -45,23 +333,49 @@ async def chat(body: ChatRequest) -> ChatResponse:
         raise HTTPException(status_code=400, detail="Query is empty")
 
     language = body.language or "fr"
+    if not config.CHAT_COALESCING:
+        return await _answer(query, language, body.category)
 
+    # Identical questions in flight at the same time share one retrieval + generation
+    key = (normalize_query(query), language, body.category)
+    return await chat_flights.run(key, lambda: _answer(query, language, body.category))
+
+
+async def _answer(query: str, language: str, category: Optional[str]) -> ChatResponse:
     try:
         # RAG: retrieve top FAQs as context
-        sources: List[SourceFAQ] = retrieve_top_faqs(query, language=language, top_k=config.MAX_CONTEXT_FAQS)
+        sources: List[SourceFAQ] = retrieve_top_faqs(
+            query, language=language, top_k=config.MAX_CONTEXT_FAQS, category=category
+        )
 
         max_similarity = max((s.similarity or 0.0) for s in sources) if sources else 0.0
 
-        # Generate answer with OpenRouter LLM
-        answer_text = llm_client.generate(query=query, language=language, faqs=sources)
-
-        # Confidence based mainly on retrieval quality
-        confidence = max(max_similarity, config.MIN_SIMILARITY_WEAK) if answer_text.strip() else 0.0
+        mode = "fast_path"
+        answer_text = _fast_path_answer(language, sources)
+        if answer_text is None:
+            mode = "cache"
+            cache_key, query_vec = _answer_cache_key(query, language, sources)
+            answer_text = await _cached_answer(cache_key, query_vec)
+            if answer_text is None:
+                # Generate answer with OpenRouter LLM (retried; rejected at once while the breaker is open)
+                try:
+                    # Bounded wait for an LLM slot: Overloaded sheds the request early
+                    async with llm_queue.admit():
+                        answer_text = await llm_client.agenerate(query=query, language=language, faqs=sources)
+                except Exception as exc:
+                    answer_text = _faq_fallback(language, sources, exc)
+                    mode = "fallback"
+                else:
+                    await answer_cache.aput(cache_key, answer_text, query_vec)
+                    mode = "llm"
+        metrics.ANSWERS.inc(mode=mode)
 
         return ChatResponse(
             answer=answer_text,
             sources=sources,
-            confidence=float(confidence),
+            confidence=_confidence(max_similarity, answer_text),
+            degraded=mode == "fallback",
+            mode=mode,
         )
 
     except HTTPException:
@@ -69,3 +383,75 @@ async def chat(body: ChatRequest) -> ChatResponse:
     except Exception as exc:  # pragma: no cover - generic safety
         # Let frontend fallback to Hybrid mode
         raise HTTPException(status_code=500, detail=str(exc))
+
+
+@app.post("/api/chat/stream")
+async def chat_stream(body: ChatRequest) -> StreamingResponse:
+    """Server-Sent Events variant of /api/chat.
+
+    Emits `sources` as soon as retrieval is done, then one `delta` event per
+    LLM token chunk (a single one for fast-path and cached answers), and a
+    final `done` event with the confidence and the answer `mode`.
+    """
+    query = body.query.strip()
+    if not query:
+        raise HTTPException(status_code=400, detail="Query is empty")
+
+    language = body.language or "fr"
+    sources: List[SourceFAQ] = retrieve_top_faqs(
+        query, language=language, top_k=config.MAX_CONTEXT_FAQS, category=body.category
+    )
+    max_similarity = max((s.similarity or 0.0) for s in sources) if sources else 0.0
+
+    ready_answer = _fast_path_answer(language, sources)
+    mode = "fast_path"
+    if ready_answer is None:
+        cache_key, query_vec = _answer_cache_key(query, language, sources)
+        ready_answer = await _cached_answer(cache_key, query_vec)
+        mode = "cache"
+
+    async def events() -> AsyncIterator[str]:
+        yield _sse("sources", [s.model_dump() for s in sources])
+
+        if ready_answer is not None:
+            metrics.ANSWERS.inc(mode=mode)
+            yield _sse("delta", {"text": ready_answer})
+            yield _sse("done", {"confidence": _confidence(max_similarity, ready_answer), "mode": mode})
+            return
+
+        parts: List[str] = []
+        try:
+            async with llm_queue.admit():
+                async for delta in llm_client.astream(query=query, language=language, faqs=sources):
+                    parts.append(delta)
+                    yield _sse("delta", {"text": delta})
+        except Exception as exc:  # pragma: no cover - generic safety
+            if not isinstance(exc, Overloaded):
+                metrics.ERRORS.inc(where="stream")
+            if not parts and sources:
+                # Nothing streamed yet: answer from the best FAQ instead
+                try:
+                    fallback = _faq_fallback(language, sources, exc)
+                except HTTPException as refused:
+                    yield _sse("error", {"detail": refused.detail, "status": refused.status_code})
+                    return
+                metrics.ANSWERS.inc(mode="fallback")
+                yield _sse("delta", {"text": fallback})
+                yield _sse("done", {"confidence": _confidence(max_similarity, fallback), "degraded": True,
+                                    "mode": "fallback"})
+                return
+            # Headers are already sent: report in-band so the frontend can fall back
+            yield _sse("error", {"detail": str(exc)})
+            return
+
+        answer_text = "".join(parts)
+        metrics.ANSWERS.inc(mode="llm")
+        if answer_text.strip():
+            await answer_cache.aput(cache_key, answer_text.strip(), query_vec)
+        yield _sse("done", {"confidence": _confidence(max_similarity, answer_text), "mode": "llm"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,272 @@
+"""In-process metrics in Prometheus text format (GET /metrics), and per-request traces.
+
+Dependency-free on purpose: a handful of counters, gauges and histograms
+guarded by one lock each is all a single worker needs. With several workers
+each one has its own registry; series carry no worker label, so scrape each
+worker (or sum) and use `assistant_process_memory_bytes{pid}` to tell them apart.
+
+`stage(name)` times a block into `assistant_stage_duration_seconds`. When a
+request opts in with the `X-Trace: 1` header, the same timings are also
+collected per request (through a context variable, so concurrent requests
+do not mix) and returned as a `Server-Timing` header.
+"""
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry: List["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class _Metric(ABC):
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(n, '')) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Sample lines, without the HELP/TYPE header."""
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    @contextmanager
+    def track_inprogress(self, **labels: str) -> Iterator[None]:
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts incl. +Inf, sum)
+        self._values: Dict[LabelValues, Tuple[List[int], float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[idx] += 1
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return sum(entry[0]) if entry else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(c), s)) for k, (c, s) in self._values.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+def render() -> str:
+    """Every registered metric in Prometheus text exposition format 0.0.4."""
+    return '\n'.join(line for metric in _registry for line in metric.render()) + '\n'
+
+
+def _read_kib(path: str, fields: Dict[str, str]) -> Dict[str, int]:
+    """Selected 'Name:  123 kB' lines of a /proc file, in bytes (empty if unavailable)."""
+    found: Dict[str, int] = {}
+    try:
+        with open(path) as fh:
+            for line in fh:
+                name, _, rest = line.partition(':')
+                if name in fields:
+                    kind = fields[name]
+                    found[kind] = found.get(kind, 0) + int(rest.split()[0]) * 1024
+    except (OSError, ValueError, IndexError):
+        return {}
+    return found
+
+
+def process_memory() -> Dict[str, int]:
+    """Resident memory of this process, in bytes (Linux /proc; empty elsewhere).
+
+    `rss` counts shared pages in full in every worker; `pss` splits them
+    between the processes sharing them, so summing `pss` over workers gives
+    the real footprint, and `shared` shows what copy-on-write saves.
+    """
+    memory = _read_kib('/proc/self/status', {'VmRSS': 'rss', 'VmHWM': 'peak'})
+    memory.update(_read_kib('/proc/self/smaps_rollup', {
+        'Pss': 'pss', 'Shared_Clean': 'shared', 'Shared_Dirty': 'shared',
+    }))
+    pid = str(os.getpid())
+    for kind, value in memory.items():
+        PROCESS_MEMORY.set(value, pid=pid, kind=kind)
+    return memory
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+REQUESTS = Counter('assistant_requests_total', 'HTTP requests by route and status code', ('route', 'status'))
+REQUEST_SECONDS = Histogram('assistant_request_duration_seconds', 'Time to response headers by route', ('route',))
+REQUESTS_IN_FLIGHT = Gauge('assistant_requests_in_flight', 'HTTP requests being handled')
+ERRORS = Counter('assistant_errors_total', 'Failures by where they happened', ('where',))
+STAGE_SECONDS = Histogram('assistant_stage_duration_seconds', 'Time spent per pipeline stage', ('stage',))
+ANSWER_CACHE = Counter('assistant_answer_cache_total', 'Answer cache lookups', ('result',))
+EMBEDDING_CACHE_HIT_RATIO = Gauge('assistant_embedding_cache_hit_ratio', 'Hit ratio of the query embedding cache and token hash memo', ('cache',))
+SHED = Counter('assistant_shed_total', 'Requests refused or degraded by admission control', ('reason',))
+LLM_QUEUE_DEPTH = Gauge('assistant_llm_queue_depth', 'Chat requests waiting for an LLM slot')
+COALESCED = Counter('assistant_coalesced_total', 'Requests that joined an identical request already in flight', ('flight',))
+ANSWERS = Counter('assistant_answers_total', 'Chat answers by how they were produced (fast_path, cache, llm, fallback)', ('mode',))
+LLM_REQUESTS = Counter('assistant_llm_requests_total', 'OpenRouter calls by outcome', ('outcome',))
+LLM_IN_FLIGHT = Gauge('assistant_llm_in_flight', 'OpenRouter calls in progress')
+LLM_TOKENS = Counter('assistant_llm_tokens_total', 'Tokens reported by OpenRouter usage', ('kind',))
+PROMPT_TOKENS = Histogram(
+    'assistant_prompt_tokens', 'Estimated prompt tokens per LLM request',
+    buckets=(64, 128, 256, 512, 768, 1024, 1536, 2048, 4096),
+)
+PROMPT_SOURCES = Counter('assistant_prompt_sources_total', 'FAQ sources per prompt, kept whole, trimmed or dropped', ('result',))
+LLM_RETRIES = Counter('assistant_llm_retries_total', 'OpenRouter calls retried after a failure')
+LLM_HEDGES = Counter('assistant_llm_hedges_total', 'Hedged OpenRouter requests sent and won', ('result',))
+LLM_BREAKER_STATE = Gauge('assistant_llm_breaker_state', 'Circuit breaker per model (0 closed, 1 half-open, 2 open)', ('model',))
+LLM_ROUTED = Counter('assistant_llm_routed_total', 'Model chosen per OpenRouter call, and why', ('model', 'reason'))
+LLM_MODEL_REQUESTS = Counter('assistant_llm_model_requests_total', 'OpenRouter calls by model and outcome', ('model', 'outcome'))
+PROCESS_MEMORY = Gauge('assistant_process_memory_bytes', 'Memory of this worker process (rss, peak, pss, shared)', ('pid', 'kind'))
+LLM_FALLBACKS = Counter('assistant_llm_fallback_total', 'Answers served from the FAQs instead of the LLM', ('reason',))
+
+
+class Trace:
+    """Stage timings of one request, in milliseconds."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.stages: List[Tuple[str, float]] = []
+        self.notes: List[Tuple[str, str]] = []
+
+    def server_timing(self) -> str:
+        total = (time.perf_counter() - self.started) * 1000
+        parts = [f"{name};dur={ms:.2f}" for name, ms in self.stages]
+        parts += [f'{name};desc="{value}"' for name, value in self.notes]
+        parts.append(f"total;dur={total:.2f}")
+        return ', '.join(parts)
+
+
+_trace: ContextVar[Optional[Trace]] = ContextVar('assistant_trace', default=None)
+
+
+def start_trace() -> Trace:
+    trace = Trace()
+    _trace.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    return _trace.get()
+
+
+def annotate(name: str, value: object) -> None:
+    """Attach a value (not a duration) to the current request's trace, if any."""
+    trace = _trace.get()
+    if trace is not None:
+        trace.notes.append((name, str(value)))
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        trace = _trace.get()
+        if trace is not None:
+            trace.stages.append((name, elapsed * 1000))
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel
 
 
@@ -6,6 +6,8 @@ class ChatRequest(BaseModel):
     query: str
     language: str = 'fr'
     timestamp: Optional[int] = None
+    # Optional retrieval pre-filter on FAQ category
+    category: Optional[str] = None
 
 
 class SourceFAQ(BaseModel):
@@ -22,6 +24,42 @@ class ChatResponse(BaseModel):
     answer: str
     sources: List[SourceFAQ]
     confidence: float
+    # True when the LLM was unavailable and `answer` is the best FAQ's answer
+    degraded: bool = False
+    # How the answer was produced: fast_path, cache, llm or fallback
+    mode: str = 'llm'
+
+
+class BatchRetrieveRequest(BaseModel):
+    queries: List[str]
+    language: str = 'fr'
+    top_k: int = 3
+    category: Optional[str] = None
+    # Only return FAQs that have an answer in `language`
+    restrict_language: bool = False
+
+
+class RetrievalHit(BaseModel):
+    id: int
+    similarity: float
+
+
+class BatchRetrieveResponse(BaseModel):
+    results: List[List[RetrievalHit]]
+
+
+class CorpusDeltaResponse(BaseModel):
+    version: str
+    since: Optional[str] = None
+    # True when `since` is unknown: `added` is the whole corpus, drop the local copy
+    full: bool = False
+    model: str
+    added: List[Dict[str, Any]]
+    updated: List[Dict[str, Any]]
+    removed: List[int]
+    # Rows for added + updated FAQs, in that order (omitted with embeddings=false)
+    embedding_ids: Optional[List[int]] = None
+    embeddings: Optional[List[List[float]]] = None
 
 
 class HealthResponse(BaseModel):
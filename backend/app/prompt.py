@@ -0,0 +1,171 @@
+"""Chat messages for the LLM, with the FAQ context packed into a token budget.
+
+The instructions are a fixed system message, byte-identical for every request
+and language, so upstream prompt caching can reuse it. The user message holds
+the answer language, the context and the question. Context sources are kept
+in decreasing similarity; a source that does not fit whole is cut at a
+sentence boundary (or a word boundary when its first sentence is already too
+long) rather than dropped.
+
+Token counts are estimates (characters / 4, as in pipeline/passages.py): close
+enough to bound prompt size without shipping a tokenizer for every model.
+"""
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+from .models import SourceFAQ
+
+
+CHARS_PER_TOKEN = 4
+_SENTENCE_RE = re.compile(r"(?<=[.!?؟…])\s+")
+# Below this many tokens of room, a source would be a header with a stub answer
+MIN_SOURCE_TOKENS = 12
+
+SYSTEM_PREAMBLE = (
+    "Tu es un assistant IA low-cost pour la Nuit de l'Info 2025 et les services publics numériques. "
+    "Tu dois répondre de manière courte, claire et pédagogique, dans la langue indiquée. "
+    "Utilise uniquement les informations du contexte FAQ comme source principale. Si l'information ne s'y trouve pas, "
+    "répond honnêtement que tu n'es pas sûr(e) et propose une réponse prudente. "
+    "Répond toujours avec tes propres mots, en reformulant le contexte sans copier mot pour mot les phrases données. "
+    "Tu peux ajouter une courte phrase d'explication pour aider l'utilisateur, mais reste concis."
+)
+
+_LABELS = {
+    'fr': {'language': 'français', 'context': 'Contexte FAQ', 'question': 'Question utilisateur',
+           'answer': 'Réponse:', 'empty': 'Aucun contexte FAQ fiable.'},
+    'ar': {'language': 'arabe', 'context': 'Contexte FAQ', 'question': 'Question utilisateur',
+           'answer': 'الإجابة:', 'empty': 'Aucun contexte FAQ fiable.'},
+}
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _truncate_words(text: str, max_tokens: int) -> str:
+    budget = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= budget:
+        return text
+    # -1: room for the ellipsis
+    return text[:budget - 1].rsplit(' ', 1)[0] + '…'
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """Leading whole sentences of `text` within `max_tokens`.
+
+    Falls back to cutting at a word boundary when even the first sentence is
+    too long (unpunctuated text), so only a non-positive budget gives ''.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ''
+    budget = max_tokens * CHARS_PER_TOKEN
+    kept: List[str] = []
+    size = 0
+    for sentence in _SENTENCE_RE.split(text.strip()):
+        extra = len(sentence) + (1 if kept else 0)
+        if size + extra > budget:
+            break
+        kept.append(sentence)
+        size += extra
+    return ' '.join(kept) if kept else _truncate_words(text.strip(), max_tokens)
+
+
+@dataclass
+class Prompt:
+    messages: List[Dict[str, Any]]
+    # Estimated tokens: whole prompt, and the part spent on FAQ context
+    tokens: int
+    context_tokens: int
+    # Sources included whole / cut to fewer sentences / left out
+    sources_full: int
+    sources_trimmed: int
+    sources_dropped: int
+
+
+def pack_context(language: str, faqs: List[SourceFAQ], budget: int) -> Tuple[List[str], int, int]:
+    """FAQ blocks, most similar first, within `budget` tokens.
+
+    The budget is split max-min fairly: sources shorter than an equal share
+    are kept whole and the rest is divided among the longer ones, which are
+    trimmed to their share (see trim_to_tokens). Only when shares would be
+    too small to be useful are the least similar sources left out.
+    Returns (blocks, full, trimmed).
+    """
+    ranked = sorted(faqs, key=lambda f: f.similarity or 0.0, reverse=True)
+    entries = []
+    for faq in ranked:
+        q, a = faq.question_fr, faq.answer_fr
+        if language == 'ar':
+            q = faq.question_ar or q
+            a = faq.answer_ar or a
+        head = f"Q: {q}\nR: "
+        # +4: "[FAQ n] " prefix, +1: blank line between blocks
+        entries.append((head, a, estimate_tokens(head) + 5, estimate_tokens(a)))
+
+    # Drop the least similar sources while an equal share leaves too little room
+    keep = len(entries)
+    while keep and budget / keep < entries[keep - 1][2] + MIN_SOURCE_TOKENS:
+        keep -= 1
+
+    shares = [0] * keep
+    pending = list(range(keep))
+    remaining = budget
+    while pending:
+        fair = remaining / len(pending)
+        fits = [i for i in pending if entries[i][2] + entries[i][3] <= fair]
+        if not fits:
+            for i in pending:
+                shares[i] = int(fair)
+            break
+        for i in fits:
+            shares[i] = entries[i][2] + entries[i][3]
+            remaining -= shares[i]
+        pending = [i for i in pending if i not in fits]
+
+    blocks: List[str] = []
+    full = trimmed = 0
+    for (head, answer, head_tokens, _), share in zip(entries, shares):
+        kept = trim_to_tokens(answer, share - head_tokens)
+        if not kept:
+            continue
+        if kept == answer:
+            full += 1
+        else:
+            trimmed += 1
+        blocks.append(f"[FAQ {len(blocks) + 1}] {head}{kept}")
+    return blocks, full, trimmed
+
+
+def build_prompt(
+    query: str,
+    language: str,
+    faqs: List[SourceFAQ],
+    context_tokens: int,
+    query_tokens: int,
+) -> Prompt:
+    labels = _LABELS.get(language, _LABELS['fr'])
+    blocks, full, trimmed = pack_context(language, faqs, context_tokens)
+    context_block = '\n\n'.join(blocks) if blocks else labels['empty']
+    user = (
+        f"Langue de réponse: {labels['language']}.\n\n"
+        f"{labels['context']}:\n{context_block}\n\n"
+        f"{labels['question']}: {_truncate_words(query, query_tokens)}\n\n"
+        f"{labels['answer']}"
+    )
+    return Prompt(
+        messages=[
+            {"role": "system", "content": SYSTEM_PREAMBLE},
+            {"role": "user", "content": user},
+        ],
+        tokens=estimate_tokens(SYSTEM_PREAMBLE) + estimate_tokens(user),
+        context_tokens=sum(estimate_tokens(b) for b in blocks),
+        sources_full=full,
+        sources_trimmed=trimmed,
+        sources_dropped=len(faqs) - full - trimmed,
+    )
@@ -1,112 +1,560 @@
 from __future__ import annotations
 
-from typing import List, Dict, Any
+from dataclasses import dataclass, field, replace
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 
+import gzip
 import json
+import logging
+import os
+from pathlib import Path
+import threading
+import time
 
 import numpy as np
 
 from . import config
+from .artifacts import ArtifactError, load_embedding_artifact, sha256_bytes, write_embedding_artifact
+from .cache import LRUCache
+from .embedding import DIMENSION, MODEL_NAME, create_embedding, embed_batch, faq_text, token_hash_stats
+from .keyword_index import BM25Index, analyze_faq, reciprocal_rank_fusion
+from .metrics import stage
 from .models import SourceFAQ
+from .sync import CorpusHistory, corpus_version, diff, faq_hash
+from .vector_index import FlatIndex, IVFIndex
 
 
-_faqs: List[Dict[str, Any]] | None = None
-_embeddings_matrix: np.ndarray | None = None
+logger = logging.getLogger(__name__)
 
+_EMPTY_ROWS = np.empty(0, dtype=np.int64)
 
-def _load_json(path):
-    with open(path, 'r', encoding='utf-8') as f:
-        return json.load(f)
 
+@dataclass(frozen=True)
+class _Corpus:
+    """Immutable snapshot of everything retrieval reads.
 
-def _hash_string(text: str) -> int:
-    """Stable hash function mirroring frontend RAGService.hashString (JS)."""
-    h = 0
-    for ch in text:
-        code = ord(ch)
-        h = ((h << 5) - h) + code
-        h &= 0xFFFFFFFF  # force 32-bit
+    Reloads build a new snapshot and swap the `_corpus` reference in one
+    assignment, so a request never sees a half-built matrix or index.
+    """
 
-    # Interpret as signed 32-bit int, like JS bitwise ops
-    if h & 0x80000000:
-        h -= 0x100000000
-    return h
+    faqs: List[Dict[str, Any]]
+    matrix: np.ndarray
+    matrix_checksum: str
+    source_checksum: str
+    # faqs.json (mtime_ns, size) when it was read, for the cheap change check
+    source_stat: Tuple[int, int]
+    # Per-row content hash, and id -> row, to re-embed only changed FAQs on reload
+    content_hashes: List[str]
+    row_of_id: Dict[int, int]
+    index: FlatIndex | IVFIndex
+    # Pre-filter index masks: sorted row indices per category / per answer language
+    category_rows: Dict[str, np.ndarray] = field(default_factory=dict)
+    language_rows: Dict[str, np.ndarray] = field(default_factory=dict)
+    # BM25 postings (and per-row analyses reused on reload), only when RETRIEVAL_MODE uses keywords
+    keyword_index: BM25Index | None = None
+    keyword_terms: List[Dict[str, float]] | None = None
+    # Hash of every (id, content hash) pair, the version clients sync against
+    version: str = ''
 
 
-def _create_embedding(text: str, dimension: int = 384) -> np.ndarray:
-    """Create lightweight 384D embedding (same spirit as frontend createQueryEmbedding)."""
-    vec = np.zeros(dimension, dtype=float)
+_corpus: _Corpus | None = None
+_reload_lock = threading.Lock()
+# Versions clients may still hold; seeded from corpus_history.json on first load
+_history: CorpusHistory | None = None
 
-    tokens = text.lower().split()
-    for idx, token in enumerate(tokens):
-        h = _hash_string(token)
-        pos = abs(h) % dimension
 
-        # term frequency
-        vec[pos] += 1.0
+def _read_faqs(path) -> Tuple[List[Dict[str, Any]], str, Tuple[int, int]]:
+    with open(path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        raw = f.read()
+    if str(path).endswith('.gz'):
+        raw = gzip.decompress(raw)
+    return json.loads(raw.decode('utf-8'))['faqs'], sha256_bytes(raw), (st.st_mtime_ns, st.st_size)
 
-        # simple positional encoding like frontend (1/(idx+1) on next dim)
-        pos_weight = 1.0 / (idx + 1)
-        vec[(pos + 1) % dimension] += pos_weight
 
-    norm = np.linalg.norm(vec)
-    if norm == 0.0:
-        return vec
-    return vec / norm
+def _load_artifact(
+    faqs: List[Dict[str, Any]],
+    source_checksum: str,
+    matrix_path: Optional[Path] = None,
+    meta_path: Optional[Path] = None,
+) -> Tuple[List[Dict[str, Any]], np.ndarray, str]:
+    """Map the precomputed matrix and order FAQs by its id/offset table.
 
+    Defaults to the pipeline artifact (config.EMBEDDINGS_MATRIX_PATH).
+    """
+    meta, ids, matrix = load_embedding_artifact(
+        matrix_path or config.EMBEDDINGS_MATRIX_PATH,
+        meta_path or config.EMBEDDINGS_META_PATH,
+    )
 
-def load_corpus() -> None:
-    global _faqs, _embeddings_matrix
+    if meta["model"] != MODEL_NAME or meta["dimension"] != DIMENSION:
+        raise ArtifactError(f"artifact built with {meta['model']}/{meta['dimension']}, expected {MODEL_NAME}/{DIMENSION}")
+    if source_checksum not in meta.get("source_checksums", [meta["source_checksum"]]):
+        raise ArtifactError("artifact is stale (faqs.json changed since it was built)")
 
-    if _faqs is not None and _embeddings_matrix is not None:
-        return
+    by_id = {faq['id']: faq for faq in faqs}
+    if len(by_id) != len(ids) or any(i not in by_id for i in ids):
+        raise ArtifactError("artifact ids do not match faqs.json")
 
-    faqs_data = _load_json(config.FAQS_PATH)
-    _faqs = faqs_data['faqs']
+    # Reorder the (small) FAQ list rather than copying the mapped matrix
+    return [by_id[i] for i in ids], matrix, meta["checksum"]
 
-    # Build embeddings directly from (question_fr + answer_fr)
-    matrix = []
-    for faq in _faqs:
-        text = f"{faq['question_fr']} {faq['answer_fr']}"
-        emb = _create_embedding(text)
-        matrix.append(emb)
 
-    _embeddings_matrix = np.stack(matrix, axis=0)
+def _build_filter_rows(faqs: List[Dict[str, Any]]) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+    categories = np.array([faq.get('category') or '' for faq in faqs], dtype=object)
+    category_rows = {
+        cat: np.flatnonzero(categories == cat)
+        for cat in set(categories.tolist()) if cat
+    }
+    language_rows = {
+        'fr': np.flatnonzero([bool(faq.get('answer_fr')) for faq in faqs]),
+        'ar': np.flatnonzero([bool(faq.get('answer_ar')) for faq in faqs]),
+    }
+    return category_rows, language_rows
 
 
-def retrieve_top_faqs(query: str, language: str = 'fr', top_k: int = 3) -> List[SourceFAQ]:
-    load_corpus()
-    assert _faqs is not None
-    assert _embeddings_matrix is not None
+def _build_index(
+    matrix: np.ndarray,
+    matrix_checksum: str,
+    previous: FlatIndex | IVFIndex | None = None,
+) -> FlatIndex | IVFIndex:
+    if config.VECTOR_INDEX != 'ivf' or matrix.shape[0] == 0:
+        return FlatIndex(matrix)
+
+    index = IVFIndex.load(config.VECTOR_INDEX_PATH, matrix, matrix_checksum, nprobe=config.IVF_NPROBE)
+    if index is not None:
+        return index
+
+    if isinstance(previous, IVFIndex):
+        # Reload: keep the trained lists, only re-assign rows
+        index = IVFIndex.from_centroids(matrix, previous.centroids, nprobe=config.IVF_NPROBE)
+    else:
+        index = IVFIndex.build(matrix, nlist=config.IVF_NLIST, nprobe=config.IVF_NPROBE)
+    try:
+        index.save(config.VECTOR_INDEX_PATH, matrix_checksum)
+    except OSError as exc:
+        logger.warning("Could not persist IVF index to %s: %s", config.VECTOR_INDEX_PATH, exc)
+    return index
+
+
+def _make_corpus(
+    faqs: List[Dict[str, Any]],
+    matrix: np.ndarray,
+    matrix_checksum: str | None = None,
+    source_checksum: str = '',
+    source_stat: Tuple[int, int] = (0, 0),
+    previous: _Corpus | None = None,
+    content_hashes: List[str] | None = None,
+) -> _Corpus:
+    if matrix_checksum is None:
+        matrix_checksum = sha256_bytes(np.ascontiguousarray(matrix, dtype=np.float32).tobytes())
+    if content_hashes is None:
+        content_hashes = [faq_hash(faq) for faq in faqs]
+
+    keyword_index = keyword_terms = None
+    if config.RETRIEVAL_MODE != 'vector':
+        # Reuse analyses of unchanged FAQs from the previous snapshot
+        old_terms: Dict[str, Dict[str, float]] = {}
+        if previous is not None and previous.keyword_terms is not None:
+            old_terms = dict(zip(previous.content_hashes, previous.keyword_terms))
+        keyword_terms = [old_terms.get(h) or analyze_faq(faq) for faq, h in zip(faqs, content_hashes)]
+        keyword_index = BM25Index(
+            keyword_terms,
+            priorities=(float(faq.get('offline_priority') or 0) for faq in faqs),
+            priority_boost=config.BM25_PRIORITY_BOOST,
+        )
+
+    category_rows, language_rows = _build_filter_rows(faqs)
+    version = corpus_version({faq['id']: h for faq, h in zip(faqs, content_hashes)})
+    return _Corpus(
+        faqs=faqs,
+        matrix=matrix,
+        matrix_checksum=matrix_checksum,
+        source_checksum=source_checksum,
+        source_stat=source_stat,
+        content_hashes=content_hashes,
+        row_of_id={faq['id']: row for row, faq in enumerate(faqs)},
+        index=_build_index(matrix, matrix_checksum, previous.index if previous else None),
+        category_rows=category_rows,
+        language_rows=language_rows,
+        keyword_index=keyword_index,
+        keyword_terms=keyword_terms,
+        version=version,
+    )
+
+
+def _set_corpus(faqs: List[Dict[str, Any]], matrix: np.ndarray, matrix_checksum: str | None = None) -> None:
+    """Install an in-memory corpus (benchmarks, tests)."""
+    global _corpus
+    _corpus = _make_corpus(faqs, matrix, matrix_checksum)
+
+
+def _incremental_matrix(
+    faqs: List[Dict[str, Any]],
+    content_hashes: List[str],
+    previous: _Corpus,
+) -> Tuple[np.ndarray, int]:
+    """New matrix reusing previous rows for FAQs whose id and content hash are unchanged."""
+    matrix = np.empty((len(faqs), DIMENSION), dtype=np.float32)
+    stale: List[int] = []
+    for row, (faq, h) in enumerate(zip(faqs, content_hashes)):
+        old_row = previous.row_of_id.get(faq['id'])
+        if old_row is not None and previous.content_hashes[old_row] == h:
+            matrix[row] = previous.matrix[old_row]
+        else:
+            stale.append(row)
+    if stale:
+        matrix[stale] = embed_batch([faq_text(faqs[row]) for row in stale]).astype(np.float32)
+    return matrix, len(stale)
+
+
+def _write_back_artifact(
+    faqs: List[Dict[str, Any]],
+    matrix: np.ndarray,
+    source_checksum: str,
+) -> Optional[Tuple[List[Dict[str, Any]], np.ndarray, str]]:
+    """Persist a freshly embedded matrix under CORPUS_CACHE_DIR and map it back.
+
+    A matrix built in memory is private to the process that built it; once it
+    is on disk, every worker that loads this faqs.json maps the same file and
+    shares its pages. The pipeline's own outputs are never touched, so its
+    manifests stay accurate. None when the cache directory is not writable.
+    """
+    try:
+        write_embedding_artifact(
+            config.RELOADED_MATRIX_PATH,
+            config.RELOADED_META_PATH,
+            ids=[faq['id'] for faq in faqs],
+            matrix=matrix,
+            model=MODEL_NAME,
+            source_checksum=source_checksum,
+        )
+        return _load_artifact(faqs, source_checksum, config.RELOADED_MATRIX_PATH, config.RELOADED_META_PATH)
+    except (OSError, ArtifactError) as exc:
+        logger.warning("Could not write embedding artifact to %s (%s); matrix stays in private memory",
+                       config.RELOADED_MATRIX_PATH, exc)
+        return None
+
+
+def _load_mapped(
+    faqs: List[Dict[str, Any]],
+    source_checksum: str,
+) -> Tuple[List[Dict[str, Any]], np.ndarray, str]:
+    """The pipeline artifact, else the matrix a previous reload cached."""
+    try:
+        return _load_artifact(faqs, source_checksum)
+    except ArtifactError as exc:
+        try:
+            return _load_artifact(faqs, source_checksum, config.RELOADED_MATRIX_PATH, config.RELOADED_META_PATH)
+        except ArtifactError:
+            raise exc from None
 
-    query_vec = _create_embedding(query)
-    q_norm = np.linalg.norm(query_vec)
-    if q_norm == 0.0:
-        return []
 
-    # cosine similarity: matrix rows are already normalized
-    sims = _embeddings_matrix @ (query_vec / q_norm)
-
-    # best indices
-    top_indices = np.argsort(-sims)[:top_k]
-
-    results: List[SourceFAQ] = []
-    for idx in top_indices:
-        similarity = float(sims[idx])
-        if similarity < config.MIN_SIMILARITY_WEAK:
-            continue
-
-        faq = _faqs[idx]
-        results.append(
-            SourceFAQ(
-                id=faq['id'],
-                question_fr=faq['question_fr'],
-                answer_fr=faq['answer_fr'],
-                question_ar=faq.get('question_ar'),
-                answer_ar=faq.get('answer_ar'),
-                category=faq.get('category'),
-                similarity=similarity,
-            )
+def reload_corpus(force: bool = False) -> Dict[str, Any]:
+    """(Re)load faqs.json and atomically swap in the new snapshot.
+
+    The precomputed artifact is mapped when it matches the new faqs.json.
+    Otherwise only added/changed FAQs (by id + content hash) are re-embedded,
+    and the new matrix is written to CORPUS_CACHE_DIR and mapped, so it stays
+    shared between workers. Only embedding is incremental: content hashes,
+    filters, BM25 postings (from cached per-FAQ analyses) and the IVF list
+    assignment are rebuilt over the whole corpus.
+    """
+    global _corpus
+
+    with _reload_lock:
+        start = time.perf_counter()
+        previous = _corpus
+        faqs, source_checksum, source_stat = _read_faqs(config.FAQS_PATH)
+
+        if previous is not None and not force and previous.source_checksum == source_checksum:
+            if previous.source_stat != source_stat:
+                # Same content, new mtime (e.g. touched file): just remember the new stat
+                _corpus = replace(previous, source_stat=source_stat)
+            return {"changed": False, "total": len(previous.faqs)}
+
+        reembedded = 0
+        try:
+            faqs, matrix, matrix_checksum = _load_mapped(faqs, source_checksum)
+        except ArtifactError as exc:
+            content_hashes = [faq_hash(faq) for faq in faqs]
+            if previous is None:
+                logger.warning("Embedding artifact unusable (%s); embedding %d FAQs", exc, len(faqs))
+                # Build embeddings directly from (question_fr + answer_fr)
+                matrix = embed_batch([faq_text(faq) for faq in faqs]).astype(np.float32)
+                reembedded = len(faqs)
+            else:
+                matrix, reembedded = _incremental_matrix(faqs, content_hashes, previous)
+            matrix_checksum = None
+            mapped = _write_back_artifact(faqs, matrix, source_checksum)
+            if mapped is not None:
+                # Same row order as written, so content_hashes still line up
+                faqs, matrix, matrix_checksum = mapped
+        else:
+            content_hashes = None
+
+        corpus = _make_corpus(
+            faqs,
+            matrix,
+            matrix_checksum,
+            source_checksum=source_checksum,
+            source_stat=source_stat,
+            previous=previous,
+            content_hashes=content_hashes,
         )
 
+        stats: Dict[str, Any] = {"changed": True, "total": len(faqs), "reembedded": reembedded}
+        if previous is not None:
+            old = dict(zip((faq['id'] for faq in previous.faqs), previous.content_hashes))
+            new = dict(zip((faq['id'] for faq in faqs), corpus.content_hashes))
+            added, updated, removed = diff(old, new)
+            stats.update(added=len(added), updated=len(updated), removed=len(removed))
+
+        _corpus = corpus
+        _record_version(corpus)
+        stats["version"] = corpus.version
+        stats["seconds"] = round(time.perf_counter() - start, 4)
+        logger.info("Corpus loaded: %s", stats)
+        return stats
+
+
+def _record_version(corpus: _Corpus) -> None:
+    global _history
+    if _history is None:
+        _history = CorpusHistory.load(config.CORPUS_HISTORY_PATH, config.CORPUS_HISTORY_SIZE)
+    _history.record(corpus.version, dict(zip((faq['id'] for faq in corpus.faqs), corpus.content_hashes)))
+
+
+def corpus_delta(since: Optional[str], with_embeddings: bool = True) -> Dict[str, Any]:
+    """FAQs and embedding rows added/updated/removed since the client's `since` version.
+
+    An unknown (too old, or empty) `since` yields a full snapshot with
+    `full=True`: the client should replace its local copy with `added`.
+    """
+    corpus = load_corpus()
+    new = dict(zip((faq['id'] for faq in corpus.faqs), corpus.content_hashes))
+    old = _history.get(since) if since and _history is not None else None
+
+    full = old is None
+    added, updated, removed = diff({} if full else old, new)
+    delta: Dict[str, Any] = {
+        "version": corpus.version,
+        "since": since,
+        "full": full,
+        "model": MODEL_NAME,
+        "added": [corpus.faqs[corpus.row_of_id[i]] for i in added],
+        "updated": [corpus.faqs[corpus.row_of_id[i]] for i in updated],
+        "removed": removed,
+    }
+    if with_embeddings:
+        ids = added + updated
+        rows = [corpus.row_of_id[i] for i in ids]
+        # Same 6-decimal rounding as embeddings.json
+        delta["embedding_ids"] = ids
+        delta["embeddings"] = np.round(np.asarray(corpus.matrix[rows], dtype=np.float64), 6).tolist() if rows else []
+    return delta
+
+
+def corpus_file_changed() -> bool:
+    """Cheap mtime/size check of faqs.json against the loaded snapshot."""
+    corpus = _corpus
+    if corpus is None:
+        return True
+    try:
+        st = os.stat(config.FAQS_PATH)
+    except OSError:
+        return False
+    return (st.st_mtime_ns, st.st_size) != corpus.source_stat
+
+
+def load_corpus() -> _Corpus:
+    corpus = _corpus
+    if corpus is None:
+        reload_corpus()
+        corpus = _corpus
+    assert corpus is not None
+    return corpus
+
+
+# Per process even with CACHE_BACKEND=server: a round trip to the cache service
+# (~90 us) costs more than hashing the query again (~30 us)
+_query_embeddings = LRUCache(config.QUERY_EMBEDDING_CACHE_SIZE, 0.0)
+
+
+def _query_key(query: str) -> str:
+    # The embedding only depends on the lowercased tokens
+    return ' '.join(query.lower().split())
+
+
+def embed_query(query: str) -> np.ndarray:
+    """Normalized float32 query embedding, in the same space as the FAQ matrix rows.
+
+    Memoized per normalized query; returned arrays are shared and read-only.
+    """
+    key = _query_key(query)
+    vec = _query_embeddings.get(key)
+    if vec is None:
+        vec = create_embedding(query).astype(np.float32)
+        vec.flags.writeable = False
+        _query_embeddings.put(key, vec)
+    return vec
+
+
+def embed_queries(queries: Sequence[str]) -> np.ndarray:
+    """`embed_query` for many queries: cached rows are reused, misses go through one embed_batch."""
+    keys = [_query_key(q) for q in queries]
+    matrix = np.empty((len(queries), DIMENSION), dtype=np.float32)
+    missing: Dict[str, List[int]] = {}
+    for i, key in enumerate(keys):
+        vec = _query_embeddings.get(key)
+        if vec is None:
+            missing.setdefault(key, []).append(i)
+        else:
+            matrix[i] = vec
+    if missing:
+        fresh = embed_batch(list(missing)).astype(np.float32)
+        for key, row in zip(missing, fresh):
+            matrix[missing[key]] = row
+            # Own copy, so an entry does not keep the whole batch alive
+            vec = row.copy()
+            vec.flags.writeable = False
+            _query_embeddings.put(key, vec)
+    return matrix
+
+
+def embedding_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit ratios of the query embedding cache and the token hash memo."""
+    return {"query": _query_embeddings.stats(), "token_hash": token_hash_stats()}
+
+
+def _candidate_rows(corpus: _Corpus, category: Optional[str], language: Optional[str]) -> Optional[np.ndarray]:
+    """Row indices allowed by the pre-filters, or None when unfiltered."""
+    rows: Optional[np.ndarray] = None
+    if category:
+        rows = corpus.category_rows.get(category, _EMPTY_ROWS)
+    if language:
+        lang_rows = corpus.language_rows.get(language, _EMPTY_ROWS)
+        rows = lang_rows if rows is None else np.intersect1d(rows, lang_rows, assume_unique=True)
+    return rows
+
+
+def _search(
+    corpus: _Corpus,
+    query_matrix: np.ndarray,
+    top_k: int,
+    rows: Optional[np.ndarray],
+) -> List[List[Tuple[int, float]]]:
+    """Best (row, similarity) pairs per query from the vector index, above the weak threshold."""
+    top, top_scores = corpus.index.search(query_matrix, top_k, rows)
+
+    # Vectorized threshold on the k survivors (padding is -inf, so it drops out too)
+    keep = top_scores >= config.MIN_SIMILARITY_WEAK
+    return [
+        [(idx, score) for idx, score, ok in zip(row_idx, row_scores, row_keep) if ok]
+        for row_idx, row_scores, row_keep in zip(top.tolist(), top_scores.tolist(), keep.tolist())
+    ]
+
+
+def _rank(
+    corpus: _Corpus,
+    queries: List[str],
+    query_matrix: np.ndarray,
+    top_k: int,
+    rows: Optional[np.ndarray],
+) -> List[List[Tuple[int, float]]]:
+    """(row, cosine similarity) per query according to RETRIEVAL_MODE.
+
+    - vector: cosine top-k above the weak threshold
+    - keyword: BM25 top-k
+    - hybrid: reciprocal-rank fusion of the vector and BM25 candidate lists
+
+    Every mode applies the MIN_SIMILARITY_WEAK cutoff to the cosine similarity
+    and returns hits in decreasing similarity, as the prompt packer, the fast
+    path and confidence expect; the ranking only decides which rows make the top-k.
+    """
+    mode = config.RETRIEVAL_MODE
+    keyword_index = corpus.keyword_index
+    if mode == 'vector' or keyword_index is None:
+        return _search(corpus, query_matrix, top_k, rows)
+
+    depth = max(top_k, config.HYBRID_CANDIDATES)
+    vector_hits = _search(corpus, query_matrix, depth, rows) if mode == 'hybrid' else [[] for _ in queries]
+
+    results: List[List[Tuple[int, float]]] = []
+    for query, query_vec, hits in zip(queries, query_matrix, vector_hits):
+        with stage('keyword'):
+            keyword_rows = [row for row, _ in keyword_index.search(query, depth, rows)]
+        if mode == 'keyword':
+            ranked = keyword_rows
+        else:
+            fused = reciprocal_rank_fusion([[row for row, _ in hits], keyword_rows], k=config.RRF_K)
+            ranked = [row for row, _ in fused]
+        # Report cosine similarity so confidence keeps the same scale in every mode
+        sims = (corpus.matrix[ranked] @ query_vec).tolist() if ranked else []
+        kept = [(row, sim) for row, sim in zip(ranked, sims) if sim >= config.MIN_SIMILARITY_WEAK][:top_k]
+        kept.sort(key=lambda hit: -hit[1])
+        results.append(kept)
     return results
+
+
+def _to_source(faq: Dict[str, Any], similarity: float) -> SourceFAQ:
+    return SourceFAQ(
+        id=faq['id'],
+        question_fr=faq['question_fr'],
+        answer_fr=faq['answer_fr'],
+        question_ar=faq.get('question_ar'),
+        answer_ar=faq.get('answer_ar'),
+        category=faq.get('category'),
+        similarity=similarity,
+    )
+
+
+def retrieve_top_faqs(
+    query: str,
+    language: str = 'fr',
+    top_k: int = 3,
+    category: Optional[str] = None,
+    restrict_language: bool = False,
+) -> List[SourceFAQ]:
+    """Top-k FAQs for `query`.
+
+    `category` and `restrict_language` (only FAQs answered in `language`)
+    narrow the scan to precomputed row subsets before scoring.
+    """
+    corpus = load_corpus()
+
+    with stage('embed'):
+        query_vec = embed_query(query)
+    if not query_vec.any():
+        return []
+
+    with stage('search'):
+        rows = _candidate_rows(corpus, category, language if restrict_language else None)
+        hits = _rank(corpus, [query], query_vec[None, :], top_k, rows)[0]
+
+    return [_to_source(corpus.faqs[idx], similarity) for idx, similarity in hits]
+
+
+def retrieve_top_faqs_batch(
+    queries: List[str],
+    top_k: int = 3,
+    category: Optional[str] = None,
+    language: Optional[str] = None,
+) -> List[List[Tuple[int, float]]]:
+    """Top-k (faq id, similarity) per query, scored with one matrix-matrix product.
+
+    `language` restricts candidates to FAQs answered in that language.
+    """
+    corpus = load_corpus()
+
+    if not queries:
+        return []
+
+    # Rows are normalized (empty queries stay all-zero and fall under the threshold)
+    with stage('embed'):
+        query_matrix = embed_queries(queries)
+    with stage('search'):
+        rows = _candidate_rows(corpus, category, language)
+        hits = _rank(corpus, queries, query_matrix, top_k, rows)
+
+    return [[(corpus.faqs[idx]['id'], similarity) for idx, similarity in row] for row in hits]
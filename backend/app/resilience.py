@@ -0,0 +1,165 @@
+"""Retry, hedging and circuit-breaker helpers for the OpenRouter client.
+
+- `RetryPolicy`: which failures are worth another attempt, and how long to
+  wait (full-jitter exponential backoff, or the upstream `Retry-After`).
+- `LatencyWindow`: rolling latencies of successful calls; a percentile of it
+  is the delay after which a hedged (duplicate) request is sent.
+- `CircuitBreaker`: after N consecutive failures, reject calls for a cool-down
+  so the API answers from the FAQs at once instead of waiting on timeouts.
+"""
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Deque, Optional
+
+import httpx
+
+from .metrics import LLM_BREAKER_STATE
+
+
+class CircuitOpenError(RuntimeError):
+    """The breaker is open: the LLM is not called at all."""
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """`Retry-After` as seconds (delta or HTTP-date form), None if absent or invalid."""
+    value = response.headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    # Timeouts, refused/reset connections, protocol errors
+    return isinstance(exc, httpx.TransportError)
+
+
+class RetryPolicy:
+    def __init__(self, max_retries: int, base_delay: float, max_delay: float) -> None:
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt: int) -> float:
+        # Full jitter: spreads retries of concurrent callers over the whole window
+        return random.uniform(0.0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def delay(self, attempt: int, exc: BaseException) -> Optional[float]:
+        """Seconds to wait before retry number `attempt + 1`, or None to give up."""
+        if attempt >= self.max_retries or not is_retryable(exc):
+            return None
+        if isinstance(exc, httpx.HTTPStatusError):
+            retry_after = retry_after_seconds(exc.response)
+            if retry_after is not None:
+                # Waiting longer than we allow would only hold the request open
+                return retry_after if retry_after <= self.max_delay else None
+        return self.backoff(attempt)
+
+
+class LatencyWindow:
+    """Latencies of the last `size` successful calls."""
+
+    def __init__(self, size: int = 200) -> None:
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(int(len(samples) * q / 100.0), len(samples) - 1)]
+
+
+class CircuitBreaker:
+    """closed -> open after `failure_threshold` consecutive failures;
+    open -> half-open after `reset_timeout` seconds, where one probe call
+    decides between closed (success) and open again (failure). A probe that
+    never reports back (cancelled request) is replaced after `reset_timeout`."""
+
+    CLOSED, HALF_OPEN, OPEN = 'closed', 'half_open', 'open'
+    _GAUGE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, label: str = '') -> None:
+        self.failure_threshold = failure_threshold
+        self.label = label
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _set(self, state: str) -> None:
+        self._state = state
+        LLM_BREAKER_STATE.set(self._GAUGE[state], model=self.label)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def _probing(self, now: float) -> bool:
+        return self._probe_started is not None and now - self._probe_started < self.reset_timeout
+
+    def is_open(self) -> bool:
+        """True while calls would be rejected (cheap check for callers that can degrade)."""
+        if self.failure_threshold <= 0:
+            return False
+        state = self.state
+        return state == self.OPEN or (state == self.HALF_OPEN and self._probing(time.monotonic()))
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go through now."""
+        if self.failure_threshold <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if self._state == self.OPEN:
+                if now - self._opened_at < self.reset_timeout:
+                    raise CircuitOpenError("Circuit ouvert : LLM temporairement indisponible.")
+                self._set(self.HALF_OPEN)
+            if self._state == self.HALF_OPEN:
+                if self._probing(now):
+                    raise CircuitOpenError("Circuit ouvert : LLM temporairement indisponible.")
+                self._probe_started = now
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probe_started = None
+            if self._state != self.CLOSED:
+                self._set(self.CLOSED)
+
+    def record_failure(self) -> None:
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            self._failures += 1
+            self._probe_started = None
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._set(self.OPEN)
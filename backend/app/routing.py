@@ -0,0 +1,166 @@
+"""Route LLM calls across an ordered pool of OpenRouter models.
+
+Each model keeps its own concurrency limit, circuit breaker and rolling
+statistics (latency of recent successes, error rate of recent calls). A
+request goes to the healthy model with the lowest expected latency; models
+without enough samples yet are tried first, in configured order, so a new
+or recovered model gets measured. A small share of traffic (`explore`) goes
+to a random healthy model to keep the other models' statistics fresh.
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+from collections import deque
+from typing import Any, Collection, Deque, Dict, List, Optional, Sequence, Tuple
+
+from .metrics import LLM_MODEL_REQUESTS, LLM_ROUTED
+from .resilience import CircuitBreaker, CircuitOpenError, LatencyWindow
+
+
+def parse_models(value: str, default_concurrency: int) -> List[Tuple[str, int]]:
+    """'model-a=8,model-b' -> [('model-a', 8), ('model-b', default_concurrency)].
+
+    Model ids may contain ':' (e.g. ':free'), so the limit uses '='.
+    """
+    models = []
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, limit = item.rpartition('=')
+        if sep and limit.isdigit():
+            models.append((name.strip(), int(limit)))
+        else:
+            models.append((item, default_concurrency))
+    return models
+
+
+class ModelRoute:
+    def __init__(self, name: str, concurrency: int, failure_threshold: int, reset_timeout: float,
+                 window: int = 100) -> None:
+        self.name = name
+        self.concurrency = concurrency
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout, label=name)
+        self.latency = LatencyWindow(window)
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._slots: Optional[asyncio.Semaphore] = None
+        # Calls routed here and not finished yet, including those still queued
+        # for a slot: picks happen before the wait, so `slots` alone lags behind
+        self.active = 0
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        return self._slots
+
+    def busy(self) -> bool:
+        return self.active >= self.concurrency
+
+    def tripped(self) -> bool:
+        """Breaker opened while this call was queued: better to fall back than to call."""
+        return self.breaker.state == CircuitBreaker.OPEN
+
+    def release(self) -> None:
+        """End of a call that `ModelRouter.pick` routed here."""
+        with self._lock:
+            self.active -= 1
+
+    def error_rate(self) -> float:
+        with self._lock:
+            return self._outcomes.count(False) / len(self._outcomes) if self._outcomes else 0.0
+
+    def expected_latency(self, min_samples: int) -> Optional[float]:
+        """Median success latency inflated by the error rate; None until measured."""
+        with self._lock:
+            calls = len(self._outcomes)
+        if calls < min_samples:
+            return None
+        p50 = self.latency.percentile(50)
+        if p50 is None:
+            # Only failures so far
+            return float('inf')
+        return p50 / (1.0 - min(self.error_rate(), 0.9))
+
+    def record(self, ok: bool, seconds: Optional[float] = None) -> None:
+        with self._lock:
+            self._outcomes.append(ok)
+        if ok:
+            if seconds is not None:
+                self.latency.observe(seconds)
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+        LLM_MODEL_REQUESTS.inc(model=self.name, outcome="ok" if ok else "error")
+
+    def stats(self) -> Dict[str, Any]:
+        p50, p95 = self.latency.percentile(50), self.latency.percentile(95)
+        return {
+            "model": self.name,
+            "state": self.breaker.state,
+            "concurrency": self.concurrency,
+            "active": self.active,
+            "samples": len(self.latency),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "error_rate": round(self.error_rate(), 4),
+        }
+
+
+class ModelRouter:
+    def __init__(self, models: Sequence[Tuple[str, int]], failure_threshold: int, reset_timeout: float,
+                 min_samples: int = 5, explore: float = 0.0) -> None:
+        if not models:
+            raise ValueError("at least one model is required")
+        self.routes = [ModelRoute(name, limit, failure_threshold, reset_timeout) for name, limit in models]
+        self.min_samples = min_samples
+        self.explore = explore
+
+    def ranked(self, exclude: Collection[str] = ()) -> List[ModelRoute]:
+        """Healthy routes, best first: unmeasured ones in configured order, then by expected latency."""
+        healthy = [r for r in self.routes if r.name not in exclude and not r.breaker.is_open()]
+        unmeasured = [r for r in healthy if r.expected_latency(self.min_samples) is None]
+        measured = sorted(
+            (r for r in healthy if r.expected_latency(self.min_samples) is not None),
+            key=lambda r: r.expected_latency(self.min_samples) or 0.0,
+        )
+        return unmeasured + measured
+
+    def _expected_wait(self, route: ModelRoute) -> float:
+        # Queue depth in waves of `concurrency` calls, times the expected latency;
+        # unmeasured routes count as free so they get measured
+        waves = route.active // max(route.concurrency, 1) + 1
+        return waves * (route.expected_latency(self.min_samples) or 0.0)
+
+    def is_open(self) -> bool:
+        """True when every model's breaker rejects calls."""
+        return all(r.breaker.is_open() for r in self.routes)
+
+    def pick(self, exclude: Collection[str] = (), reason: str = "primary") -> ModelRoute:
+        """Best route that has a free slot, else the one with the shortest expected wait.
+
+        The caller must call `route.release()` once the call is over. Raises
+        CircuitOpenError when no model outside `exclude` is healthy.
+        """
+        ranked = self.ranked(exclude)
+        if not ranked:
+            raise CircuitOpenError("Circuit ouvert : aucun modèle LLM disponible.")
+        if self.explore > 0 and len(ranked) > 1 and random.random() < self.explore:
+            route, reason = random.choice(ranked[1:]), "explore"
+        else:
+            route = next((r for r in ranked if not r.busy()), None)
+            if route is None:
+                route = min(ranked, key=self._expected_wait)
+            if route is not ranked[0] and reason == "primary":
+                reason = "busy"
+        with route._lock:
+            route.active += 1
+        LLM_ROUTED.inc(model=route.name, reason=reason)
+        return route
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [r.stats() for r in self.routes]
@@ -0,0 +1,87 @@
+"""Corpus versions and deltas for offline clients (GET /api/corpus/delta).
+
+A corpus version is a short hash of every (FAQ id, FAQ content hash) pair.
+process_all_data.py appends each version it builds to corpus_history.json
+(id -> content hash only, so the file stays small); the backend also records
+every corpus it loads. Diffing a client's version against the current one
+then only needs those hash maps, not the old FAQ contents.
+
+Only depends on the standard library so the data pipeline can import it.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .artifacts import atomic_write
+
+
+def faq_hash(faq: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(faq, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def corpus_version(hashes: Dict[int, str]) -> str:
+    h = hashlib.sha256()
+    for faq_id in sorted(hashes):
+        h.update(f"{faq_id}:{hashes[faq_id]}\n".encode('utf-8'))
+    return h.hexdigest()[:16]
+
+
+def diff(old: Dict[int, str], new: Dict[int, str]) -> Tuple[List[int], List[int], List[int]]:
+    """(added, updated, removed) FAQ ids going from `old` to `new`."""
+    added = sorted(i for i in new if i not in old)
+    updated = sorted(i for i, h in new.items() if i in old and old[i] != h)
+    removed = sorted(i for i in old if i not in new)
+    return added, updated, removed
+
+
+class CorpusHistory:
+    """Bounded, thread-safe map of version -> {faq id: content hash}, oldest first."""
+
+    def __init__(self, max_versions: int = 20) -> None:
+        self.max_versions = max_versions
+        self._versions: "OrderedDict[str, Dict[int, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, version: str, hashes: Dict[int, str]) -> None:
+        with self._lock:
+            self._versions[version] = dict(hashes)
+            self._versions.move_to_end(version)
+            while len(self._versions) > self.max_versions:
+                self._versions.popitem(last=False)
+
+    def get(self, version: str) -> Optional[Dict[int, str]]:
+        with self._lock:
+            return self._versions.get(version)
+
+    def versions(self) -> List[str]:
+        with self._lock:
+            return list(self._versions)
+
+    @classmethod
+    def load(cls, path: Path, max_versions: int = 20) -> "CorpusHistory":
+        """Read corpus_history.json; a missing or corrupt file gives an empty history."""
+        history = cls(max_versions)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for entry in data.get('versions', []):
+                history.record(entry['version'], {int(i): h for i, h in entry['faqs'].items()})
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+        return history
+
+    def save(self, path: Path) -> None:
+        with self._lock:
+            data = {
+                "versions": [
+                    {"version": v, "faqs": {str(i): h for i, h in sorted(hashes.items())}}
+                    for v, hashes in self._versions.items()
+                ]
+            }
+        payload = json.dumps(data, separators=(',', ':')).encode('utf-8')
+        atomic_write(path, lambda f: f.write(payload))
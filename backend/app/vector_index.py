@@ -0,0 +1,195 @@
+"""Vector index backends behind rag.py.
+
+- ``FlatIndex``: exact brute-force cosine over the whole matrix.
+- ``IVFIndex``: pure-NumPy inverted-file index. Rows are clustered with
+  spherical k-means into ``nlist`` lists; a query only scans the rows of its
+  ``nprobe`` closest lists. Raising ``nprobe`` trades speed for recall.
+
+Both return ``(rows, scores)`` arrays of shape ``(queries, k)`` sorted by
+decreasing score, padded with ``-1`` / ``-inf`` when fewer candidates exist.
+"""
+from __future__ import annotations
+
+import zipfile
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .artifacts import atomic_write
+
+
+# Rows scored per block when assigning the corpus to lists (bounds temp memory)
+_ASSIGN_BLOCK = 16384
+
+
+def select_top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Row-wise top-k of a (q, n) score matrix: O(n) partition, then sort k."""
+    q, n = scores.shape
+    if k <= 0 or n == 0:
+        return np.full((q, max(k, 0)), -1, dtype=np.int64), np.full((q, max(k, 0)), -np.inf, dtype=np.float32)
+
+    kk = min(k, n)
+    top = np.argpartition(-scores, kk - 1, axis=1)[:, :kk]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind='stable')
+    top = np.take_along_axis(top, order, axis=1)
+    top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+    if kk < k:
+        top = np.pad(top, ((0, 0), (0, k - kk)), constant_values=-1)
+        top_scores = np.pad(top_scores, ((0, 0), (0, k - kk)), constant_values=-np.inf)
+    return top, top_scores
+
+
+class FlatIndex:
+    name = 'flat'
+
+    def __init__(self, matrix: np.ndarray) -> None:
+        self.matrix = matrix
+
+    def search(self, queries: np.ndarray, k: int, rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        # cosine similarity: matrix rows are already normalized
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        top, top_scores = select_top_k(queries @ matrix.T, k)
+        if rows is not None and rows.size:
+            top = np.where(top >= 0, rows[np.maximum(top, 0)], -1)
+        return top, top_scores
+
+
+class IVFIndex:
+    name = 'ivf'
+
+    def __init__(
+        self,
+        matrix: np.ndarray,
+        centroids: np.ndarray,
+        list_offsets: np.ndarray,
+        list_rows: np.ndarray,
+        nprobe: int,
+    ) -> None:
+        self.matrix = matrix
+        self.centroids = centroids
+        # CSR layout: rows of list i are list_rows[list_offsets[i]:list_offsets[i + 1]]
+        self.list_offsets = list_offsets
+        self.list_rows = list_rows
+        self.nprobe = nprobe
+
+    @property
+    def nlist(self) -> int:
+        return int(self.centroids.shape[0])
+
+    @classmethod
+    def build(
+        cls,
+        matrix: np.ndarray,
+        nlist: int = 0,
+        nprobe: int = 8,
+        iterations: int = 10,
+        sample_size: int = 65536,
+        seed: int = 0,
+    ) -> "IVFIndex":
+        n = matrix.shape[0]
+        if nlist <= 0:
+            nlist = int(np.sqrt(n)) or 1
+        nlist = max(1, min(nlist, n))
+
+        rng = np.random.default_rng(seed)
+        sample_idx = rng.choice(n, size=min(n, sample_size), replace=False) if n else np.empty(0, dtype=np.int64)
+        sample = np.asarray(matrix[np.sort(sample_idx)], dtype=np.float32)
+        centroids = _spherical_kmeans(sample, nlist, iterations, rng)
+        return cls.from_centroids(matrix, centroids, nprobe)
+
+    @classmethod
+    def from_centroids(cls, matrix: np.ndarray, centroids: np.ndarray, nprobe: int = 8) -> "IVFIndex":
+        """Re-assign a (changed) matrix to already trained lists, skipping k-means."""
+        nlist = centroids.shape[0]
+        assignments = _assign(matrix, centroids)
+        list_rows = np.argsort(assignments, kind='stable').astype(np.int64)
+        counts = np.bincount(assignments, minlength=nlist)
+        list_offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        return cls(matrix, centroids, list_offsets, list_rows, nprobe)
+
+    def search(self, queries: np.ndarray, k: int, rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        nq = queries.shape[0]
+        out_rows = np.full((nq, k), -1, dtype=np.int64)
+        out_scores = np.full((nq, k), -np.inf, dtype=np.float32)
+        if nq == 0 or k <= 0 or self.matrix.shape[0] == 0:
+            return out_rows, out_scores
+
+        allowed: Optional[np.ndarray] = None
+        if rows is not None:
+            allowed = np.zeros(self.matrix.shape[0], dtype=bool)
+            allowed[rows] = True
+
+        nprobe = min(self.nprobe, self.nlist)
+        probes, _ = select_top_k(queries @ self.centroids.T, nprobe)
+
+        for qi in range(nq):
+            candidates = np.concatenate([
+                self.list_rows[self.list_offsets[li]:self.list_offsets[li + 1]] for li in probes[qi]
+            ])
+            if allowed is not None:
+                candidates = candidates[allowed[candidates]]
+            if candidates.size == 0:
+                continue
+            top, top_scores = select_top_k((self.matrix[candidates] @ queries[qi])[None, :], k)
+            out_rows[qi] = np.where(top[0] >= 0, candidates[np.maximum(top[0], 0)], -1)
+            out_scores[qi] = top_scores[0]
+        return out_rows, out_scores
+
+    def save(self, path: Path, matrix_checksum: str) -> None:
+        # Unique temp file per writer: several workers may save at once
+        atomic_write(Path(path), lambda fh: np.savez(
+            fh,
+            centroids=self.centroids,
+            list_offsets=self.list_offsets,
+            list_rows=self.list_rows,
+            count=np.int64(self.matrix.shape[0]),
+            matrix_checksum=np.array(matrix_checksum),
+        ))
+
+    @classmethod
+    def load(cls, path: Path, matrix: np.ndarray, matrix_checksum: str, nprobe: int) -> Optional["IVFIndex"]:
+        """Load a persisted index, or None if missing or built for another matrix."""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data['count']) != matrix.shape[0] or str(data['matrix_checksum']) != matrix_checksum:
+                    return None
+                return cls(matrix, data['centroids'], data['list_offsets'], data['list_rows'], nprobe)
+        except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+            # Missing, truncated or corrupt: rebuild
+            return None
+
+
+def _normalize_rows(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    return np.divide(x, norms, out=np.zeros_like(x), where=norms > 0)
+
+
+def _assign(matrix: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    out = np.empty(matrix.shape[0], dtype=np.int64)
+    for start in range(0, matrix.shape[0], _ASSIGN_BLOCK):
+        block = np.asarray(matrix[start:start + _ASSIGN_BLOCK], dtype=np.float32)
+        out[start:start + _ASSIGN_BLOCK] = np.argmax(block @ centroids.T, axis=1)
+    return out
+
+
+def _spherical_kmeans(x: np.ndarray, k: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    centroids = x[rng.choice(x.shape[0], size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(x @ centroids.T, axis=1)
+        order = np.argsort(assignments, kind='stable')
+        counts = np.bincount(assignments, minlength=k)
+        nonempty = np.flatnonzero(counts)
+        starts = np.concatenate(([0], np.cumsum(counts)))[nonempty]
+        sums = np.add.reduceat(x[order], starts, axis=0)
+
+        new = np.empty_like(centroids)
+        new[nonempty] = _normalize_rows(sums)
+        # Re-seed empty lists with random points so every list stays useful
+        empty = np.flatnonzero(counts == 0)
+        if empty.size:
+            new[empty] = x[rng.choice(x.shape[0], size=empty.size, replace=False)]
+        centroids = new
+    return centroids.astype(np.float32)
@@ -0,0 +1,135 @@
+"""Micro-benchmarks of the RAG hot path over synthetic corpora of growing size.
+
+For each corpus size: write faqs.json plus the binary artifact to a temporary
+directory, time `reload_corpus` (what `load_corpus` does on startup), then
+time `retrieve_top_faqs` per query. `hash_string` and `create_embedding` do
+not depend on the corpus size and are measured once, as is `embed_query` on
+repeated questions (served from the query embedding cache).
+
+    cd backend && python -m benchmarks.bench_core --faqs 1000 10000 100000 --output core.json
+    cd backend && python -m benchmarks.bench_core --faqs 1000000 --queries 200
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app import config, rag
+from app.artifacts import sha256_bytes, write_embedding_artifact
+from app.embedding import MODEL_NAME, create_embedding, embed_batch, faq_text, hash_string
+
+from .report import latency_summary, peak_rss_mb, rss_mb, write_report
+from .synthetic import synthetic_faqs, synthetic_queries, synthetic_texts
+
+# Rows embedded at a time when writing the artifact (bounds temp memory)
+_EMBED_BLOCK = 50000
+
+
+def _per_call_us(fn, args: List[Any]) -> float:
+    start = time.perf_counter()
+    for a in args:
+        fn(a)
+    return round((time.perf_counter() - start) / len(args) * 1e6, 3)
+
+
+def _timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def _write_corpus(directory: Path, faqs: List[Dict[str, Any]]) -> None:
+    faqs_bytes = json.dumps({"faqs": faqs}, ensure_ascii=False).encode("utf-8")
+    (directory / "faqs.json").write_bytes(faqs_bytes)
+    matrix = np.vstack([
+        embed_batch([faq_text(f) for f in faqs[i:i + _EMBED_BLOCK]]).astype(np.float32)
+        for i in range(0, len(faqs), _EMBED_BLOCK)
+    ])
+    write_embedding_artifact(
+        directory / "embeddings.f32.npy",
+        directory / "embeddings.meta.json",
+        ids=[f["id"] for f in faqs],
+        matrix=matrix,
+        model=MODEL_NAME,
+        source_checksum=sha256_bytes(faqs_bytes),
+    )
+
+
+def _bench_size(n: int, queries: int, top_k: int) -> Dict[str, Any]:
+    faqs = synthetic_faqs(n)
+    query_texts = synthetic_queries(faqs, queries)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        start = time.perf_counter()
+        _write_corpus(directory, faqs)
+        build_s = time.perf_counter() - start
+        del faqs
+
+        config.FAQS_PATH = directory / "faqs.json"
+        config.EMBEDDINGS_MATRIX_PATH = directory / "embeddings.f32.npy"
+        config.EMBEDDINGS_META_PATH = directory / "embeddings.meta.json"
+        config.RELOADED_MATRIX_PATH = directory / "cache" / "embeddings.f32.npy"
+        config.RELOADED_META_PATH = directory / "cache" / "embeddings.meta.json"
+        config.CORPUS_HISTORY_PATH = directory / "corpus_history.json"
+        rag._corpus = None
+
+        rss_before = rss_mb()
+        start = time.perf_counter()
+        stats = rag.reload_corpus(force=True)
+        load_s = time.perf_counter() - start
+        rss_after = rss_mb()
+
+        rag.retrieve_top_faqs(query_texts[0], top_k=top_k)  # warm-up
+        latencies = []
+        for q in query_texts:
+            start = time.perf_counter()
+            rag.retrieve_top_faqs(q, top_k=top_k)
+            latencies.append(time.perf_counter() - start)
+        rag._corpus = None
+
+    return {
+        "faqs": n,
+        "artifact_build_s": round(build_s, 3),
+        "load_corpus_s": round(load_s, 4),
+        "load_reembedded": stats.get("reembedded", 0),
+        "corpus_rss_mb": round(rss_after - rss_before, 1),
+        "retrieve_top_faqs": latency_summary(latencies),
+        "retrieve_qps": round(len(latencies) / sum(latencies), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--faqs", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    texts = synthetic_texts(2000, 48)
+    tokens = [tok for text in texts[:200] for tok in text.split()]
+    results: Dict[str, Any] = {
+        "hash_string_us": _per_call_us(hash_string, tokens),
+        "create_embedding_us": _per_call_us(create_embedding, texts),
+        "embed_batch_us_per_text": round(_timed(lambda: embed_batch(texts)) / len(texts) * 1e6, 3),
+        # First call embeds and caches, the repeats are lookups
+        "embed_query_first_us": _per_call_us(rag.embed_query, texts[:200]),
+        "embed_query_cached_us": _per_call_us(rag.embed_query, texts[:200] * 5),
+        "embedding_caches": rag.embedding_cache_stats(),
+        "retrieval_mode": config.RETRIEVAL_MODE,
+        "vector_index": config.VECTOR_INDEX,
+        "corpora": [_bench_size(n, args.queries, args.top_k) for n in args.faqs],
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    write_report("core", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Per-text cost of the scalar `create_embedding` loop vs `embed_batch`.
+
+    cd backend && python -m benchmarks.bench_embedding --texts 5000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from app.embedding import create_embedding, embed_batch
+
+from .report import write_report
+from .synthetic import synthetic_texts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--texts", type=int, default=5000)
+    parser.add_argument("--words", type=int, default=60)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    texts = synthetic_texts(args.texts, args.words)
+
+    start = time.perf_counter()
+    scalar = np.stack([create_embedding(t) for t in texts])
+    scalar_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = embed_batch(texts)
+    batch_s = time.perf_counter() - start
+
+    write_report("embedding", {
+        "texts": args.texts,
+        "words_per_text": args.words,
+        "scalar_us_per_text": round(scalar_s / args.texts * 1e6, 2),
+        "batch_us_per_text": round(batch_s / args.texts * 1e6, 2),
+        "speedup": round(scalar_s / batch_s, 1),
+        "max_abs_diff": float(np.abs(scalar - batch).max()),
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Size and parse time of the JSON corpus files vs the compact formats.
+
+Reads whatever process_all_data.py wrote (default: frontend/public/data):
+
+    cd backend && python -m benchmarks.bench_formats --repeat 20
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app import config
+from app.artifacts import dequantize_int8, load_embedding_artifact, scale_path_for
+
+from .report import require_generated_corpus, write_report
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _size(path: Path) -> int | None:
+    return os.path.getsize(path) if path.exists() else None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data-dir", default=str(config.FRONTEND_DATA_DIR))
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+    data = Path(args.data_dir)
+    require_generated_corpus(data / "faqs.json", data / "embeddings.f32.npy", data / "embeddings.meta.json")
+
+    def read_json(name: str):
+        return lambda: json.loads((data / name).read_bytes())
+
+    def read_json_gz(name: str):
+        return lambda: json.loads(gzip.decompress((data / name).read_bytes()))
+
+    def read_npy(name: str):
+        return lambda: np.array(np.load(data / name), dtype=np.float32)
+
+    def read_int8():
+        return dequantize_int8(np.load(data / "embeddings.i8.npy"), np.load(scale_path_for(data / "embeddings.i8.npy")))
+
+    cases = {
+        "faqs.json": read_json("faqs.json"),
+        "faqs.min.json": read_json("faqs.min.json"),
+        "faqs.min.json.gz": read_json_gz("faqs.min.json.gz"),
+        "embeddings.json": read_json("embeddings.json"),
+        "embeddings.json.gz": read_json_gz("embeddings.json.gz"),
+        "embeddings.f32.npy": read_npy("embeddings.f32.npy"),
+        "embeddings.f16.npy": read_npy("embeddings.f16.npy"),
+        "embeddings.i8.npy": read_int8,
+    }
+
+    report = {}
+    for name, fn in cases.items():
+        path = data / name
+        if not path.exists():
+            continue
+        report[name] = {
+            "bytes": _size(path),
+            "gzip_bytes": _size(data / (name + ".gz")),
+            "brotli_bytes": _size(data / (name + ".br")),
+            "parse_ms": round(_best_of(fn, args.repeat) * 1000, 3),
+        }
+
+    # Quantization error against the float32 reference
+    _, _, reference = load_embedding_artifact(data / "embeddings.f32.npy", data / "embeddings.meta.json")
+    for dtype, names in (("float16", ("embeddings.f16.npy", "embeddings.f16.meta.json")),
+                         ("int8", ("embeddings.i8.npy", "embeddings.i8.meta.json"))):
+        if (data / names[0]).exists():
+            _, _, matrix = load_embedding_artifact(data / names[0], data / names[1])
+            cos = np.sum(matrix * reference, axis=1) / np.maximum(np.linalg.norm(matrix, axis=1), 1e-12)
+            report[names[0]]["min_cosine_to_f32"] = round(float(cos.min()), 6)
+
+    write_report("formats", report, args.output)
+
+
+if __name__ == "__main__":
+    main()
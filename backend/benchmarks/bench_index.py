@@ -0,0 +1,78 @@
+"""Recall@k vs latency of the flat and IVF vector index backends.
+
+    cd backend && python -m benchmarks.bench_index --faqs 200000 --nprobe 1 4 16 64
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from app.embedding import embed_batch, faq_text
+from app.vector_index import FlatIndex, IVFIndex
+
+from .report import write_report
+from .synthetic import synthetic_faqs, synthetic_queries
+
+
+def _timed_search(index, queries: np.ndarray, k: int):
+    latencies = []
+    scores = []
+    for q in queries:
+        start = time.perf_counter()
+        _, top_scores = index.search(q[None, :], k)
+        latencies.append(time.perf_counter() - start)
+        scores.append(top_scores[0])
+    return np.array(scores), np.array(latencies)
+
+
+def _recall(found: np.ndarray, truth: np.ndarray) -> float:
+    """Tie-aware recall@k: a hit is any result scoring at least the exact k-th score."""
+    kth = truth[:, -1:] - 1e-6
+    valid = np.isfinite(truth)
+    return float(((found >= kth) & valid).sum() / valid.sum()) if valid.any() else 1.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--faqs", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--nlist", type=int, default=0)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 64])
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    faqs = synthetic_faqs(args.faqs)
+    matrix = embed_batch([faq_text(f) for f in faqs]).astype(np.float32)
+    queries = embed_batch(synthetic_queries(faqs, args.queries)).astype(np.float32)
+
+    flat_scores, flat_lat = _timed_search(FlatIndex(matrix), queries, args.top_k)
+    report = {
+        "faqs": args.faqs,
+        "queries": args.queries,
+        "top_k": args.top_k,
+        "flat": {"p50_ms": round(float(np.median(flat_lat)) * 1e3, 3), "recall": 1.0},
+        "ivf": [],
+    }
+
+    start = time.perf_counter()
+    ivf = IVFIndex.build(matrix, nlist=args.nlist)
+    report["ivf_build_s"] = round(time.perf_counter() - start, 2)
+    report["ivf_nlist"] = ivf.nlist
+
+    for nprobe in args.nprobe:
+        ivf.nprobe = nprobe
+        found, lat = _timed_search(ivf, queries, args.top_k)
+        report["ivf"].append({
+            "nprobe": nprobe,
+            "p50_ms": round(float(np.median(lat)) * 1e3, 3),
+            "recall": round(_recall(found, flat_scores), 4),
+        })
+
+    write_report("index", report, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""BM25 postings lookups vs a dense cosine scan, as the corpus grows.
+
+    cd backend && python -m benchmarks.bench_keyword --faqs 1000 10000 100000
+
+Also reports `recall_vs_dense`: the share of the dense top-k (above the weak
+similarity threshold) that BM25 finds too, so a faster keyword path that
+silently returns different FAQs shows up in the report.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from app import config
+from app.embedding import embed_batch, faq_text
+from app.keyword_index import BM25Index
+from app.vector_index import FlatIndex
+
+from .report import write_report
+from .synthetic import synthetic_faqs, synthetic_queries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--faqs", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = []
+    for n in args.faqs:
+        faqs = synthetic_faqs(n)
+        queries = synthetic_queries(faqs, args.queries)
+
+        start = time.perf_counter()
+        bm25 = BM25Index.from_faqs(faqs)
+        build_s = time.perf_counter() - start
+        flat = FlatIndex(embed_batch([faq_text(f) for f in faqs]).astype(np.float32))
+        query_matrix = embed_batch(queries).astype(np.float32)
+
+        start = time.perf_counter()
+        bm25_hits = [bm25.search(q, args.top_k) for q in queries]
+        bm25_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        dense_hits = [flat.search(qv[None, :], args.top_k) for qv in query_matrix]
+        dense_s = time.perf_counter() - start
+
+        found = expected = 0
+        for keyword, (rows, scores) in zip(bm25_hits, dense_hits):
+            dense = {row for row, score in zip(rows[0].tolist(), scores[0].tolist())
+                     if score >= config.MIN_SIMILARITY_WEAK}
+            found += len(dense & {row for row, _ in keyword})
+            expected += len(dense)
+
+        report.append({
+            "faqs": n,
+            "bm25_build_s": round(build_s, 2),
+            "bm25_ms_per_query": round(bm25_s / args.queries * 1e3, 3),
+            "dense_ms_per_query": round(dense_s / args.queries * 1e3, 3),
+            "recall_vs_dense": round(found / expected, 3) if expected else None,
+        })
+
+    write_report("keyword", report, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Compare the blocking and pooled async LLM paths under concurrent load.
+
+Starts ``benchmarks.fake_openrouter`` on a local port and fires ``--concurrency``
+simultaneous generations through each path, the way concurrent ``/api/chat``
+requests would hit them inside one uvicorn worker.
+
+    cd backend && python -m benchmarks.bench_llm_concurrency --concurrency 32
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+
+import httpx
+
+from app.llm_client import OpenRouterClient
+from app.models import SourceFAQ
+
+from .report import write_report
+
+
+FAQS = [SourceFAQ(id=1, question_fr="Quand a lieu la Nuit de l'Info ?", answer_fr="Début décembre.")]
+
+
+def _wait_ready(base: str, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{base}/docs", timeout=0.5)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError("fake OpenRouter server did not start")
+
+
+async def _run_blocking(client: OpenRouterClient, n: int) -> float:
+    async def one() -> str:
+        # What chat() did before: a sync HTTP call inside a coroutine
+        return client.generate("Quand ?", "fr", FAQS)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(n)))
+    return time.perf_counter() - start
+
+
+async def _run_async(client: OpenRouterClient, n: int) -> float:
+    await client.startup()
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(client.agenerate("Quand ?", "fr", FAQS) for _ in range(n)))
+        return time.perf_counter() - start
+    finally:
+        await client.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    base = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_openrouter", "--port", str(args.port),
+         "--latency-ms", str(args.latency_ms)],
+    )
+    try:
+        _wait_ready(base)
+        client = OpenRouterClient()
+        client.api_key = "bench"
+        client.base_url = f"{base}/api/v1"
+
+        results = {}
+        for name, runner in (("blocking", _run_blocking), ("async_pool", _run_async)):
+            elapsed = asyncio.run(runner(client, args.concurrency))
+            results[name] = {
+                "requests": args.concurrency,
+                "wall_s": round(elapsed, 3),
+                "throughput_rps": round(args.concurrency / elapsed, 1),
+            }
+        write_report("llm_concurrency", results, args.output)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
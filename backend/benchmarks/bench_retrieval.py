@@ -0,0 +1,53 @@
+"""Queries/second of per-query `retrieve_top_faqs` vs `retrieve_top_faqs_batch`.
+
+    cd backend && python -m benchmarks.bench_retrieval --faqs 5000 --queries 1000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from app import rag
+
+from .report import write_report
+from .synthetic import CATEGORIES, install_corpus, synthetic_faqs, synthetic_queries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--faqs", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    faqs = synthetic_faqs(args.faqs)
+    install_corpus(faqs)
+    queries = synthetic_queries(faqs, args.queries)
+
+    start = time.perf_counter()
+    for q in queries:
+        rag.retrieve_top_faqs(q, top_k=args.top_k)
+    single_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for q in queries:
+        rag.retrieve_top_faqs(q, top_k=args.top_k, category=CATEGORIES[0])
+    category_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rag.retrieve_top_faqs_batch(queries, top_k=args.top_k)
+    batch_s = time.perf_counter() - start
+
+    write_report("retrieval", {
+        "faqs": args.faqs,
+        "queries": args.queries,
+        "single_qps": round(args.queries / single_s, 1),
+        "single_category_filtered_qps": round(args.queries / category_s, 1),
+        "batch_qps": round(args.queries / batch_s, 1),
+        "speedup": round(single_s / batch_s, 1),
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
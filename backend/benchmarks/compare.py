@@ -0,0 +1,85 @@
+"""Diff two benchmark JSON reports and flag regressions.
+
+    cd backend && python -m benchmarks.compare baseline.json candidate.json --tolerance 0.10
+
+Numeric leaves are matched by path. Latency, time and memory metrics are
+better when lower; throughput (qps/rps) and recall are better when higher.
+Exits with status 1 if any metric regressed by more than the tolerance.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+HIGHER_IS_BETTER = ("qps", "rps", "throughput", "recall", "speedup", "hit_ratio")
+LOWER_IS_BETTER = ("_ms", "_s", "_us", "_mb", "us_per_text", "error_rate", "degraded_rate")
+
+
+def _leaves(value: Any, path: str = "") -> Iterator[Tuple[str, float]]:
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _leaves(item, f"{path}.{key}" if path else key)
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            # Label list entries by their size/knob when they have one (e.g. corpora[faqs=1000])
+            label = next((f"{k}={item[k]}" for k in ("faqs", "nprobe") if isinstance(item, dict) and k in item), str(i))
+            yield from _leaves(item, f"{path}[{label}]")
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield path, float(value)
+
+
+def _direction(path: str) -> Optional[int]:
+    """+1 if higher is better, -1 if lower is better, None for other numbers."""
+    name = path.rsplit(".", 1)[-1]
+    if any(token in name for token in HIGHER_IS_BETTER):
+        return 1
+    if any(name.endswith(token) or token in name for token in LOWER_IS_BETTER):
+        return -1
+    return None
+
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any], tolerance: float) -> Dict[str, Any]:
+    old = dict(_leaves(baseline.get("results", baseline)))
+    new = dict(_leaves(candidate.get("results", candidate)))
+    rows = []
+    regressions = 0
+    for path in sorted(old.keys() & new.keys()):
+        direction = _direction(path)
+        if direction is None or old[path] == 0:
+            continue
+        change = (new[path] - old[path]) / abs(old[path])
+        regressed = direction * change < -tolerance
+        regressions += regressed
+        rows.append({
+            "metric": path,
+            "baseline": old[path],
+            "candidate": new[path],
+            "change_pct": round(change * 100, 1),
+            "status": "REGRESSION" if regressed else ("improved" if direction * change > tolerance else "same"),
+        })
+    return {"tolerance": tolerance, "regressions": regressions, "metrics": rows}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="relative change allowed (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.candidate, "r", encoding="utf-8") as f:
+        candidate = json.load(f)
+
+    result = compare(baseline, candidate, args.tolerance)
+    for row in result["metrics"]:
+        print(f"{row['status']:<11} {row['metric']:<60} {row['baseline']:>12g} -> {row['candidate']:<12g} ({row['change_pct']:+.1f}%)")
+    print(f"\n{result['regressions']} regression(s) beyond {args.tolerance:.0%}")
+    sys.exit(1 if result["regressions"] else 0)
+
+
+if __name__ == "__main__":
+    main()
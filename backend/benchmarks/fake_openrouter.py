@@ -0,0 +1,105 @@
+"""Local stand-in for the OpenRouter chat completions API.
+
+Run from ``backend/``::
+
+    python -m benchmarks.fake_openrouter --port 8099 --latency-ms 300
+
+then point the backend at it with ``OPENROUTER_API_BASE=http://127.0.0.1:8099/api/v1``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+from typing import Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+ANSWER = "Réponse simulée par le faux serveur OpenRouter pour les tests de charge."
+# OpenAI-style token accounting, reported like OpenRouter does
+USAGE = {"prompt_tokens": 400, "completion_tokens": len(ANSWER.split(" ")), "total_tokens": 400 + len(ANSWER.split(" "))}
+
+
+def create_app(
+    latency_ms: float = 300.0,
+    jitter_ms: float = 0.0,
+    error_rate: float = 0.0,
+    token_ms: float = 20.0,
+    retry_after: Optional[float] = None,
+    model_latency_ms: Optional[Dict[str, float]] = None,
+    model_error_rate: Optional[Dict[str, float]] = None,
+) -> FastAPI:
+    """`model_latency_ms` / `model_error_rate` override the defaults per requested model."""
+    model_latency_ms = model_latency_ms or {}
+    model_error_rate = model_error_rate or {}
+    app = FastAPI(title="Fake OpenRouter")
+
+    async def stream_tokens(model: str):
+        for word in ANSWER.split(" "):
+            chunk = {"model": model, "choices": [{"index": 0, "delta": {"content": word + " "}}]}
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(token_ms / 1000.0)
+        yield f"data: {json.dumps({'model': model, 'choices': [], 'usage': USAGE})}\n\n"
+        yield "data: [DONE]\n\n"
+
+    @app.post("/api/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "fake")
+        delay = model_latency_ms.get(model, latency_ms) + random.uniform(-jitter_ms, jitter_ms)
+        await asyncio.sleep(max(delay, 0.0) / 1000.0)
+
+        rate = model_error_rate.get(model, error_rate)
+        if rate and random.random() < rate:
+            headers = {"Retry-After": f"{retry_after:g}"} if retry_after is not None else None
+            return JSONResponse({"error": {"message": "fake upstream error"}}, status_code=503, headers=headers)
+
+        if body.get("stream"):
+            return StreamingResponse(stream_tokens(model), media_type="text/event-stream")
+
+        # Non-streaming callers wait for the whole "generation"
+        await asyncio.sleep(len(ANSWER.split(" ")) * token_ms / 1000.0)
+        return {
+            "id": "fake-completion",
+            "model": model,
+            "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": ANSWER}}
+            ],
+            "usage": USAGE,
+        }
+
+    return app
+
+
+def _per_model(items: List[str]) -> Dict[str, float]:
+    return {model: float(value) for model, _, value in (item.rpartition("=") for item in items)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--token-ms", type=float, default=20.0, help="delay between streamed tokens")
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-After seconds sent with errors")
+    parser.add_argument("--model-latency", action="append", default=[], metavar="MODEL=MS",
+                        help="latency for one model (repeatable)")
+    parser.add_argument("--model-error-rate", action="append", default=[], metavar="MODEL=RATE",
+                        help="error rate for one model (repeatable)")
+    args = parser.parse_args()
+
+    app = create_app(
+        args.latency_ms, args.jitter_ms, args.error_rate, args.token_ms, args.retry_after,
+        _per_model(args.model_latency), _per_model(args.model_error_rate),
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""End-to-end load generator for /api/chat (or /api/chat/stream).
+
+Starts ``benchmarks.fake_openrouter`` with the requested latency/error rate
+and a uvicorn worker of the real API pointed at it, then sends ``--requests``
+chats with ``--concurrency`` in flight. Reports latency percentiles (and
+time to first token for the stream endpoint), throughput, status codes and
+the API process memory.
+
+Answers are counted by the `mode` the API reports (llm, cache, fast_path,
+fallback): `error_rate` includes fallbacks, since the LLM call failed, and
+`latency` only covers answers generated by the LLM. The API runs with
+``ANSWER_POLICY=llm`` so fast-path answers do not skip the LLM.
+
+    cd backend && python -m benchmarks.load_chat --requests 1000 --concurrency 64 \\
+        --latency-ms 300 --error-rate 0.05 --output load.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from app import config
+
+from .report import latency_summary, require_generated_corpus, rss_mb, write_report
+
+
+QUESTIONS = [
+    "Qu'est-ce que la Nuit de l'Info ?",
+    "Comment s'inscrire à la Nuit de l'Info ?",
+    "Quand a lieu l'événement ?",
+    "Combien de personnes par équipe ?",
+    "Quels sont les défis proposés ?",
+    "Est-ce gratuit ?",
+    "Qui organise la Nuit de l'Info ?",
+    "Peut-on participer à distance ?",
+]
+
+
+def _wait_ready(url: str, proc: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{url}: process exited with code {proc.returncode}")
+        try:
+            httpx.get(url, timeout=0.5)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} did not start")
+
+
+def _query(i: int, distinct: int) -> str:
+    # Suffix the base questions so `distinct` queries exist (controls answer-cache hits)
+    n = i % distinct
+    base = QUESTIONS[n % len(QUESTIONS)]
+    return base if n < len(QUESTIONS) else f"{base} ({n})"
+
+
+async def _one(client: httpx.AsyncClient, endpoint: str, query: str) -> Dict[str, Any]:
+    start = time.perf_counter()
+    first_token: Optional[float] = None
+    mode: Optional[str] = None
+    try:
+        if endpoint == "stream":
+            async with client.stream("POST", "/api/chat/stream", json={"query": query}) as resp:
+                status = resp.status_code
+                event = ""
+                async for line in resp.aiter_lines():
+                    if line.startswith("event: "):
+                        event = line[len("event: "):]
+                        if event == "delta" and first_token is None:
+                            first_token = time.perf_counter() - start
+                        elif event == "error":
+                            status = 599  # in-band failure after headers
+                    elif line.startswith("data: ") and event == "done":
+                        mode = json.loads(line[len("data: "):]).get("mode")
+        else:
+            resp = await client.post("/api/chat", json={"query": query})
+            status = resp.status_code
+            if status == 200:
+                mode = resp.json().get("mode")
+    except httpx.HTTPError as exc:
+        status = type(exc).__name__
+    return {"status": status, "mode": mode, "seconds": time.perf_counter() - start, "first_token": first_token}
+
+
+async def _run(base: str, endpoint: str, requests: int, concurrency: int, distinct: int) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, timeout=120.0, limits=limits) as client:
+        slots = asyncio.Semaphore(concurrency)
+
+        async def bounded(i: int) -> Dict[str, Any]:
+            async with slots:
+                return await _one(client, endpoint, _query(i, distinct))
+
+        start = time.perf_counter()
+        results: List[Dict[str, Any]] = await asyncio.gather(*(bounded(i) for i in range(requests)))
+        wall = time.perf_counter() - start
+
+    ok = [r for r in results if r["status"] == 200]
+    # A 200 may still be a FAQ fallback (LLM failed) or an answer that never reached the LLM
+    generated = [r for r in ok if r["mode"] == "llm"]
+    fallbacks = [r for r in ok if r["mode"] == "fallback"]
+    by_mode: Dict[str, List[float]] = {}
+    for r in ok:
+        by_mode.setdefault(str(r["mode"]), []).append(r["seconds"])
+    report: Dict[str, Any] = {
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(requests / wall, 2),
+        "statuses": {str(k): v for k, v in sorted(Counter(str(r["status"]) for r in results).items())},
+        "modes": {mode: len(seconds) for mode, seconds in sorted(by_mode.items())},
+        "error_rate": round(1 - (len(ok) - len(fallbacks)) / requests, 4) if requests else 0.0,
+        "degraded_rate": round(len(fallbacks) / requests, 4) if requests else 0.0,
+        "latency": latency_summary([r["seconds"] for r in generated]),
+        "latency_by_mode": {mode: latency_summary(seconds) for mode, seconds in sorted(by_mode.items())},
+        "latency_all": latency_summary([r["seconds"] for r in results]),
+    }
+    if endpoint == "stream":
+        report["time_to_first_token"] = latency_summary(
+            [r["first_token"] for r in generated if r["first_token"] is not None]
+        )
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--endpoint", choices=["chat", "stream"], default="chat")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--distinct", type=int, default=500, help="distinct queries (lower = more cache hits)")
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--token-ms", type=float, default=10.0)
+    parser.add_argument("--api-port", type=int, default=8098)
+    parser.add_argument("--llm-port", type=int, default=8099)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+    # The API worker serves the real corpus (FRONTEND_DATA_DIR)
+    require_generated_corpus(config.FAQS_PATH)
+
+    llm = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_openrouter", "--port", str(args.llm_port),
+         "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+         "--error-rate", str(args.error_rate), "--token-ms", str(args.token_ms)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    env = dict(
+        os.environ,
+        OPENROUTER_API_KEY="bench",
+        OPENROUTER_API_BASE=f"http://127.0.0.1:{args.llm_port}/api/v1",
+        CORPUS_WATCH_INTERVAL="0",
+        # Measure LLM answers, not FAQ fast-path hits
+        ANSWER_POLICY="llm",
+        # Every simulated user shares one IP here
+        RATE_LIMIT_PER_MINUTE="0",
+    )
+    api = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.api_port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{args.api_port}"
+    try:
+        _wait_ready(f"http://127.0.0.1:{args.llm_port}/docs", llm)
+        _wait_ready(f"{base}/api/health", api)
+        rss_idle = rss_mb(api.pid)
+        results = asyncio.run(_run(base, args.endpoint, args.requests, args.concurrency, args.distinct))
+        results.update({
+            "endpoint": args.endpoint,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "distinct_queries": args.distinct,
+            "fake_llm": {
+                "latency_ms": args.latency_ms,
+                "jitter_ms": args.jitter_ms,
+                "error_rate": args.error_rate,
+                "token_ms": args.token_ms,
+            },
+            "api_rss_idle_mb": rss_idle,
+            "api_rss_peak_mb": rss_mb(api.pid, field="VmHWM"),
+        })
+        write_report("load_chat", results, args.output)
+    finally:
+        for proc in (api, llm):
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Latency percentiles, memory and JSON reports shared by the benchmarks.
+
+Reports are plain JSON so two runs can be diffed with ``benchmarks.compare``.
+"""
+from __future__ import annotations
+
+import json
+import platform
+import resource
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+
+def latency_summary(seconds: Sequence[float]) -> Dict[str, float]:
+    """p50/p95/p99/mean/max in milliseconds."""
+    if not len(seconds):
+        return {"count": 0}
+    ms = np.asarray(seconds, dtype=np.float64) * 1000.0
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "count": int(ms.size),
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+        "mean_ms": round(float(ms.mean()), 4),
+        "max_ms": round(float(ms.max()), 4),
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (also used by process_all_data.py)."""
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20, 1)
+
+
+def rss_mb(pid: Optional[int] = None, field: str = "VmRSS") -> float:
+    """Resident set size of `pid` (default: this process) from /proc, Linux only.
+
+    `field="VmHWM"` gives the peak instead of the current value.
+    """
+    path = f"/proc/{pid or 'self'}/status"
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return 0.0
+
+
+def require_generated_corpus(*paths: Path) -> None:
+    """Exit with a clear message if files written by process_all_data.py are missing.
+
+    For benchmarks that measure the real corpus rather than a synthetic one.
+    """
+    missing = [str(p) for p in paths if not Path(p).exists()]
+    if missing:
+        sys.exit(
+            f"missing generated corpus file(s): {', '.join(missing)}\n"
+            "run `python process_all_data.py` from the repository root first"
+        )
+
+
+def write_report(name: str, results: Any, output: Optional[str]) -> Dict[str, Any]:
+    """Wrap `results` with run metadata, print it, and save it to `output` if given."""
+    report = {
+        "benchmark": name,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if output:
+        Path(output).write_text(text + "\n", encoding="utf-8")
+    return report
@@ -0,0 +1,55 @@
+"""Synthetic FAQ corpora and queries shared by the benchmarks."""
+from __future__ import annotations
+
+import random
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app import rag
+from app.embedding import embed_batch, faq_text
+
+
+WORDS = (
+    "nuit info inscription équipe défi date décembre école étudiants web application "
+    "prix jury partenaire règlement horaires site salle vote projet code serveur"
+).split()
+CATEGORIES = ["general", "organisation", "inscription", "defis", "modes", "assistant"]
+
+
+def synthetic_texts(n: int, words_per_text: int = 60, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) + str(rng.randint(0, 500)) for _ in range(words_per_text)) for _ in range(n)]
+
+
+def synthetic_faqs(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    questions = synthetic_texts(n, 8, seed)
+    answers = synthetic_texts(n, 40, seed + 1)
+    return [
+        {
+            "id": i + 1,
+            "question_fr": questions[i],
+            "answer_fr": answers[i],
+            "question_ar": "",
+            "answer_ar": "",
+            "category": rng.choice(CATEGORIES),
+            "keywords": questions[i].split()[:4],
+        }
+        for i in range(n)
+    ]
+
+
+def synthetic_queries(faqs: List[Dict[str, Any]], n: int, seed: int = 1) -> List[str]:
+    """Queries made of a few words from random FAQ questions."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n):
+        words = rng.choice(faqs)["question_fr"].split()
+        queries.append(" ".join(rng.sample(words, k=min(4, len(words)))))
+    return queries
+
+
+def install_corpus(faqs: List[Dict[str, Any]]) -> None:
+    """Replace the loaded corpus in `app.rag` with an in-memory one."""
+    rag._set_corpus(faqs, embed_batch([faq_text(faq) for faq in faqs]).astype(np.float32))
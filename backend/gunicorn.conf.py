@@ -0,0 +1,35 @@
+"""Multi-worker serving: cd backend && gunicorn -c gunicorn.conf.py app.main:app
+
+The app is imported and the corpus loaded once in the master (preload), then
+workers are forked and share those pages copy-on-write. Set CACHE_BACKEND=server
+and CACHE_SERVER_AUTHKEY, and start `python -m app.cache_server`, to share the
+answer cache as well.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv('BIND', '0.0.0.0:8000')
+workers = int(os.getenv('WEB_CONCURRENCY', str(min(multiprocessing.cpu_count(), 4))))
+worker_class = 'uvicorn.workers.UvicornWorker'
+preload_app = True
+# LLM answers can take a while; the OpenRouter client has its own timeout
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = 30
+accesslog = '-'
+
+
+def when_ready(server):
+    # Runs in the master after the app is imported, before the first fork
+    from app.main import preload
+
+    preload()
+    server.log.info("Corpus preloaded; forking %s workers", server.cfg.workers)
+
+
+def on_reload(server):
+    # SIGHUP: runs in the master before the new workers are forked (when_ready
+    # does not run again), so they inherit the updated corpus
+    from app.main import preload
+
+    preload(reload=True)
+    server.log.info("Corpus reloaded; forking %s new workers", server.cfg.workers)
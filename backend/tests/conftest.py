@@ -0,0 +1,118 @@
+"""Shared fixtures: a small on-disk corpus and an LLM client wired to the fake OpenRouter app.
+
+Run from backend/: python -m pytest -q
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+import httpx
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+# backend/ for `app` and `benchmarks`, the repo root for `pipeline`
+for path in (BACKEND_DIR, BACKEND_DIR.parent):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from app import config, rag  # noqa: E402
+from app.llm_client import OpenRouterClient  # noqa: E402
+from app.models import SourceFAQ  # noqa: E402
+from app.resilience import RetryPolicy  # noqa: E402
+from app.routing import ModelRouter  # noqa: E402
+from benchmarks.fake_openrouter import create_app  # noqa: E402
+
+
+FAQS: List[Dict[str, Any]] = [
+    {"id": 1, "question_fr": "Quand a lieu la Nuit de l'Info ?",
+     "answer_fr": "La Nuit de l'Info a lieu chaque année début décembre, du coucher au lever du soleil.",
+     "question_ar": "متى تقام ليلة المعلومات؟", "answer_ar": "تقام في بداية ديسمبر من كل عام.",
+     "category": "general", "keywords": ["date", "décembre"]},
+    {"id": 2, "question_fr": "Comment inscrire mon équipe ?",
+     "answer_fr": "L'inscription des équipes se fait en ligne sur le site officiel avant l'événement.",
+     "question_ar": "", "answer_ar": "", "category": "inscription", "keywords": ["inscription", "équipe"]},
+    {"id": 3, "question_fr": "Quels défis sont proposés ?",
+     "answer_fr": "Des partenaires proposent des défis techniques et créatifs, chacun avec son jury et ses prix.",
+     "question_ar": "", "answer_ar": "", "category": "defis", "keywords": ["défis", "partenaires"]},
+]
+
+
+def write_faqs(path: Path, faqs: List[Dict[str, Any]]) -> None:
+    path.write_text(json.dumps({"faqs": faqs}, ensure_ascii=False), encoding="utf-8")
+
+
+@pytest.fixture
+def corpus_dir(tmp_path, monkeypatch):
+    """FAQS written to a temporary data directory and loaded as the current corpus."""
+    write_faqs(tmp_path / "faqs.json", FAQS)
+    monkeypatch.setattr(config, "FAQS_PATH", tmp_path / "faqs.json")
+    monkeypatch.setattr(config, "EMBEDDINGS_MATRIX_PATH", tmp_path / "embeddings.f32.npy")
+    monkeypatch.setattr(config, "EMBEDDINGS_META_PATH", tmp_path / "embeddings.meta.json")
+    monkeypatch.setattr(config, "RELOADED_MATRIX_PATH", tmp_path / "cache" / "embeddings.f32.npy")
+    monkeypatch.setattr(config, "RELOADED_META_PATH", tmp_path / "cache" / "embeddings.meta.json")
+    monkeypatch.setattr(config, "VECTOR_INDEX_PATH", tmp_path / "embeddings.ivf.npz")
+    monkeypatch.setattr(config, "CORPUS_HISTORY_PATH", tmp_path / "corpus_history.json")
+    monkeypatch.setattr(rag, "_corpus", None)
+    monkeypatch.setattr(rag, "_history", None)
+    rag.reload_corpus(force=True)
+    yield tmp_path
+
+
+def sources(n: int = 2) -> List[SourceFAQ]:
+    return [rag._to_source(faq, 0.9 - 0.1 * i) for i, faq in enumerate(FAQS[:n])]
+
+
+def make_client(fake_app, models=("model-a",), failure_threshold: int = 3, retries: int = 2) -> OpenRouterClient:
+    """OpenRouterClient whose HTTP pool talks to `fake_app` in-process."""
+    client = OpenRouterClient()
+    client.api_key = "test"
+    client.base_url = "http://fake-openrouter/api/v1"
+    client.router = ModelRouter([(m, 4) for m in models], failure_threshold=failure_threshold, reset_timeout=60)
+    client.model = models[0]
+    client.retry = RetryPolicy(retries, base_delay=0.001, max_delay=0.01)
+    client._http = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake_app))
+    client._slots = asyncio.Semaphore(8)
+    return client
+
+
+@pytest.fixture
+def fake_openrouter():
+    """Factory for the fake OpenRouter app, fast by default."""
+    def factory(**kwargs):
+        kwargs.setdefault("latency_ms", 1.0)
+        kwargs.setdefault("token_ms", 0.0)
+        return create_app(**kwargs)
+    return factory
+
+
+@pytest.fixture
+def api(corpus_dir, monkeypatch):
+    """TestClient for the API over the temporary corpus."""
+    from fastapi.testclient import TestClient
+
+    from app import main
+
+    monkeypatch.setattr(config, "CORPUS_WATCH_INTERVAL", 0)
+    # One client address for every test: tests that need the limiter install their own
+    monkeypatch.setattr(main, "rate_limiter", None)
+    main.answer_cache.clear()
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def use_fake_llm(monkeypatch):
+    """Point the API's llm_client at a fake OpenRouter app: use_fake_llm(error_rate=1.0)."""
+    from app.llm_client import llm_client
+
+    def install(**kwargs):
+        kwargs.setdefault("latency_ms", 1.0)
+        kwargs.setdefault("token_ms", 0.0)
+        client = make_client(create_app(**kwargs), failure_threshold=0, retries=0)
+        for name in ("api_key", "base_url", "router", "model", "retry", "_http", "_slots"):
+            monkeypatch.setattr(llm_client, name, getattr(client, name))
+    return install
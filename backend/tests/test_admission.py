@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.admission import AdmissionQueue, Overloaded, RateLimiter
+
+
+def test_rate_limiter_allows_burst_then_asks_to_wait():
+    limiter = RateLimiter(rate=1.0, burst=3)
+    assert [limiter.acquire("client") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert 0.0 < limiter.acquire("client") <= 1.0
+    # Other clients have their own bucket
+    assert limiter.acquire("other") == 0.0
+
+
+def test_rate_limiter_forgets_oldest_clients():
+    limiter = RateLimiter(rate=1.0, burst=1, max_clients=2)
+    for key in ("a", "b", "c"):
+        limiter.acquire(key)
+    assert len(limiter) == 2
+
+
+def test_queue_rejects_when_full():
+    queue = AdmissionQueue(limit=1, max_queue=1, max_wait=1.0)
+
+    async def hold(seconds):
+        async with queue.admit():
+            await asyncio.sleep(seconds)
+
+    async def main():
+        running = asyncio.ensure_future(hold(0.05))
+        await asyncio.sleep(0)
+        waiting = asyncio.ensure_future(hold(0))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded):
+            await hold(0)
+        await asyncio.gather(running, waiting)
+
+    asyncio.run(main())
+    assert queue.stats() == {"limit": 1, "running": 0, "waiting": 0, "max_queue": 1}
+
+
+def test_queue_wait_is_bounded():
+    queue = AdmissionQueue(limit=1, max_queue=5, max_wait=0.01)
+
+    async def main():
+        async def hold():
+            async with queue.admit():
+                await asyncio.sleep(0.1)
+
+        running = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as excinfo:
+            async with queue.admit():
+                pass
+        await running
+        return excinfo.value
+
+    assert asyncio.run(main()).retry_after == 0.01
+
+
+def _request(forwarded_for=(), peer="10.0.0.1"):
+    from starlette.requests import Request
+
+    headers = [(b"x-forwarded-for", value.encode()) for value in forwarded_for]
+    return Request({"type": "http", "headers": headers, "client": (peer, 1234)})
+
+
+def test_forwarded_for_is_ignored_unless_trusted(monkeypatch):
+    from app import config, main
+
+    monkeypatch.setattr(config, "TRUST_FORWARDED_FOR", False)
+    assert main._client_key(_request(["1.2.3.4"])) == "10.0.0.1"
+
+
+@pytest.mark.parametrize("hops, expected", [(1, "203.0.113.7"), (2, "198.51.100.2"), (4, "10.0.0.1")])
+def test_spoofed_forwarded_for_entries_are_skipped(monkeypatch, hops, expected):
+    from app import config, main
+
+    monkeypatch.setattr(config, "TRUST_FORWARDED_FOR", True)
+    monkeypatch.setattr(config, "TRUSTED_PROXY_HOPS", hops)
+    # The client forged "6.6.6.6"; each proxy appended the address it saw
+    request = _request(["6.6.6.6, 198.51.100.2", "203.0.113.7"])
+    assert main._client_key(request) == expected
+
+
+def test_rate_limited_requests_show_in_metrics(api, monkeypatch):
+    from app import main, metrics
+
+    monkeypatch.setattr(main, "rate_limiter", RateLimiter(rate=0.001, burst=1))
+    before = metrics.REQUESTS.value(route="/api/retrieve/batch", status="429")
+    statuses = [api.post("/api/retrieve/batch", json={"queries": ["date"]}).status_code for _ in range(3)]
+    assert statuses[1:] == [429, 429]
+    assert metrics.REQUESTS.value(route="/api/retrieve/batch", status="429") == before + 2
+    assert 'route="/api/retrieve/batch",status="429"' in api.get("/metrics").text
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pytest
+
+from app import config, rag
+from app.artifacts import ArtifactError, atomic_write, load_embedding_artifact, write_embedding_artifact
+from app.embedding import MODEL_NAME
+
+from conftest import FAQS, write_faqs
+
+
+def _matrix(n: int = 4, dim: int = 8) -> np.ndarray:
+    x = np.random.default_rng(0).standard_normal((n, dim)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def test_float32_round_trip_is_memory_mapped(tmp_path):
+    matrix = _matrix()
+    write_embedding_artifact(tmp_path / "m.npy", tmp_path / "m.json", [10, 20, 30, 40], matrix, "model", "src")
+    meta, ids, loaded = load_embedding_artifact(tmp_path / "m.npy", tmp_path / "m.json", verify_checksum=True)
+    assert ids == [10, 20, 30, 40]
+    assert (meta["model"], meta["source_checksum"]) == ("model", "src")
+    assert isinstance(loaded, np.memmap) and not loaded.flags.writeable
+    np.testing.assert_array_equal(loaded, matrix)
+
+
+def test_corrupt_matrix_fails_checksum(tmp_path):
+    write_embedding_artifact(tmp_path / "m.npy", tmp_path / "m.json", [1, 2, 3, 4], _matrix(), "model", "src")
+    np.save(tmp_path / "m.npy", _matrix() * 2)
+    load_embedding_artifact(tmp_path / "m.npy", tmp_path / "m.json")
+    with pytest.raises(ArtifactError):
+        load_embedding_artifact(tmp_path / "m.npy", tmp_path / "m.json", verify_checksum=True)
+
+
+def test_header_mismatch_is_rejected(tmp_path):
+    write_embedding_artifact(tmp_path / "m.npy", tmp_path / "m.json", [1, 2, 3, 4], _matrix(), "model", "src")
+    meta = json.loads((tmp_path / "m.json").read_text())
+    (tmp_path / "m.json").write_text(json.dumps(dict(meta, count=5)))
+    with pytest.raises(ArtifactError):
+        load_embedding_artifact(tmp_path / "m.npy", tmp_path / "m.json")
+
+
+def test_corpus_maps_artifact_and_orders_faqs_by_its_ids(corpus_dir):
+    faqs, source_checksum, _ = rag._read_faqs(config.FAQS_PATH)
+    reversed_ids = [faq["id"] for faq in reversed(FAQS)]
+    matrix = _matrix(len(FAQS), rag.DIMENSION)
+    write_embedding_artifact(config.EMBEDDINGS_MATRIX_PATH, config.EMBEDDINGS_META_PATH, reversed_ids,
+                             matrix, MODEL_NAME, source_checksum)
+    ordered, loaded, _ = rag._load_artifact(faqs, source_checksum)
+    assert [faq["id"] for faq in ordered] == reversed_ids
+    np.testing.assert_array_equal(loaded, matrix)
+
+
+def test_stale_artifact_is_detected(corpus_dir):
+    _, old_checksum, _ = rag._read_faqs(config.FAQS_PATH)
+    write_faqs(corpus_dir / "faqs.json", [dict(FAQS[0], answer_fr="Autre réponse."), *FAQS[1:]])
+    faqs, new_checksum, _ = rag._read_faqs(config.FAQS_PATH)
+    assert new_checksum != old_checksum
+    with pytest.raises(ArtifactError, match="stale"):
+        rag._load_artifact(faqs, new_checksum)
+
+
+def test_failed_atomic_write_keeps_the_old_file(tmp_path):
+    target = tmp_path / "data.bin"
+    atomic_write(target, lambda f: f.write(b"old"))
+
+    def fail(f):
+        f.write(b"partial")
+        raise RuntimeError("disk full")
+
+    with pytest.raises(RuntimeError):
+        atomic_write(target, fail)
+    assert target.read_bytes() == b"old"
+    assert [p.name for p in tmp_path.iterdir()] == ["data.bin"]
@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+
+from conftest import BACKEND_DIR
+
+
+def test_bench_formats_explains_missing_corpus(tmp_path):
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_formats", "--data-dir", str(tmp_path)],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    assert result.returncode != 0
+    assert "Traceback" not in result.stderr
+    assert "process_all_data.py" in result.stderr
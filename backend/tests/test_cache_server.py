@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import asyncio
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+from app import cache_server, config
+from app.cache import AnswerCache
+from app.cache_server import CacheManager, RemoteCache
+
+
+def test_round_trip_over_a_unix_socket(tmp_path):
+    address = str(tmp_path / "cache.sock")
+    server = CacheManager(address=address, authkey=b"secret").get_server()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    writer = RemoteCache("answers", 16, 0.0, address, "secret")
+    reader = RemoteCache("answers", 16, 0.0, address, "secret")
+    writer.put("question", "réponse")
+    assert reader.get("question") == "réponse"
+    assert reader.stats()["errors"] == 0
+
+    # AnswerCache runs the blocking calls in a thread, off the event loop
+    answers = AnswerCache(16, 0.0)
+    answers._entries = reader
+    key = answers.make_key("Quand ?", "fr", [1])
+    asyncio.run(answers.aput(key, "En décembre."))
+    assert asyncio.run(answers.aget(key)) == "En décembre."
+
+
+def test_stalled_service_times_out(monkeypatch):
+    monkeypatch.setattr(config, "CACHE_SERVER_TIMEOUT", 0.2)
+    # Accepts connections (kernel backlog) but never answers the auth challenge
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    with listener:
+        cache = RemoteCache("answers", 16, 0.0, "127.0.0.1:%d" % listener.getsockname()[1], "secret")
+        start = time.monotonic()
+        assert cache.get("question") is None
+        assert time.monotonic() - start < 2
+        assert cache.errors == 1
+
+
+def test_authkey_is_required(monkeypatch):
+    with pytest.raises(ValueError):
+        RemoteCache("answers", 16, 0.0, "127.0.0.1:8765", "")
+
+    monkeypatch.setattr(config, "CACHE_SERVER_AUTHKEY", "")
+    monkeypatch.setattr(sys, "argv", ["cache_server"])
+    with pytest.raises(SystemExit):
+        cache_server.main()
+
+
+def test_address_parsing():
+    assert cache_server.parse_address(":8765") == ("127.0.0.1", 8765)
+    assert cache_server.parse_address("/run/assistant/cache.sock") == "/run/assistant/cache.sock"
+    assert cache_server._is_local(("127.0.0.1", 1)) and cache_server._is_local("/tmp/cache.sock")
+    assert not cache_server._is_local(("0.0.0.0", 1))
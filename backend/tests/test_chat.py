@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from app import config
+from benchmarks.fake_openrouter import ANSWER
+
+from conftest import FAQS
+
+
+def _chat(api, query="Comment inscrire mon équipe ?"):
+    response = api.post("/api/chat", json={"query": query})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_llm_answer_then_cache_hit(api, use_fake_llm, monkeypatch):
+    monkeypatch.setattr(config, "ANSWER_POLICY", "llm")
+    use_fake_llm()
+    first = _chat(api)
+    assert (first["answer"], first["mode"], first["degraded"]) == (ANSWER, "llm", False)
+    assert _chat(api)["mode"] == "cache"
+
+
+def test_llm_failure_is_reported_as_fallback(api, use_fake_llm, monkeypatch):
+    monkeypatch.setattr(config, "ANSWER_POLICY", "llm")
+    use_fake_llm(error_rate=1.0)
+    body = _chat(api)
+    assert body["mode"] == "fallback"
+    assert body["degraded"] is True
+
+
+def test_clear_match_uses_fast_path(api, use_fake_llm, monkeypatch):
+    monkeypatch.setattr(config, "ANSWER_POLICY", "auto")
+    use_fake_llm(error_rate=1.0)
+    body = _chat(api, FAQS[1]["question_fr"])
+    assert body["mode"] == "fast_path"
+    assert body["answer"] == FAQS[1]["answer_fr"]
+
+
+@pytest.mark.parametrize("template", ["{reponse}", "{answer", "{0}"])
+def test_broken_fast_path_template_serves_raw_answer(api, use_fake_llm, monkeypatch, template):
+    monkeypatch.setattr(config, "ANSWER_POLICY", "auto")
+    monkeypatch.setitem(config.FAST_PATH_TEMPLATES, "fr", template)
+    use_fake_llm(error_rate=1.0)
+    body = _chat(api, FAQS[1]["question_fr"])
+    assert body["mode"] == "fast_path"
+    assert body["answer"] == FAQS[1]["answer_fr"]
+
+
+def test_stream_done_event_carries_mode(api, use_fake_llm, monkeypatch):
+    monkeypatch.setattr(config, "ANSWER_POLICY", "llm")
+    use_fake_llm()
+    with api.stream("POST", "/api/chat/stream", json={"query": "Comment inscrire mon équipe ?"}) as response:
+        lines = list(response.iter_lines())
+    done = lines[lines.index("event: done") + 1]
+    assert json.loads(done[len("data: "):])["mode"] == "llm"
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.coalesce import SingleFlight
+
+
+def test_concurrent_calls_share_one_run():
+    flight = SingleFlight("test")
+    runs = 0
+
+    async def work():
+        nonlocal runs
+        runs += 1
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def main():
+        return await asyncio.gather(*(flight.run("key", work) for _ in range(10)))
+
+    assert asyncio.run(main()) == ["answer"] * 10
+    assert runs == 1
+    assert flight.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 9}
+
+
+def test_later_calls_start_a_new_run():
+    flight = SingleFlight("test")
+
+    async def main():
+        first = await flight.run("key", lambda: asyncio.sleep(0, result=1))
+        second = await flight.run("key", lambda: asyncio.sleep(0, result=2))
+        return first, second
+
+    assert asyncio.run(main()) == (1, 2)
+
+
+def test_errors_reach_every_caller():
+    flight = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        return await asyncio.gather(*(flight.run("key", work) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    flight = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "answer"
+
+    async def main():
+        leader = asyncio.ensure_future(flight.run("key", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.run("key", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == "answer"
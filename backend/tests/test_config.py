@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+
+from conftest import BACKEND_DIR
+
+
+def _import_config(**env: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-c", "import app.config"],
+        cwd=BACKEND_DIR, env={**os.environ, **env}, capture_output=True, text=True,
+    )
+
+
+def test_unsupported_embeddings_dtype_is_a_clear_error():
+    result = _import_config(EMBEDDINGS_DTYPE="float64")
+    assert result.returncode != 0
+    assert "ValueError" in result.stderr
+    assert "float32, float16, int8" in result.stderr
+
+
+def test_supported_embeddings_dtype_imports():
+    assert _import_config(EMBEDDINGS_DTYPE="int8").returncode == 0
+
+
+def test_invalid_fast_path_template_fails_at_startup():
+    result = _import_config(FAST_PATH_TEMPLATE_FR="Réponse : {reponse}")
+    assert result.returncode != 0
+    assert "FAST_PATH_TEMPLATE_FR" in result.stderr
+
+
+def test_fast_path_template_with_placeholders_imports():
+    assert _import_config(FAST_PATH_TEMPLATE_AR="{question}\n{answer} {{ok}}").returncode == 0
+
+
+def test_shared_cache_requires_an_authkey():
+    result = _import_config(CACHE_BACKEND="server", CACHE_SERVER_AUTHKEY="")
+    assert result.returncode != 0
+    assert "CACHE_SERVER_AUTHKEY" in result.stderr
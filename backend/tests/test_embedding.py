@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import numpy as np
+
+from app.embedding import DIMENSION, create_embedding, embed_batch
+
+
+def test_embed_batch_matches_create_embedding():
+    texts = [
+        "Quand a lieu la Nuit de l'Info ?",
+        "متى تقام ليلة المعلومات؟",
+        "mot mot mot répété répété",
+        "",
+        "   ",
+        "Inscription   des ÉQUIPES\nen ligne",
+    ]
+    matrix = embed_batch(texts)
+    assert matrix.shape == (len(texts), DIMENSION)
+    for text, row in zip(texts, matrix):
+        np.testing.assert_allclose(row, create_embedding(text), atol=1e-12)
+
+
+def test_embed_batch_of_empty_texts_is_all_zero():
+    assert not embed_batch(["", " "]).any()
+    assert embed_batch([]).shape == (0, DIMENSION)
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app import rag
+from app.cache import LRUCache
+from app.embedding import create_embedding, token_hash_stats
+
+
+@pytest.fixture
+def query_cache(monkeypatch):
+    cache = LRUCache(4, 0.0)
+    monkeypatch.setattr(rag, "_query_embeddings", cache)
+    return cache
+
+
+def test_repeated_query_is_a_hit(query_cache):
+    first = rag.embed_query("Quand a lieu la Nuit de l'Info ?")
+    # Same tokens once lowercased and whitespace-normalized
+    second = rag.embed_query("  quand a LIEU la nuit de l'info ?")
+    assert second is first and not second.flags.writeable
+    np.testing.assert_array_equal(first, create_embedding("Quand a lieu la Nuit de l'Info ?").astype(np.float32))
+
+    stats = rag.embedding_cache_stats()["query"]
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_token_hashes_are_memoized():
+    text = "inscription équipe défi décembre inscription"
+    create_embedding(text)
+    before = token_hash_stats()
+    create_embedding(text)
+    after = token_hash_stats()
+    assert after["misses"] == before["misses"]
+    assert after["hits"] > before["hits"]
+    assert 0.0 < after["hit_ratio"] <= 1.0
+    assert rag.embedding_cache_stats()["token_hash"] == after
+
+
+def test_hit_ratios_are_exported(api, query_cache):
+    for _ in range(3):
+        rag.embed_query("Comment inscrire mon équipe ?")
+    assert api.get("/api/stats").json()["embedding_caches"]["query"]["hits"] == 2
+    lines = api.get("/metrics").text.splitlines()
+    assert 'assistant_embedding_cache_hit_ratio{cache="query"} 0.6666666666666666' in lines
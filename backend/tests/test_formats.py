@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app import config, rag
+from app.artifacts import load_embedding_artifact, scale_path_for, write_embedding_artifact
+
+# Worst row error of each compact copy, relative to unit-norm float32 rows
+TOLERANCE = {"float16": 1e-3, "int8": 1e-2}
+
+
+def _matrix(n: int = 6, dim: int = 32) -> np.ndarray:
+    x = np.random.default_rng(1).standard_normal((n, dim)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_compact_matrix_is_widened_on_load(tmp_path, dtype):
+    matrix = _matrix()
+    write_embedding_artifact(tmp_path / "m.npy", tmp_path / "m.json", list(range(6)), matrix,
+                             "model", "src", dtype=dtype)
+    assert scale_path_for(tmp_path / "m.npy").exists() == (dtype == "int8")
+    meta, ids, loaded = load_embedding_artifact(tmp_path / "m.npy", tmp_path / "m.json", verify_checksum=True)
+    assert meta["dtype"] == dtype and ids == list(range(6))
+    assert loaded.dtype == np.float32 and loaded.shape == matrix.shape
+    np.testing.assert_allclose(loaded, matrix, atol=TOLERANCE[dtype])
+
+
+@pytest.fixture(scope="module")
+def pipeline_out(tmp_path_factory):
+    """A full process_all_data.py build (sample FAQs, no scraped data)."""
+    from process_all_data import SmartFAQGenerator
+
+    root = tmp_path_factory.mktemp("pipeline")
+    (root / "data").mkdir()
+    SmartFAQGenerator(str(root / "data"), str(root / "out"), jobs=1).process()
+    return root / "out"
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_backend_loads_compact_build_without_reembedding(pipeline_out, tmp_path, monkeypatch, dtype):
+    from process_all_data import COMPACT_MATRICES
+
+    monkeypatch.setattr(config, "FAQS_PATH", pipeline_out / "faqs.json")
+    monkeypatch.setattr(config, "EMBEDDINGS_MATRIX_PATH", pipeline_out / "embeddings.f32.npy")
+    monkeypatch.setattr(config, "EMBEDDINGS_META_PATH", pipeline_out / "embeddings.meta.json")
+    monkeypatch.setattr(config, "RELOADED_MATRIX_PATH", tmp_path / "cache" / "embeddings.f32.npy")
+    monkeypatch.setattr(config, "RELOADED_META_PATH", tmp_path / "cache" / "embeddings.meta.json")
+    monkeypatch.setattr(config, "CORPUS_HISTORY_PATH", tmp_path / "corpus_history.json")
+    monkeypatch.setattr(rag, "_corpus", None)
+    monkeypatch.setattr(rag, "_history", None)
+    assert rag.reload_corpus()["reembedded"] == 0
+    query = "Quand a lieu la Nuit de l'Info ?"
+    expected = [(s.id, s.similarity) for s in rag.retrieve_top_faqs(query, top_k=3)]
+
+    # FAQS_FILE=faqs.min.json.gz EMBEDDINGS_DTYPE=<dtype>
+    matrix_name, meta_name = COMPACT_MATRICES[dtype]
+    monkeypatch.setattr(config, "FAQS_PATH", pipeline_out / "faqs.min.json.gz")
+    monkeypatch.setattr(config, "EMBEDDINGS_MATRIX_PATH", pipeline_out / matrix_name)
+    monkeypatch.setattr(config, "EMBEDDINGS_META_PATH", pipeline_out / meta_name)
+    monkeypatch.setattr(rag, "_corpus", None)
+    assert rag.reload_corpus()["reembedded"] == 0
+    assert not config.RELOADED_MATRIX_PATH.exists()
+
+    found = [(s.id, s.similarity) for s in rag.retrieve_top_faqs(query, top_k=3)]
+    assert [i for i, _ in found] == [i for i, _ in expected]
+    np.testing.assert_allclose([s for _, s in found], [s for _, s in expected], atol=TOLERANCE[dtype])
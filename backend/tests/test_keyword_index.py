@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import pytest
+
+from app import config, rag
+from app.keyword_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+from conftest import FAQS
+
+
+def test_tokenize_folds_case_and_diacritics():
+    assert tokenize("Équipe DÉFIS") == ["equipe", "defis"]
+
+
+def test_bm25_ranks_by_term_weight():
+    index = BM25Index.from_faqs(FAQS)
+    rows = [row for row, _ in index.search("inscription équipe défis", 3)]
+    # Two query terms match FAQ 2 (row 1), one matches FAQ 3 (row 2)
+    assert rows == [1, 2]
+    assert index.search("météo", 3) == []
+    assert [row for row, _ in index.search("inscription équipe défis", 3, rows=[2])] == [2]
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([[1, 2], [2, 3]], k=60)
+    assert [row for row, _ in fused] == [2, 1, 3]
+
+
+@pytest.fixture
+def ranking(corpus_dir, monkeypatch):
+    def use(mode):
+        monkeypatch.setattr(config, "RETRIEVAL_MODE", mode)
+        rag.reload_corpus(force=True)
+    return use
+
+
+def test_keyword_mode_applies_the_weak_similarity_cutoff(ranking):
+    ranking("keyword")
+    assert [s.id for s in rag.retrieve_top_faqs("partenaires défis")] == [3]
+    # BM25 puts FAQ 2 first, but its cosine similarity is below MIN_SIMILARITY_WEAK
+    sources = rag.retrieve_top_faqs("inscription équipe défis")
+    assert 2 not in [s.id for s in sources]
+    assert all(s.similarity >= config.MIN_SIMILARITY_WEAK for s in sources)
+
+
+@pytest.mark.parametrize("mode", ["keyword", "hybrid"])
+def test_sources_are_ordered_by_similarity(ranking, mode):
+    ranking(mode)
+    sources = rag.retrieve_top_faqs("Comment inscrire mon équipe ? Quels défis sont proposés ?")
+    assert [s.id for s in sources] == [2, 3]
+    assert sources[0].similarity >= sources[1].similarity
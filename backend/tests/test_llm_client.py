@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app import config
+from app.resilience import CircuitOpenError
+from benchmarks.fake_openrouter import ANSWER
+
+from conftest import make_client, sources
+
+
+def _generate(client):
+    return asyncio.run(client.agenerate("Quand a lieu la Nuit de l'Info ?", "fr", sources()))
+
+
+def _route(client, name):
+    return next(r for r in client.router.routes if r.name == name)
+
+
+def test_agenerate_returns_completion(fake_openrouter):
+    client = make_client(fake_openrouter())
+    assert _generate(client) == ANSWER
+    assert _route(client, "model-a").stats()["samples"] == 1
+
+
+def test_retries_are_bounded(fake_openrouter):
+    client = make_client(fake_openrouter(error_rate=1.0), failure_threshold=0, retries=2)
+    with pytest.raises(Exception) as excinfo:
+        _generate(client)
+    assert "503" in str(excinfo.value)
+    # First attempt plus two retries
+    assert len(_route(client, "model-a")._outcomes) == 3
+
+
+def test_retry_after_longer_than_max_delay_gives_up(fake_openrouter):
+    client = make_client(fake_openrouter(error_rate=1.0, retry_after=30), failure_threshold=0, retries=5)
+    with pytest.raises(Exception):
+        _generate(client)
+    assert len(_route(client, "model-a")._outcomes) == 1
+
+
+def test_breaker_opens_and_rejects_without_calling(fake_openrouter):
+    client = make_client(fake_openrouter(error_rate=1.0), failure_threshold=2, retries=5)
+    with pytest.raises(Exception):
+        _generate(client)
+    route = _route(client, "model-a")
+    calls = len(route._outcomes)
+    assert route.breaker.is_open()
+
+    with pytest.raises(CircuitOpenError):
+        _generate(client)
+    assert len(route._outcomes) == calls
+
+
+def test_slow_call_is_hedged_to_a_faster_model(fake_openrouter, monkeypatch):
+    monkeypatch.setattr(config, "LLM_HEDGE_PERCENTILE", 50)
+    monkeypatch.setattr(config, "LLM_HEDGE_MIN_SAMPLES", 3)
+    fake = fake_openrouter(model_latency_ms={"model-a": 2000.0, "model-b": 1.0})
+    client = make_client(fake, models=("model-a", "model-b"))
+    for _ in range(3):
+        _route(client, "model-a").latency.observe(0.01)
+
+    assert _generate(client) == ANSWER
+    assert _route(client, "model-b").stats()["samples"] == 1
+
+
+def test_astream_yields_deltas(fake_openrouter):
+    client = make_client(fake_openrouter())
+
+    async def collect():
+        return [d async for d in client.astream("Comment inscrire mon équipe ?", "fr", sources())]
+
+    deltas = asyncio.run(collect())
+    assert "".join(deltas).strip() == ANSWER
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import math
+
+import pytest
+
+from app import metrics
+
+from conftest import FAQS
+
+
+@pytest.mark.parametrize("value, text", [
+    (3, "3"), (2.0, "2"), (0.25, "0.25"), (-1.5, "-1.5"),
+    (math.nan, "NaN"), (math.inf, "+Inf"), (-math.inf, "-Inf"),
+])
+def test_sample_values_use_prometheus_notation(value, text):
+    assert metrics._format_value(value) == text
+
+
+def test_metric_without_samples_cannot_be_registered():
+    with pytest.raises(TypeError):
+        metrics._Metric("assistant_test_incomplete", "no _samples")
+
+
+def test_metrics_endpoint_exposes_request_series(api):
+    api.post("/api/retrieve/batch", json={"queries": [FAQS[0]["question_fr"]]})
+    response = api.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == metrics.CONTENT_TYPE
+    lines = response.text.splitlines()
+    assert "# TYPE assistant_requests_total counter" in lines
+    assert any(line.startswith('assistant_requests_total{route="/api/retrieve/batch",status="200"} ')
+               for line in lines)
+    assert any(line.startswith('assistant_stage_duration_seconds_bucket{stage="embed",le="+Inf"} ')
+               for line in lines)
+    # Every sample line is "<name>[{labels}] <number>"
+    for line in lines:
+        if line and not line.startswith("#"):
+            float(line.rsplit(" ", 1)[1])
+
+
+def test_trace_header_returns_server_timing(api):
+    body = {"queries": [FAQS[0]["question_fr"]]}
+    assert "server-timing" not in api.post("/api/retrieve/batch", json=body).headers
+
+    timing = api.post("/api/retrieve/batch", json=body, headers={"X-Trace": "1"}).headers["server-timing"]
+    names = [part.split(";")[0] for part in timing.split(", ")]
+    assert "embed" in names and "search" in names
+    assert names[-1] == "total"
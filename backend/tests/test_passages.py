@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import numpy as np
+
+from pipeline.passages import MinHashLSH, drop_near_duplicates
+
+WORDS = "nuit info inscription équipe défi date décembre école étudiants web application prix jury".split()
+
+
+def _text(seed: int, n: int = 60) -> str:
+    return " ".join(f"{WORDS[(seed * 7 + i * 3) % len(WORDS)]}{(seed * 31 + i) % 97}" for i in range(n))
+
+
+def test_near_duplicates_are_dropped():
+    base = _text(1)
+    near = base + " fin"
+    records = [{"text": base}, {"text": near}, {"text": _text(2)}]
+    kept = list(drop_near_duplicates(records, threshold=0.8))
+    assert [r["text"] for r in kept] == [base, _text(2)]
+
+
+def test_distinct_passages_are_kept():
+    records = [{"text": _text(i)} for i in range(50)]
+    assert len(list(drop_near_duplicates(records))) == 50
+
+
+def test_capacity_bounds_the_index():
+    lsh = MinHashLSH(capacity=10)
+    for i in range(30):
+        lsh.add(lsh.signature(_text(i)))
+    assert len(lsh) == 10
+    # Evicted passages are no longer matched
+    assert not lsh.is_duplicate(lsh.signature(_text(0)))
+    assert lsh.is_duplicate(lsh.signature(_text(29)))
+
+
+
+def test_buckets_keep_every_passage_sharing_a_band():
+    # 2 bands of 2 rows: `b` shares its first band with `a` and its second with `x`
+    lsh = MinHashLSH(threshold=0.8, num_perm=4, bands=2, capacity=2)
+    a, x, b = (np.array(sig, dtype=np.uint32) for sig in ([1, 1, 2, 2], [9, 9, 3, 3], [1, 1, 3, 3]))
+    for sig in (a, x, b):
+        lsh.add(sig)
+    # `a` was evicted; `b` stays reachable through the band it shared with it
+    assert len(lsh) == 2
+    assert not lsh.is_duplicate(a)
+    assert lsh.is_duplicate(b)
+    assert lsh.is_duplicate(x)
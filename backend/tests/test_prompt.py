@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from app.prompt import SYSTEM_PREAMBLE, build_prompt, estimate_tokens, pack_context, trim_to_tokens
+
+from conftest import FAQS, sources
+from app import rag
+
+
+def test_system_message_is_the_same_for_every_request():
+    fr = build_prompt("Quand ?", "fr", sources(), 600, 200)
+    ar = build_prompt("متى؟", "ar", sources(1), 100, 200)
+    assert fr.messages[0] == ar.messages[0] == {"role": "system", "content": SYSTEM_PREAMBLE}
+
+
+def test_sources_are_ordered_by_similarity():
+    faqs = [rag._to_source(FAQS[0], 0.2), rag._to_source(FAQS[1], 0.9)]
+    blocks, full, trimmed = pack_context("fr", faqs, 600)
+    assert (full, trimmed) == (2, 0)
+    assert FAQS[1]["question_fr"] in blocks[0]
+
+
+def test_arabic_prompt_uses_arabic_fields():
+    prompt = build_prompt("متى؟", "ar", sources(1), 600, 200)
+    assert FAQS[0]["answer_ar"] in prompt.messages[1]["content"]
+
+
+def test_trim_keeps_whole_sentences():
+    text = "Première phrase courte. Deuxième phrase un peu plus longue que la première."
+    assert trim_to_tokens(text, 8) == "Première phrase courte."
+
+
+def test_context_stays_within_budget():
+    long = dict(FAQS[0], answer_fr=" ".join(["Une phrase de remplissage assez longue."] * 80))
+    faqs = [rag._to_source(long, 0.9), rag._to_source(FAQS[1], 0.8)]
+    prompt = build_prompt("Quand ?", "fr", faqs, 120, 200)
+    assert prompt.context_tokens <= 120
+    # The short source is kept whole, the long one trimmed to the rest
+    assert (prompt.sources_full, prompt.sources_trimmed, prompt.sources_dropped) == (1, 1, 0)
+
+
+def test_trim_cuts_unpunctuated_text_at_a_word():
+    text = "mot " * 100
+    kept = trim_to_tokens(text, 10)
+    assert kept.endswith("mot…")
+    assert estimate_tokens(kept) <= 10
+
+
+def test_unpunctuated_sources_are_trimmed_not_dropped():
+    faqs = [rag._to_source(dict(faq, answer_fr=" ".join(["mot"] * 800)), 0.9 - 0.1 * i) for i, faq in enumerate(FAQS)]
+    prompt = build_prompt("Quand ?", "fr", faqs, 600, 200)
+    assert (prompt.sources_full, prompt.sources_trimmed, prompt.sources_dropped) == (0, 3, 0)
+    assert prompt.context_tokens <= 600
+
+
+def test_long_query_is_truncated():
+    prompt = build_prompt("mot " * 1000, "fr", sources(), 600, 50)
+    assert estimate_tokens(prompt.messages[1]["content"]) < 600 + 50 + 40
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import json
+
+import numpy as np
+
+from app import config, rag
+from app.embedding import create_embedding, faq_text
+
+from conftest import FAQS, write_faqs
+
+
+def test_reload_reembeds_only_changed_faqs(corpus_dir):
+    changed = [dict(FAQS[0], answer_fr="Début décembre."), FAQS[1], FAQS[2]]
+    write_faqs(corpus_dir / "faqs.json", changed)
+    stats = rag.reload_corpus()
+    assert stats["reembedded"] == 1
+    assert stats["updated"] == 1
+
+    corpus = rag.load_corpus()
+    row = corpus.row_of_id[1]
+    np.testing.assert_allclose(corpus.matrix[row], create_embedding(faq_text(changed[0])), atol=1e-6)
+
+
+def test_reembedded_matrix_is_mapped_from_disk(corpus_dir):
+    # The first load already cached the matrix, readable like faqs.json
+    assert not config.EMBEDDINGS_MATRIX_PATH.exists()
+    assert config.RELOADED_MATRIX_PATH.stat().st_mode & 0o777 == (corpus_dir / "faqs.json").stat().st_mode & 0o777
+    write_faqs(corpus_dir / "faqs.json", [*FAQS, dict(FAQS[0], id=9, question_fr="Nouvelle question ?")])
+    rag.reload_corpus()
+    matrix = rag.load_corpus().matrix
+    assert isinstance(matrix, np.memmap)
+    assert matrix.shape[0] == len(FAQS) + 1
+
+    # Another process loading the same faqs.json maps the file instead of embedding
+    rag._corpus = None
+    assert rag.reload_corpus()["reembedded"] == 0
+
+
+def test_unwritable_cache_dir_keeps_private_matrix(corpus_dir, monkeypatch):
+    monkeypatch.setattr(config, "RELOADED_MATRIX_PATH", corpus_dir / "missing" / "sub" / "x.npy")
+    monkeypatch.setattr(config, "RELOADED_META_PATH", corpus_dir / "faqs.json" / "meta.json")
+    write_faqs(corpus_dir / "faqs.json", FAQS[:2])
+    assert rag.reload_corpus()["total"] == 2
+    assert not isinstance(rag.load_corpus().matrix, np.memmap)
+
+
+def test_reload_leaves_pipeline_outputs_alone(tmp_path, monkeypatch, capsys):
+    from process_all_data import SmartFAQGenerator, file_sha256
+
+    (tmp_path / "data").mkdir()
+    out = tmp_path / "out"
+    generator = SmartFAQGenerator(str(tmp_path / "data"), str(out), jobs=1)
+    faqs = generator.process()
+    monkeypatch.setattr(config, "FAQS_PATH", out / "faqs.json")
+    monkeypatch.setattr(config, "EMBEDDINGS_MATRIX_PATH", out / "embeddings.f32.npy")
+    monkeypatch.setattr(config, "EMBEDDINGS_META_PATH", out / "embeddings.meta.json")
+    monkeypatch.setattr(config, "RELOADED_MATRIX_PATH", tmp_path / "cache" / "embeddings.f32.npy")
+    monkeypatch.setattr(config, "RELOADED_META_PATH", tmp_path / "cache" / "embeddings.meta.json")
+    monkeypatch.setattr(config, "CORPUS_HISTORY_PATH", out / "corpus_history.json")
+    monkeypatch.setattr(rag, "_corpus", None)
+    monkeypatch.setattr(rag, "_history", None)
+    assert rag.reload_corpus()["reembedded"] == 0
+
+    # Edit faqs.json by hand: the backend re-embeds it into its own cache
+    write_faqs(out / "faqs.json", [dict(faqs[0], answer_fr="Réponse corrigée."), *faqs[1:]])
+    assert rag.reload_corpus()["reembedded"] == 1
+    assert config.RELOADED_MATRIX_PATH.exists()
+
+    manifest = json.loads((out / "data-manifest.json").read_text(encoding="utf-8"))
+    for name in ("embeddings.f32.npy", "embeddings.meta.json"):
+        assert file_sha256(out / name) == manifest["files"][name]["sha256"]
+    # ...and the next pipeline run still sees that its outputs changed
+    assert not generator.outputs_unchanged(generator.load_manifest())
+    capsys.readouterr()
+    generator.process()
+    assert "nothing to do" not in capsys.readouterr().out
+    assert rag.reload_corpus()["reembedded"] == 0
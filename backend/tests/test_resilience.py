@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import httpx
+
+from app.resilience import CircuitBreaker, RetryPolicy, is_retryable, retry_after_seconds
+
+
+def _status_error(status: int, headers=None) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "http://test")
+    response = httpx.Response(status, headers=headers, request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+def test_only_transient_errors_are_retried():
+    assert is_retryable(_status_error(429))
+    assert is_retryable(_status_error(503))
+    assert not is_retryable(_status_error(400))
+    assert is_retryable(httpx.ConnectTimeout("timeout"))
+    assert not is_retryable(ValueError())
+
+
+def test_retry_after_is_honoured():
+    policy = RetryPolicy(max_retries=3, base_delay=0.1, max_delay=5)
+    assert policy.delay(0, _status_error(429, {"Retry-After": "2"})) == 2.0
+    assert policy.delay(0, _status_error(429, {"Retry-After": "60"})) is None
+    assert policy.delay(3, _status_error(503)) is None
+    assert 0.0 <= policy.delay(1, _status_error(503)) <= 0.2
+    assert retry_after_seconds(_status_error(429, {"Retry-After": "soon"}).response) is None
+
+
+def test_breaker_opens_then_probes(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.resilience.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.is_open()
+
+    now[0] += 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_call()
+    # Only one probe at a time
+    assert breaker.is_open()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
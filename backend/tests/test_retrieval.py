@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import numpy as np
+
+from app import rag
+
+from conftest import FAQS
+
+
+def test_top_k_is_sorted_and_bounded(corpus_dir):
+    query = "Comment inscrire mon équipe ? Quels défis sont proposés ?"
+    sources = rag.retrieve_top_faqs(query, top_k=3)
+    assert [s.id for s in sources] == [2, 3]
+    assert [s.id for s in rag.retrieve_top_faqs(query, top_k=1)] == [2]
+    assert sources[0].similarity >= sources[1].similarity
+
+
+def test_category_filter(corpus_dir):
+    query = "Comment inscrire mon équipe ? Quels défis sont proposés ?"
+    assert [s.id for s in rag.retrieve_top_faqs(query, category="defis")] == [3]
+    assert rag.retrieve_top_faqs(query, category="inconnue") == []
+
+
+def test_restrict_language_keeps_faqs_answered_in_that_language(corpus_dir):
+    query = "Comment inscrire mon équipe ? Quand a lieu la Nuit de l'Info ?"
+    assert [s.id for s in rag.retrieve_top_faqs(query, language="ar")] == [1, 2]
+    sources = rag.retrieve_top_faqs(query, language="ar", restrict_language=True)
+    assert [s.id for s in sources] == [1]
+    assert sources[0].answer_ar == FAQS[0]["answer_ar"]
+
+
+def test_filter_masks_intersect(corpus_dir):
+    corpus = rag.load_corpus()
+    rows = rag._candidate_rows(corpus, "general", "ar")
+    np.testing.assert_array_equal(rows, [corpus.row_of_id[1]])
+    assert rag._candidate_rows(corpus, "inscription", "ar").size == 0
+    assert rag._candidate_rows(corpus, None, None) is None
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from app import config
+
+from conftest import FAQS
+
+
+def _batch(api, **body):
+    return api.post("/api/retrieve/batch", json=body)
+
+
+def test_batch_matches_single_retrieval(api):
+    queries = [FAQS[0]["question_fr"], FAQS[2]["question_fr"], ""]
+    response = _batch(api, queries=queries, top_k=2)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == 3
+    assert results[0][0]["id"] == FAQS[0]["id"]
+    assert results[1][0]["id"] == FAQS[2]["id"]
+    # An empty query has an all-zero embedding: nothing clears the threshold
+    assert results[2] == []
+    assert all(len(row) <= 2 for row in results)
+    assert all(row[0]["similarity"] >= row[-1]["similarity"] for row in results if row)
+
+
+def _ids(api, query, **body):
+    return [hit["id"] for hit in _batch(api, queries=[query], top_k=3, **body).json()["results"][0]]
+
+
+def test_batch_filters_by_category_and_language(api):
+    query = "Comment inscrire mon équipe ? Quels défis sont proposés ?"
+    assert _ids(api, query) == [2, 3]
+    assert _ids(api, query, category="defis") == [3]
+    assert _ids(api, query, category="inconnue") == []
+
+    # Only FAQ 1 has an Arabic answer
+    query = "Comment inscrire mon équipe ? Quand a lieu la Nuit de l'Info ?"
+    assert _ids(api, query) == [1, 2]
+    assert _ids(api, query, language="ar") == [1, 2]
+    assert _ids(api, query, language="ar", restrict_language=True) == [1]
+
+
+def test_top_k_out_of_range_is_rejected(api):
+    assert _batch(api, queries=["date"], top_k=0).status_code == 400
+    assert _batch(api, queries=["date"], top_k=config.MAX_BATCH_TOP_K + 1).status_code == 400
+
+
+def test_too_many_queries_is_rejected(api, monkeypatch):
+    monkeypatch.setattr(config, "MAX_BATCH_QUERIES", 2)
+    assert _batch(api, queries=["a", "b", "c"]).status_code == 413
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.routing import ModelRouter, parse_models
+from benchmarks.fake_openrouter import ANSWER
+
+from conftest import make_client, sources
+
+
+def _route(client, name):
+    return next(r for r in client.router.routes if r.name == name)
+
+
+def test_failing_model_falls_back_to_next(fake_openrouter):
+    client = make_client(fake_openrouter(model_error_rate={"model-a": 1.0}), models=("model-a", "model-b"))
+    assert asyncio.run(client.agenerate("Quand a lieu la Nuit de l'Info ?", "fr", sources())) == ANSWER
+    assert _route(client, "model-a").error_rate() == 1.0
+    assert _route(client, "model-b").error_rate() == 0.0
+
+
+def test_parse_models_keeps_colons_in_ids():
+    assert parse_models("model-a:free=8, model-b", 4) == [("model-a:free", 8), ("model-b", 4)]
+
+
+def test_measured_routes_are_ranked_by_latency():
+    router = ModelRouter([("slow", 1), ("fast", 1), ("new", 1)], failure_threshold=3, reset_timeout=60, min_samples=2)
+    for name, seconds in (("slow", 1.0), ("fast", 0.1)):
+        route = next(r for r in router.routes if r.name == name)
+        for _ in range(2):
+            route.record(True, seconds)
+    # Unmeasured routes first so they get measured, then fastest first
+    assert [r.name for r in router.ranked()] == ["new", "fast", "slow"]
+    route = router.pick(exclude=("new",))
+    assert route.name == "fast"
+    route.release()
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pytest
+
+from pipeline.stream import ShardWriter, iter_json_array
+
+ITEMS = [1234567, 2.5e10, -0.125, "x", "chaîne \"échappée\"", True, False, None,
+         {"text": "a", "n": [1, 22, 333]}, [], *range(100000, 100300)]
+
+
+@pytest.mark.parametrize("indent", [None, 1])
+def test_json_array_is_decoded_whatever_the_block_size(tmp_path, indent):
+    path = tmp_path / "texts.json"
+    path.write_text(json.dumps(ITEMS, ensure_ascii=False, indent=indent), encoding="utf-8")
+    for block_size in [*range(1, 24), 64, 1000]:
+        assert list(iter_json_array(str(path), block_size=block_size)) == ITEMS, block_size
+
+
+@pytest.mark.parametrize("text", ["[1, 2", "[1, 2,", "[1, {\"a\""])
+def test_truncated_json_array_is_rejected(tmp_path, text):
+    path = tmp_path / "texts.json"
+    path.write_text(text, encoding="utf-8")
+    with pytest.raises(ValueError, match="truncated"):
+        list(iter_json_array(str(path), block_size=3))
+
+
+def test_shard_writer_splits_and_indexes_passages(tmp_path):
+    records = [{"text": f"passage {i}", "url": "", "context": ""} for i in range(7)]
+    matrix = np.arange(7 * 4, dtype=np.float32).reshape(7, 4)
+    writer = ShardWriter(str(tmp_path), model="test", shard_size=3)
+    writer.write(records[:2], matrix[:2])
+    writer.write(records[2:], matrix[2:])
+    assert writer.close() == {"total": 7, "shards": 3}
+
+    index = json.loads((tmp_path / "index.json").read_text(encoding="utf-8"))
+    assert [(s["name"], s["first_id"], s["count"]) for s in index["shards"]] == [
+        ("passages-00000", 1, 3), ("passages-00001", 4, 3), ("passages-00002", 7, 1),
+    ]
+    rows = np.concatenate([np.load(tmp_path / f"{s['name']}.f32.npy") for s in index["shards"]])
+    np.testing.assert_array_equal(rows, matrix)
+    lines = [json.loads(line) for s in index["shards"]
+             for line in (tmp_path / f"{s['name']}.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert [line["id"] for line in lines] == list(range(1, 8))
+    assert [line["text"] for line in lines] == [r["text"] for r in records]
+    assert not list(tmp_path.glob("*.tmp"))
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from app import rag
+from app.sync import CorpusHistory, corpus_version, diff
+
+from conftest import FAQS, write_faqs
+
+
+def test_diff_classifies_changes():
+    old = {1: "a", 2: "b", 3: "c"}
+    new = {1: "a", 2: "B", 4: "d"}
+    assert diff(old, new) == ([4], [2], [3])
+
+
+def test_version_ignores_order_but_not_content():
+    assert corpus_version({1: "a", 2: "b"}) == corpus_version({2: "b", 1: "a"})
+    assert corpus_version({1: "a"}) != corpus_version({1: "b"})
+
+
+def test_history_is_bounded_and_persisted(tmp_path):
+    history = CorpusHistory(max_versions=2)
+    for version in ("v1", "v2", "v3"):
+        history.record(version, {1: version})
+    assert history.versions() == ["v2", "v3"]
+    history.save(tmp_path / "history.json")
+    assert CorpusHistory.load(tmp_path / "history.json").get("v3") == {1: "v3"}
+    assert [p.name for p in tmp_path.iterdir()] == ["history.json"]
+
+
+def test_delta_since_previous_version(corpus_dir):
+    since = rag.load_corpus().version
+    changed = [dict(FAQS[0], answer_fr="Nouvelle date."), FAQS[1], dict(FAQS[2], id=4)]
+    write_faqs(corpus_dir / "faqs.json", changed)
+    rag.reload_corpus()
+
+    delta = rag.corpus_delta(since)
+    assert not delta["full"]
+    assert [f["id"] for f in delta["added"]] == [4]
+    assert [f["id"] for f in delta["updated"]] == [1]
+    assert delta["removed"] == [3]
+    assert delta["embedding_ids"] == [4, 1]
+
+
+def test_unknown_version_gets_full_snapshot(corpus_dir):
+    delta = rag.corpus_delta("unknown", with_embeddings=False)
+    assert delta["full"]
+    assert len(delta["added"]) == len(FAQS)
+    assert "embeddings" not in delta
+
+
+def test_etag_returns_304_when_current(api):
+    first = api.get("/api/corpus/delta")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert api.get("/api/corpus/delta", headers={"If-None-Match": etag}).status_code == 304
+    assert api.get("/api/corpus/delta", headers={"If-None-Match": '"stale"'}).status_code == 200
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import numpy as np
+
+from app.vector_index import FlatIndex, IVFIndex
+
+
+def _matrix(n: int = 200, dim: int = 16) -> np.ndarray:
+    x = np.random.default_rng(0).standard_normal((n, dim)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    matrix = _matrix()
+    index = IVFIndex.build(matrix, nlist=8, nprobe=8)
+    index.save(tmp_path / "ivf.npz", "checksum")
+    loaded = IVFIndex.load(tmp_path / "ivf.npz", matrix, "checksum", nprobe=8)
+    assert loaded is not None
+    np.testing.assert_array_equal(loaded.list_rows, index.list_rows)
+    assert IVFIndex.load(tmp_path / "ivf.npz", matrix, "other", nprobe=8) is None
+    # No temp files left behind, and readable like any other data file
+    assert [p.name for p in tmp_path.iterdir()] == ["ivf.npz"]
+    (tmp_path / "plain").write_bytes(b"")
+    assert (tmp_path / "ivf.npz").stat().st_mode & 0o777 == (tmp_path / "plain").stat().st_mode & 0o777
+
+
+def test_truncated_file_is_a_cache_miss(tmp_path):
+    matrix = _matrix()
+    IVFIndex.build(matrix, nlist=8, nprobe=8).save(tmp_path / "ivf.npz", "checksum")
+    data = (tmp_path / "ivf.npz").read_bytes()
+    (tmp_path / "ivf.npz").write_bytes(data[:len(data) // 2])
+    assert IVFIndex.load(tmp_path / "ivf.npz", matrix, "checksum", nprobe=8) is None
+
+
+def test_full_probe_matches_flat_search():
+    matrix = _matrix()
+    queries = matrix[:5]
+    ivf_rows, _ = IVFIndex.build(matrix, nlist=8, nprobe=8).search(queries, 3)
+    flat_rows, _ = FlatIndex(matrix).search(queries, 3)
+    np.testing.assert_array_equal(ivf_rows, flat_rows)
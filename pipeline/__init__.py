@@ -0,0 +1 @@
+"""Streaming stages used by process_all_data.py for large scraped datasets."""
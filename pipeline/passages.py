@@ -0,0 +1,202 @@
+"""Passage chunking to a token budget and MinHash/LSH near-duplicate removal.
+
+Scraped pages repeat navigation, footers and boilerplate. Texts are first cut
+into overlapping passages that fit a token budget, then each passage gets a
+MinHash signature over its word shingles. Signatures are split into bands;
+passages sharing a band are candidates, and only candidates are compared, so
+deduplication is roughly linear in the number of passages instead of
+quadratic.
+"""
+from __future__ import annotations
+
+import math
+import re
+import zlib
+from collections import deque
+from typing import Dict, Iterable, Iterator, List
+
+import numpy as np
+
+
+# Rough LLM token estimate shared by chunking: ~4 characters per token
+CHARS_PER_TOKEN = 4
+_SENTENCE_RE = re.compile(r"(?<=[.!?؟])\s+")
+# Largest prime below 2**32: keeps a * x + b inside uint64
+_PRIME = np.uint64(4294967291)
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def _word_windows(text: str, max_tokens: int, overlap_tokens: int) -> List[str]:
+    """Overlapping word windows for text without sentence breaks."""
+    words = text.split()
+    costs = [(len(w) + 1) / CHARS_PER_TOKEN for w in words]
+    windows = []
+    start = 0
+    while start < len(words):
+        end, size = start, 0.0
+        while end < len(words) and (end == start or size + costs[end] <= max_tokens):
+            size += costs[end]
+            end += 1
+        windows.append(' '.join(words[start:end]))
+        if end == len(words):
+            break
+        # Step back over the last words so consecutive windows share ~overlap_tokens
+        back, overlap = end, 0.0
+        while back - 1 > start and overlap + costs[back - 1] <= overlap_tokens:
+            back -= 1
+            overlap += costs[back]
+        start = back
+    return windows
+
+
+def chunk_passages(
+    records: Iterable[Dict[str, str]],
+    max_tokens: int = 200,
+    overlap_tokens: int = 40,
+) -> Iterator[Dict[str, str]]:
+    """Split texts into passages of at most `max_tokens`, packed by sentence.
+
+    Consecutive passages of the same text share up to `overlap_tokens` of
+    trailing sentences so an answer straddling a cut stays retrievable.
+    """
+    for record in records:
+        text = record['text']
+        if estimate_tokens(text) <= max_tokens:
+            yield record
+            continue
+
+        units: List[str] = []
+        for sentence in _SENTENCE_RE.split(text):
+            if estimate_tokens(sentence) <= max_tokens:
+                units.append(sentence)
+            else:
+                units.extend(_word_windows(sentence, max_tokens, overlap_tokens))
+
+        # Budgets in characters, counting the joining space after each unit
+        max_chars = max_tokens * CHARS_PER_TOKEN + 1
+        overlap_chars = overlap_tokens * CHARS_PER_TOKEN
+        current: List[str] = []
+        size = 0
+        for unit in units:
+            cost = len(unit) + 1
+            if current and size + cost > max_chars:
+                yield dict(record, text=' '.join(current))
+                tail: List[str] = []
+                tail_size = 0
+                for prev in reversed(current):
+                    if tail_size + len(prev) + 1 > overlap_chars:
+                        break
+                    tail.insert(0, prev)
+                    tail_size += len(prev) + 1
+                if tail_size + cost > max_chars:
+                    tail, tail_size = [], 0
+                current, size = tail, tail_size
+            current.append(unit)
+            size += cost
+        if current:
+            yield dict(record, text=' '.join(current))
+
+
+class MinHashLSH:
+    """Near-duplicate index over word-shingle MinHash signatures.
+
+    With `bands` x `rows` = `num_perm`, passages with Jaccard similarity s
+    collide in at least one band with probability 1 - (1 - s**rows)**bands;
+    collisions are then confirmed against `threshold` on the signatures.
+    `capacity` > 0 keeps only the most recent kept passages (ring buffer),
+    which bounds memory for streaming runs.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 3,
+        capacity: int = 0,
+        seed: int = 1,
+    ) -> None:
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.capacity = capacity
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), size=num_perm, dtype=np.uint64)
+
+        # band key -> ids of every kept passage in that bucket, oldest first
+        self._tables: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self._slots: deque = deque()
+        self._next_id = 0
+        self._by_id: Dict[int, np.ndarray] = {}
+
+    def signature(self, text: str) -> np.ndarray:
+        words = text.lower().split()
+        n = self.shingle_size
+        shingles = {' '.join(words[i:i + n]) for i in range(max(1, len(words) - n + 1))}
+        x = np.fromiter(
+            (zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles)
+        ) % _PRIME
+        # h_i(x) = (a_i * x + b_i) mod p, minimized over shingles
+        hashed = (np.outer(x, self._a) + self._b) % _PRIME
+        return hashed.min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, sig: np.ndarray) -> List[bytes]:
+        return [sig[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def is_duplicate(self, sig: np.ndarray) -> bool:
+        seen = set()
+        for table, key in zip(self._tables, self._band_keys(sig)):
+            for other in table.get(key, ()):
+                if other in seen:
+                    continue
+                seen.add(other)
+                if np.count_nonzero(self._by_id[other] == sig) >= self.threshold * self.num_perm:
+                    return True
+        return False
+
+    def add(self, sig: np.ndarray) -> None:
+        doc = self._next_id
+        self._next_id += 1
+        keys = self._band_keys(sig)
+        for table, key in zip(self._tables, keys):
+            table.setdefault(key, []).append(doc)
+        self._by_id[doc] = sig
+        if not self.capacity:
+            return
+
+        self._slots.append((doc, keys))
+        if len(self._slots) > self.capacity:
+            old, old_keys = self._slots.popleft()
+            for table, key in zip(self._tables, old_keys):
+                ids = table[key]
+                ids.remove(old)
+                if not ids:
+                    del table[key]
+            del self._by_id[old]
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+
+def drop_near_duplicates(
+    records: Iterable[Dict[str, str]],
+    threshold: float = 0.8,
+    capacity: int = 0,
+) -> Iterator[Dict[str, str]]:
+    """Keep the first of every group of passages with Jaccard >= `threshold`."""
+    lsh = MinHashLSH(threshold=threshold, capacity=capacity)
+    for record in records:
+        sig = lsh.signature(record['text'])
+        if lsh.is_duplicate(sig):
+            continue
+        lsh.add(sig)
+        yield record
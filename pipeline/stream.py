@@ -0,0 +1,256 @@
+"""Bounded-memory ingestion: read -> clean -> dedupe -> chunk -> embed -> write.
+
+Chunking and near-duplicate removal live in pipeline/passages.py.
+
+Every stage is a generator, so only one read buffer, one embedding batch per
+worker and one output shard are ever held in memory, whatever the input size.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+
+READ_BLOCK = 1 << 20  # bytes read at a time from .json arrays
+_VALUE_END = frozenset(' \t\r\n,]')
+
+
+def iter_json_array(path: str, block_size: int = READ_BLOCK) -> Iterator[Any]:
+    """Yield the items of a top-level JSON array without loading the whole file."""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buf = ''
+        pos = 0
+        started = False
+        eof = False
+        while True:
+            # Skip whitespace, the opening bracket and separators
+            while pos < len(buf) and (buf[pos].isspace() or buf[pos] == ','):
+                pos += 1
+            if not started and pos < len(buf):
+                if buf[pos] != '[':
+                    raise ValueError(f"{path}: expected a JSON array")
+                started = True
+                pos += 1
+                continue
+            if pos < len(buf) and buf[pos] == ']':
+                return
+
+            try:
+                if pos >= len(buf):
+                    raise ValueError("need more data")
+                item, end = decoder.raw_decode(buf, pos)
+                # Only a following separator proves the value complete: a number
+                # cut at the block edge ("2." of "2.5e10") still decodes
+                if not eof and (end == len(buf) or buf[end] not in _VALUE_END):
+                    raise ValueError("need more data")
+            except ValueError:
+                if eof:
+                    if started or buf[pos:].strip():
+                        raise ValueError(f"{path}: truncated JSON array")
+                    return
+                chunk = f.read(block_size)
+                eof = not chunk
+                buf = buf[pos:] + chunk
+                pos = 0
+                continue
+
+            yield item
+            pos = end
+
+
+def iter_json_lines(path: str) -> Iterator[Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def iter_scraped(data_dir: str, data_type: str) -> Iterator[Any]:
+    """Records of `<data_type>.jsonl` if present, else of the `<data_type>.json` array."""
+    jsonl = os.path.join(data_dir, f"{data_type}.jsonl")
+    if os.path.exists(jsonl):
+        return iter_json_lines(jsonl)
+    path = os.path.join(data_dir, f"{data_type}.json")
+    if os.path.exists(path):
+        return iter_json_array(path)
+    return iter(())
+
+
+def clean(records: Iterable[Any], min_chars: int = 40) -> Iterator[Dict[str, str]]:
+    """Normalize scraped text items (strings or {"text"/"content", "url", "context"})."""
+    for item in records:
+        if isinstance(item, dict):
+            text = item.get('text') or item.get('content') or ''
+            url = item.get('url', '')
+            context = item.get('context', '')
+        else:
+            text, url, context = str(item), '', ''
+        text = ' '.join(text.split())
+        if len(text) >= min_chars:
+            yield {"text": text, "url": url, "context": context}
+
+
+class BloomFilter:
+    """Fixed-size set membership with a bounded false-positive rate."""
+
+    def __init__(self, capacity: int, error_rate: float = 1e-4) -> None:
+        bits = int(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.size = max(bits, 8)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+
+    def _positions(self, key: bytes) -> List[int]:
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key: bytes) -> bool:
+        """Insert `key`; return True if it was (probably) already present."""
+        present = True
+        for pos in self._positions(key):
+            byte, bit = divmod(pos, 8)
+            if not self.bits[byte] & (1 << bit):
+                present = False
+                self.bits[byte] |= (1 << bit)
+        return present
+
+
+def dedupe_exact(records: Iterable[Dict[str, str]], capacity: int = 10_000_000) -> Iterator[Dict[str, str]]:
+    """Drop repeated texts (case-insensitive) with a Bloom filter of fixed size."""
+    seen = BloomFilter(capacity)
+    for record in records:
+        if not seen.add(record['text'].lower().encode('utf-8')):
+            yield record
+
+
+def batched(records: Iterable[Dict[str, str]], size: int) -> Iterator[List[Dict[str, str]]]:
+    batch: List[Dict[str, str]] = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def embed_batches(
+    batches: Iterable[List[Dict[str, str]]],
+    embed_fn: Callable[[List[str]], np.ndarray],
+    jobs: int = 1,
+) -> Iterator[Tuple[List[Dict[str, str]], np.ndarray]]:
+    """Embed batches in order, with at most 2 * jobs batches in flight."""
+    if jobs <= 1:
+        for batch in batches:
+            yield batch, embed_fn([r['text'] for r in batch])
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending: deque = deque()
+        for batch in batches:
+            pending.append((batch, pool.submit(embed_fn, [r['text'] for r in batch])))
+            if len(pending) >= 2 * jobs:
+                done_batch, future = pending.popleft()
+                yield done_batch, future.result()
+        while pending:
+            done_batch, future = pending.popleft()
+            yield done_batch, future.result()
+
+
+class ShardWriter:
+    """Append-friendly output: fixed-size shards of passages-NNNNN.jsonl + .f32.npy.
+
+    Records and rows go straight to disk as they arrive, so memory does not
+    depend on the shard size. A shard becomes visible (renamed into place and
+    listed in ``index.json``) only once complete, so readers and reruns never
+    see a partial one.
+    """
+
+    def __init__(self, out_dir: str, model: str, shard_size: int = 50_000) -> None:
+        self.out_dir = out_dir
+        self.model = model
+        self.shard_size = shard_size
+        self.shards: List[Dict[str, Any]] = []
+        self.total = 0
+        self._count = 0
+        self._dimension = 0
+        self._text = None
+        self._rows = None
+        self._hash = None
+        os.makedirs(out_dir, exist_ok=True)
+
+    def _path(self, suffix: str) -> str:
+        return os.path.join(self.out_dir, f"passages-{len(self.shards):05d}{suffix}")
+
+    def write(self, records: List[Dict[str, str]], matrix: np.ndarray) -> None:
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        offset = 0
+        while offset < len(records):
+            if self._text is None:
+                self._text = open(self._path('.jsonl.tmp'), 'w', encoding='utf-8')
+                self._rows = open(self._path('.rows.tmp'), 'wb')
+                self._hash = hashlib.sha256()
+            take = min(self.shard_size - self._count, len(records) - offset)
+            first_id = self.total + self._count + 1
+            for i, record in enumerate(records[offset:offset + take]):
+                self._text.write(json.dumps(dict(record, id=first_id + i), ensure_ascii=False, separators=(',', ':')))
+                self._text.write('\n')
+            rows = matrix[offset:offset + take].tobytes()
+            self._rows.write(rows)
+            self._hash.update(rows)
+            self._dimension = matrix.shape[1]
+            self._count += take
+            offset += take
+            if self._count == self.shard_size:
+                self._flush()
+
+    def _flush(self) -> None:
+        if self._text is None:
+            return
+        self._text.close()
+        self._rows.close()
+        os.replace(self._path('.jsonl.tmp'), self._path('.jsonl'))
+
+        # Prepend the .npy header now that the row count is known
+        rows_tmp = self._path('.rows.tmp')
+        npy_tmp = self._path('.f32.npy.tmp')
+        header = {'descr': '<f4', 'fortran_order': False, 'shape': (self._count, self._dimension)}
+        with open(npy_tmp, 'wb') as out, open(rows_tmp, 'rb') as rows:
+            np.lib.format.write_array_header_1_0(out, header)
+            for block in iter(lambda: rows.read(READ_BLOCK), b''):
+                out.write(block)
+        os.remove(rows_tmp)
+        os.replace(npy_tmp, self._path('.f32.npy'))
+
+        self.shards.append({
+            "name": os.path.basename(self._path('')),
+            "first_id": self.total + 1,
+            "count": self._count,
+            "checksum": self._hash.hexdigest(),
+        })
+        self.total += self._count
+        self._count = 0
+        self._text = self._rows = self._hash = None
+        self._write_index()
+
+    def _write_index(self) -> None:
+        index = {"model": self.model, "total": self.total, "shards": self.shards}
+        tmp = os.path.join(self.out_dir, 'index.json.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(index, f, separators=(',', ':'))
+        os.replace(tmp, os.path.join(self.out_dir, 'index.json'))
+
+    def close(self) -> Dict[str, int]:
+        self._flush()
+        self._write_index()
+        return {"total": self.total, "shards": len(self.shards)}
@@ -4,32 +4,135 @@ Smart FAQ Generator - Enhanced Version
 Generates 25+ FAQs optimized for all 3 AI modes (Offline, Hybrid, Online)
 """
 
+import argparse
+import gzip
+import hashlib
 import json
 import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from collections import Counter
+from itertools import islice
+
+import numpy as np
+
+try:
+    import brotli
+except ImportError:  # optional: .br payloads are skipped without it
+    brotli = None
+
+# Share the backend's deterministic embedder and artifact format
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'backend'))
+from app.artifacts import atomic_write, sha256_bytes, write_embedding_artifact  # noqa: E402
+from app.embedding import DIMENSION, MODEL_NAME, embed_batch, faq_text  # noqa: E402
+from app.sync import CorpusHistory, corpus_version, faq_hash  # noqa: E402
+from benchmarks.report import peak_rss_mb  # noqa: E402
+from pipeline.passages import chunk_passages, drop_near_duplicates  # noqa: E402
+from pipeline.stream import (  # noqa: E402
+    ShardWriter, batched, clean, dedupe_exact, embed_batches, iter_scraped,
+)
+
+DATA_TYPES = ['texts', 'links', 'images', 'pdfs', 'videos', 'buttons']
+# Any change to these files changes the generated artifacts (keep in sync with
+# the app/pipeline imports above)
+GENERATOR_FILES = [
+    os.path.join(ROOT_DIR, 'process_all_data.py'),
+    os.path.join(ROOT_DIR, 'backend', 'app', 'embedding.py'),
+    os.path.join(ROOT_DIR, 'backend', 'app', 'artifacts.py'),
+    os.path.join(ROOT_DIR, 'backend', 'app', 'sync.py'),
+    os.path.join(ROOT_DIR, 'pipeline', 'stream.py'),
+    os.path.join(ROOT_DIR, 'pipeline', 'passages.py'),
+]
+# Scraped texts shorter than this are navigation crumbs, not content
+MIN_PASSAGE_CHARS = 40
+# Texts per process-pool task; below one chunk we embed in-process
+EMBED_CHUNK_SIZE = 512
+# Passages per output shard in --stream mode
+STREAM_SHARD_SIZE = 50000
+# Passage size budget (estimated LLM tokens) and overlap between consecutive chunks
+PASSAGE_MAX_TOKENS = 200
+PASSAGE_OVERLAP_TOKENS = 40
+# Passages whose word-shingle Jaccard similarity reaches this are near-duplicates
+NEAR_DUPLICATE_THRESHOLD = 0.8
+# Recent passages remembered by the near-duplicate index in --stream mode. Each
+# one costs ~2 KB (signature + band tables), so this bounds the index to ~20 MB
+STREAM_NEAR_DUPLICATE_WINDOW = 10000
+# Quantized copies of the FAQ matrix: dtype -> (matrix file, header file)
+COMPACT_MATRICES = {
+    'float16': ('embeddings.f16.npy', 'embeddings.f16.meta.json'),
+    'int8': ('embeddings.i8.npy', 'embeddings.i8.meta.json'),
+}
+# Corpus versions kept in corpus_history.json for delta sync (/api/corpus/delta)
+CORPUS_HISTORY_SIZE = 20
+# Payloads served precompressed (.gz, and .br when brotli is installed)
+PRECOMPRESSED_FILES = ['faqs.min.json', 'embeddings.json', 'embeddings.f16.npy', 'embeddings.i8.npy']
+
+
+def _embed_chunk(texts):
+    """Process-pool task (top-level so it can be pickled)"""
+    return embed_batch(texts).astype(np.float32)
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _write_bytes(path, data):
+    atomic_write(path, lambda f: f.write(data))
+
+
+def write_json(path, obj, compact=False):
+    """Atomic, byte-for-byte reproducible JSON write"""
+    if compact:
+        text = json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+    else:
+        text = json.dumps(obj, ensure_ascii=False, indent=2)
+    _write_bytes(path, text.encode('utf-8'))
+
 
 class SmartFAQGenerator:
-    def __init__(self, data_dir='Script/data/nuit_info'):
+    def __init__(self, data_dir='Script/data/nuit_info', output_dir='frontend/public/data', jobs=None, stream=False):
         self.data_dir = data_dir
+        self.output_dir = output_dir
+        self.jobs = jobs or os.cpu_count() or 1
+        self.stream = stream
+        self.manifest_path = os.path.join(output_dir, 'build_manifest.json')
+        
+    def output_path(self, name):
+        return os.path.join(self.output_dir, name)
         
     def load_scraped_data(self):
         """Load all scraped data"""
         print("📥 Loading scraped data...")
         
         data = {}
-        for data_type in ['texts', 'links', 'images', 'pdfs', 'videos', 'buttons']:
+        for data_type in DATA_TYPES:
             file_path = f"{self.data_dir}/{data_type}.json"
             if os.path.exists(file_path):
                 with open(file_path, 'r', encoding='utf-8') as f:
                     data[data_type] = json.load(f)
                 print(f"  ✓ {data_type}: {len(data[data_type])} items")
+            elif os.path.exists(file_path + 'l'):
+                data[data_type] = list(iter_scraped(self.data_dir, data_type))
+                print(f"  ✓ {data_type}: {len(data[data_type])} items (JSON Lines)")
             else:
                 data[data_type] = []
                 print(f"  ⚠️ {data_type}: file not found")
         
         return data
     
+    def load_scraped_sample(self):
+        """Streaming mode: only materialize the records generate_faqs reads (first 3 videos)"""
+        print("📥 Streaming scraped data...")
+        return {'videos': list(islice(iter_scraped(self.data_dir, 'videos'), 3))}
+    
     def generate_faqs(self, data):
         """Generate 25+ useful FAQs from scraped data"""
         print("\n🔨 Generating smart FAQs...")
@@ -384,9 +487,29 @@ class SmartFAQGenerator:
         """Save FAQs to frontend"""
         print("\n💾 Saving FAQs to frontend...")
         
+        faqs_path = self.output_path('faqs.json')
+        content_hash = sha256_bytes(json.dumps(faqs, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+        
+        # Record this version so clients holding an older one can fetch a delta
+        hashes = {faq['id']: faq_hash(faq) for faq in faqs}
+        version = corpus_version(hashes)
+        history_path = self.output_path('corpus_history.json')
+        history = CorpusHistory.load(history_path, CORPUS_HISTORY_SIZE)
+        history.record(version, hashes)
+        
+        # Keep the previous timestamp when nothing changed, so rebuilds are byte-identical
+        last_updated = datetime.now().isoformat()
+        if os.path.exists(faqs_path):
+            with open(faqs_path, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+            if previous.get('content_hash') == content_hash:
+                last_updated = previous.get('last_updated', last_updated)
+        
         output = {
             "version": "6.0-enhanced",
-            "last_updated": datetime.now().isoformat(),
+            "last_updated": last_updated,
+            "content_hash": content_hash,
+            "corpus_version": version,
             "source": "https://www.nuitdelinfo.com",
             "total_faqs": len(faqs),
             "ai_modes_info": {
@@ -412,11 +535,12 @@ class SmartFAQGenerator:
             "faqs": faqs
         }
         
-        os.makedirs('frontend/public/data', exist_ok=True)
-        with open('frontend/public/data/faqs.json', 'w', encoding='utf-8') as f:
-            json.dump(output, f, ensure_ascii=False, indent=2)
+        os.makedirs(self.output_dir, exist_ok=True)
+        write_json(faqs_path, output)
+        write_json(self.output_path('faqs.min.json'), output, compact=True)
+        history.save(history_path)
         
-        print(f"  ✅ Saved {len(faqs)} FAQs to frontend/public/data/faqs.json")
+        print(f"  ✅ Saved {len(faqs)} FAQs to {faqs_path}")
         
         # Show categories distribution
         categories = Counter(faq['category'] for faq in faqs)
@@ -424,55 +548,238 @@ class SmartFAQGenerator:
         for cat, count in categories.items():
             print(f"  • {cat}: {count}")
     
-    def create_embeddings(self, faqs):
+    def embed_texts(self, texts):
+        """Embed texts with the shared deterministic embedder, chunked across a process pool"""
+        if not texts:
+            return np.zeros((0, DIMENSION), dtype=np.float32)
+        if self.jobs <= 1 or len(texts) <= EMBED_CHUNK_SIZE:
+            return _embed_chunk(texts)
+        
+        chunks = [texts[i:i + EMBED_CHUNK_SIZE] for i in range(0, len(texts), EMBED_CHUNK_SIZE)]
+        with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+            # map() keeps chunk order, so rows stay aligned with texts
+            return np.vstack(list(pool.map(_embed_chunk, chunks)))
+    
+    def create_embeddings(self, faqs, matrix):
         """Create embeddings for Hybrid mode"""
         print("\n🧮 Creating embeddings for Hybrid mode...")
         
         embeddings = []
-        for faq in faqs:
-            # Create embedding vector from text
-            text = f"{faq['question_fr']} {faq['answer_fr']}"
-            words = text.lower().split()
-            
-            # Create 384D vector (matches MiniLM)
-            embedding = [0.0] * 384
-            for word in words:
-                h = hash(word) % 384
-                embedding[h] += 1.0
-            
-            # Normalize
-            magnitude = sum(x*x for x in embedding) ** 0.5
-            if magnitude > 0:
-                embedding = [x / magnitude for x in embedding]
-            
+        for faq, row in zip(faqs, np.round(matrix.astype(np.float64), 6).tolist()):
             embeddings.append({
                 "id": faq["id"],
                 "question_fr": faq["question_fr"],
                 "answer_fr": faq["answer_fr"],
                 "answer_ar": faq.get("answer_ar", ""),
                 "category": faq["category"],
-                "embedding": embedding
+                "embedding": row
             })
         
         output = {
             "version": "6.0",
-            "model": "simple-hash-384d",
+            "corpus_version": corpus_version({faq['id']: faq_hash(faq) for faq in faqs}),
+            "model": MODEL_NAME,
             "total_embeddings": len(embeddings),
             "embeddings": embeddings
         }
         
-        with open('frontend/public/data/embeddings.json', 'w', encoding='utf-8') as f:
-            json.dump(output, f, ensure_ascii=False, indent=2)
+        write_json(self.output_path('embeddings.json'), output, compact=True)
         
         print(f"  ✅ Saved {len(embeddings)} embeddings")
     
-    def process(self):
+    def create_embedding_matrix(self, faqs, matrix):
+        """Write the float32 matrix memory-mapped by the backend"""
+        print("\n🧮 Creating binary embedding matrix for the backend...")
+        
+        ids = [faq['id'] for faq in faqs]
+        source_checksum = file_sha256(self.output_path('faqs.json'))
+        # Headers also accept the minified copy (and its .gz, which decompresses to it)
+        aliases = [file_sha256(self.output_path('faqs.min.json'))]
+        meta = write_embedding_artifact(
+            self.output_path('embeddings.f32.npy'),
+            self.output_path('embeddings.meta.json'),
+            ids=ids,
+            matrix=matrix,
+            model=MODEL_NAME,
+            source_checksum=source_checksum,
+            source_checksums=aliases,
+        )
+        print(f"  ✅ Saved {meta['count']}x{meta['dimension']} float32 matrix ({meta['model']})")
+        
+        for dtype, (matrix_name, meta_name) in COMPACT_MATRICES.items():
+            write_embedding_artifact(
+                self.output_path(matrix_name),
+                self.output_path(meta_name),
+                ids=ids,
+                matrix=matrix,
+                model=MODEL_NAME,
+                source_checksum=source_checksum,
+                dtype=dtype,
+                source_checksums=aliases,
+            )
+            print(f"  ✅ Saved {dtype} copy ({matrix_name})")
+    
+    def compact_files(self):
+        """Compact payloads for the PWA, all listed in data-manifest.json"""
+        names = ['faqs.min.json', 'embeddings.i8.scale.npy']
+        for matrix_name, meta_name in COMPACT_MATRICES.values():
+            names += [matrix_name, meta_name]
+        for name in PRECOMPRESSED_FILES:
+            names.append(name + '.gz')
+            if brotli is not None:
+                names.append(name + '.br')
+        return names
+    
+    def create_compact_payloads(self):
+        """Precompress payloads, write the cache-busting manifest and a size report"""
+        print("\n🗜️  Precompressing payloads...")
+        
+        for name in PRECOMPRESSED_FILES:
+            with open(self.output_path(name), 'rb') as f:
+                raw = f.read()
+            # mtime=0 keeps the .gz byte-identical between builds
+            _write_bytes(self.output_path(name + '.gz'), gzip.compress(raw, compresslevel=9, mtime=0))
+            if brotli is not None:
+                _write_bytes(self.output_path(name + '.br'), brotli.compress(raw, quality=11))
+        
+        # Content hashes let clients cache files forever and refetch only when the hash changes
+        files = {}
+        for name in ['faqs.json', 'embeddings.json', 'embeddings.f32.npy', 'embeddings.meta.json'] + self.compact_files():
+            path = self.output_path(name)
+            files[name] = {"sha256": file_sha256(path), "size": os.path.getsize(path)}
+        write_json(self.output_path('data-manifest.json'), {"model": MODEL_NAME, "files": files})
+        
+        print("\n📏 Payload sizes (raw / gzip / brotli):")
+        for name in ['faqs.json'] + PRECOMPRESSED_FILES:
+            sizes = []
+            for path in (name, name + '.gz', name + '.br'):
+                path = self.output_path(path)
+                sizes.append(f"{os.path.getsize(path) / 1024:.1f} KB" if os.path.exists(path) else "-")
+            print(f"  • {name:<22} {' / '.join(sizes)}")
+    
+    def passage_stages(self, texts, near_duplicate_window=0):
+        """clean -> exact dedupe -> chunk to the token budget -> near-duplicate removal"""
+        passages = clean(texts, MIN_PASSAGE_CHARS)
+        passages = dedupe_exact(passages)
+        passages = chunk_passages(passages, PASSAGE_MAX_TOKENS, PASSAGE_OVERLAP_TOKENS)
+        return drop_near_duplicates(passages, NEAR_DUPLICATE_THRESHOLD, capacity=near_duplicate_window)
+    
+    def extract_passages(self, data):
+        """Clean scraped texts into unique passages (strings or {"text", "url", "context"} items)"""
+        texts = data.get('texts', [])
+        passages = [dict(p, id=i) for i, p in enumerate(self.passage_stages(texts), start=1)]
+        print(f"  ✓ {len(texts)} scraped texts -> {len(passages)} passages")
+        return passages
+    
+    def create_passages(self, data):
+        """Embed scraped passages in parallel and write them next to the FAQ artifacts"""
+        print("\n📚 Embedding scraped passages...")
+        
+        passages = self.extract_passages(data)
+        start = time.perf_counter()
+        matrix = self.embed_texts([p['text'] for p in passages])
+        elapsed = time.perf_counter() - start
+        
+        passages_path = self.output_path('passages.json')
+        write_json(passages_path, {"model": MODEL_NAME, "total_passages": len(passages), "passages": passages}, compact=True)
+        write_embedding_artifact(
+            self.output_path('passages.f32.npy'),
+            self.output_path('passages.meta.json'),
+            ids=[p['id'] for p in passages],
+            matrix=matrix,
+            model=MODEL_NAME,
+            source_checksum=file_sha256(passages_path),
+        )
+        
+        print(f"  ✅ Saved {len(passages)} passages ({elapsed:.2f}s, {self.jobs} workers)")
+    
+    def create_passages_streaming(self):
+        """Bounded-memory variant of create_passages for multi-GB crawls.
+        
+        texts.jsonl (or texts.json, parsed incrementally) flows through
+        clean -> dedupe -> chunk -> embed -> write one batch at a time; output
+        goes to passages/ as fixed-size shards listed in passages/index.json.
+        """
+        print("\n📚 Streaming scraped passages...")
+        
+        start = time.perf_counter()
+        passages = self.passage_stages(iter_scraped(self.data_dir, 'texts'), STREAM_NEAR_DUPLICATE_WINDOW)
+        writer = ShardWriter(self.output_path('passages'), MODEL_NAME, STREAM_SHARD_SIZE)
+        for batch, matrix in embed_batches(batched(passages, EMBED_CHUNK_SIZE), _embed_chunk, self.jobs):
+            writer.write(batch, matrix)
+        stats = writer.close()
+        elapsed = time.perf_counter() - start
+        
+        print(f"  ✅ Saved {stats['total']} passages in {stats['shards']} shards "
+              f"({elapsed:.2f}s, {self.jobs} workers, peak RSS {peak_rss_mb():.0f} MB)")
+    
+    def output_files(self):
+        names = ['faqs.json', 'embeddings.json', 'embeddings.f32.npy', 'embeddings.meta.json', 'data-manifest.json',
+                 'corpus_history.json']
+        names += self.compact_files()
+        if self.stream:
+            names.append(os.path.join('passages', 'index.json'))
+        else:
+            names += ['passages.json', 'passages.f32.npy', 'passages.meta.json']
+        return [self.output_path(name) for name in names]
+    
+    def input_fingerprint(self, manifest):
+        """Content hashes of every input; files whose size/mtime match the manifest are not re-hashed"""
+        known = manifest.get('files', {})
+        files = {}
+        paths = GENERATOR_FILES + [f"{self.data_dir}/{t}.{ext}" for t in DATA_TYPES for ext in ('json', 'jsonl')]
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            st = os.stat(path)
+            stat = [st.st_size, st.st_mtime_ns]
+            previous = known.get(path)
+            sha = previous['sha256'] if previous and previous['stat'] == stat else file_sha256(path)
+            files[path] = {"stat": stat, "sha256": sha}
+        
+        inputs = {path: entry['sha256'] for path, entry in files.items()}
+        return {"model": MODEL_NAME, "stream": self.stream, "inputs": inputs}, files
+    
+    def load_manifest(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def outputs_unchanged(self, manifest):
+        """All outputs still exist exactly as the last build wrote them"""
+        outputs = manifest.get('outputs', {})
+        for path in self.output_files():
+            if not os.path.exists(path):
+                return False
+            st = os.stat(path)
+            if outputs.get(path) != [st.st_size, st.st_mtime_ns]:
+                return False
+        return True
+    
+    def save_manifest(self, fingerprint, files):
+        outputs = {}
+        for path in self.output_files():
+            st = os.stat(path)
+            outputs[path] = [st.st_size, st.st_mtime_ns]
+        write_json(self.manifest_path, {"fingerprint": fingerprint, "files": files, "outputs": outputs})
+    
+    def process(self, force=False):
         """Main processing pipeline"""
         print("🚀 Smart FAQ Generator - Enhanced Version\n")
         print("=" * 60)
         
+        # Skip everything when inputs and outputs are exactly those of the last build
+        manifest = self.load_manifest()
+        fingerprint, files = self.input_fingerprint(manifest)
+        if not force and manifest.get('fingerprint') == fingerprint and self.outputs_unchanged(manifest):
+            print("✅ Inputs unchanged since last build, nothing to do (use --force to rebuild)")
+            with open(self.output_path('faqs.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)['faqs']
+        
         # Load data
-        data = self.load_scraped_data()
+        data = self.load_scraped_sample() if self.stream else self.load_scraped_data()
         
         # Generate FAQs
         faqs = self.generate_faqs(data)
@@ -481,7 +788,16 @@ class SmartFAQGenerator:
         self.save_faqs(faqs)
         
         # Create embeddings
-        self.create_embeddings(faqs)
+        matrix = self.embed_texts([faq_text(faq) for faq in faqs])
+        self.create_embeddings(faqs, matrix)
+        self.create_embedding_matrix(faqs, matrix)
+        self.create_compact_payloads()
+        if self.stream:
+            self.create_passages_streaming()
+        else:
+            self.create_passages(data)
+        
+        self.save_manifest(fingerprint, files)
         
         print("\n" + "=" * 60)
         print("✅ Processing complete!\n")
@@ -499,5 +815,14 @@ class SmartFAQGenerator:
 
 
 if __name__ == '__main__':
-    generator = SmartFAQGenerator()
-    generator.process()
+    parser = argparse.ArgumentParser(description="Generate FAQs, embeddings and passages for the assistant")
+    parser.add_argument('--data-dir', default='Script/data/nuit_info')
+    parser.add_argument('--output-dir', default='frontend/public/data')
+    parser.add_argument('--jobs', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--force', action='store_true', help="rebuild even if inputs are unchanged")
+    parser.add_argument('--stream', action='store_true',
+                        help="bounded-memory ingestion of large crawls (JSON Lines or incremental JSON)")
+    args = parser.parse_args()
+    
+    generator = SmartFAQGenerator(args.data_dir, args.output_dir, args.jobs, stream=args.stream)
+    generator.process(force=args.force)